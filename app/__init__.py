@@ -1,8 +1,32 @@
 # app/__init__.py
+import os
+from typing import Any, Callable, Optional
+
 from flask import Flask
 from flask_cors import CORS
 
-app = Flask(__name__)
-CORS(app)
 
-from app.api import routes
+def create_app(
+    mode: Optional[str] = None,
+    warm_up: Optional[bool] = None,
+    ig_client_factory: Optional[Callable[[], Any]] = None,
+) -> Flask:
+    """
+    Build the Flask app without touching the network.
+
+    IG clients are created lazily by ApiContext on the first request that needs
+    them, or in the background when warm_up is enabled (APP_WARM_UP, default on).
+    """
+    from app.api.context import ApiContext
+    from app.api.routes import api
+
+    app = Flask(__name__)
+    CORS(app)
+    app.extensions["api_context"] = ApiContext(mode, ig_client_factory)
+    app.register_blueprint(api)
+
+    if warm_up is None:
+        warm_up = os.getenv("APP_WARM_UP", "true").lower() == "true"
+    if warm_up:
+        app.extensions["api_context"].warm_up()
+    return app
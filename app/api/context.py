@@ -0,0 +1,170 @@
+# app/api/context.py
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.services.ig_client import IGAPIError
+from config.settings import STREAM_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class ApiContext:
+    """
+    Clients behind the API routes, built on first use instead of at import.
+
+    HEDGER_MODE=local (default) builds IGClient and DeltaHedger in this
+    process; HEDGER_MODE=worker attaches to a running engine (see app.engine).
+    warm_up() builds them on a background thread so the app can start serving
+    /api/ready immediately. ig_client_factory replaces the logged-in IGClient
+    in local mode, e.g. with the load test's in-process fake.
+    """
+
+    def __init__(
+        self, mode: Optional[str] = None, ig_client_factory: Optional[Callable[[], Any]] = None
+    ):
+        self.mode = (mode or os.getenv("HEDGER_MODE", "local")).lower()
+        if self.mode not in ("local", "worker"):
+            raise ValueError(f"Unknown HEDGER_MODE: {self.mode}")
+
+        self.state = "cold"  # cold | warming | ready | failed
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.ig_client_factory = ig_client_factory
+        self._hedger = None
+        self._ig_client = None
+        self._price_history = None
+        self._lock = threading.Lock()
+
+    @property
+    def hedger(self) -> Any:
+        self.initialize()
+        return self._hedger
+
+    @property
+    def ig_client(self) -> Any:
+        self.initialize()
+        return self._ig_client
+
+    @property
+    def price_history(self) -> Any:
+        self.initialize()
+        return self._price_history
+
+    def initialize(self) -> None:
+        """Build the clients once; concurrent callers wait for the first build"""
+        if self.state == "ready":
+            return
+        with self._lock:
+            if self.state == "ready":
+                return
+            self.state = "warming"
+            started = time.monotonic()
+            try:
+                if self.mode == "worker":
+                    self._build_worker()
+                else:
+                    self._build_local()
+                self._warm_pricing()
+            except IGAPIError as e:
+                self._fail(f"IG API Error: {str(e)}")
+                raise
+            except Exception as e:
+                self._fail(f"Failed to initialize clients: {str(e)}")
+                raise
+            self.timings["total"] = round(time.monotonic() - started, 3)
+            self.error = None
+            self.state = "ready"
+            logger.info("API clients ready in %.3fs (%s mode)", self.timings["total"], self.mode)
+
+    def _fail(self, message: str) -> None:
+        self.state = "failed"
+        self.error = message
+        logger.critical(message)
+
+    def _timed(self, name: str, started: float) -> None:
+        self.timings[name] = round(time.monotonic() - started, 3)
+
+    def _build_local(self) -> None:
+        from app.core.delta_hedger import DeltaHedger
+        from app.core.hedge_state import HedgeStateStore
+        from app.services.ig_client import IGClient
+        from app.services.price_history import PriceHistoryStore
+        from app.services.price_stream import PriceStreamClient
+
+        started = time.monotonic()
+        if self.ig_client_factory is not None:
+            ig_client = self.ig_client_factory()
+        else:
+            ig_client = IGClient(
+                api_key=os.getenv("IG_API_KEY"),
+                username=os.getenv("IG_USERNAME"),
+                password=os.getenv("IG_PASSWORD"),
+            )
+        if not ig_client.login():
+            raise IGAPIError("Failed to login to IG API")
+        ig_client.start_token_refresher()
+        self._timed("login", started)
+
+        price_stream = None
+        if os.getenv("IG_STREAMING", str(STREAM_SETTINGS["enabled"])).lower() == "true":
+            price_stream = PriceStreamClient(ig_client)
+            price_stream.start()
+
+        self._ig_client = ig_client
+        started = time.monotonic()
+        self._hedger = DeltaHedger(
+            ig_client, price_stream=price_stream, state_store=HedgeStateStore.from_env()
+        )
+        self._timed("state_recovery", started)
+        self._price_history = PriceHistoryStore(ig_client.get_historical_prices)
+
+    def _build_worker(self) -> None:
+        from app.engine.remote import RemoteComponent, RemoteHedger
+
+        started = time.monotonic()
+        hedger = RemoteHedger.from_env()
+        self._timed("engine_attach", started)
+
+        self._hedger = hedger
+        self._ig_client = RemoteComponent(hedger.client, "ig_client")
+        self._price_history = RemoteComponent(hedger.client, "price_history")
+
+    def _warm_pricing(self) -> None:
+        from app.core.option_calculator import load_pricing_backend
+
+        started = time.monotonic()
+        load_pricing_backend()
+        self._timed("pricing_backend", started)
+
+    def warm_up(self) -> None:
+        """Start initialization in the background if nothing has started it yet"""
+        if self.state != "cold":
+            return
+
+        def run():
+            try:
+                self.initialize()
+            except Exception:
+                pass  # recorded in state/error for /api/ready
+
+        threading.Thread(target=run, name="api-warm-up", daemon=True).start()
+
+    def status(self) -> Dict:
+        status = {
+            "ready": self.state == "ready",
+            "state": self.state,
+            "mode": self.mode,
+            "error": self.error,
+            "timings": dict(self.timings),
+        }
+        engine_status = getattr(self._hedger, "engine_status", None) if self.state == "ready" else None
+        if engine_status is not None:
+            # A worker serving snapshots the engine can no longer publish is not ready
+            status["engine"] = engine_status()
+            if not status["engine"]["publishing"]:
+                status["ready"] = False
+                status["error"] = status["engine"]["error"]
+        return status
@@ -0,0 +1,187 @@
+# app/api/query.py
+import base64
+import binascii
+import heapq
+import json
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+from config.settings import SNAPSHOT_SETTINGS
+
+# Item fields that require pricing the position; everything else comes from IG as-is
+DETAIL_FIELDS = frozenset({"delta", "needs_hedge", "suggested_hedge", "metrics", "greeks"})
+# Position.to_dict() keys
+POSITION_FIELDS = frozenset({
+    "deal_id", "epic", "underlying_epic", "strike", "option_type", "direction", "contract_size",
+    "size", "premium", "level", "bid", "offer", "instrument_name", "currency", "time_to_expiry",
+    "expiry", "created_at", "total_size", "current_value", "entry_value", "unrealized_pnl",
+    "hedge_size", "hedge_deal_id", "hedge_direction", "last_hedge_time", "last_hedge_price",
+    "hedge_slippage", "is_active", "pnl_threshold_crossed", "total_hedges", "last_update",
+})
+FIELDS = POSITION_FIELDS | DETAIL_FIELDS
+
+
+def _number(value) -> float:
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+
+SORT_KEYS: Dict[str, Callable[[Dict], object]] = {
+    "abs_delta": lambda e: abs(_number(e.get("delta", {}).get("position_delta"))),
+    "delta": lambda e: _number(e.get("delta", {}).get("delta")),
+    "pnl": lambda e: _number(e.get("metrics", {}).get("pnl")),
+    "size": lambda e: _number(e.get("position", {}).get("size")),
+    "strike": lambda e: _number(e.get("position", {}).get("strike")),
+    "time_to_expiry": lambda e: _number(e.get("position", {}).get("time_to_expiry")),
+    "deal_id": lambda e: e.get("position", {}).get("deal_id") or "",
+}
+PRICED_SORT_KEYS = frozenset({"abs_delta", "delta", "pnl"})
+
+
+def encode_cursor(version: Optional[int], sort: str, after: Tuple) -> str:
+    """Opaque cursor: the listing version, the sort, and the last (key, deal_id) served"""
+    raw = json.dumps([version, sort, list(after)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[int], str, Tuple]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        version, sort, after = json.loads(raw)
+        key, deal_id = after
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(sort, str) or not isinstance(deal_id, str):
+        raise ValueError("Invalid cursor")
+    return version, sort, (key, deal_id)
+
+
+class ListingQuery:
+    """
+    fields=, sort=, limit= and cursor= parameters for position listings.
+
+    Pages are keyset-based: rows are ordered by (sort key, deal id) and a
+    cursor carries the last pair served, so the next page starts right after
+    it even if positions were added or removed in between. The cursor also
+    records the snapshot version it was issued against (cursor_version).
+    """
+
+    def __init__(
+        self,
+        fields: Optional[Set[str]] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        after: Optional[Tuple] = None,
+        cursor_version: Optional[int] = None,
+    ):
+        self.fields = fields
+        self.sort = sort
+        self.descending = descending
+        self.limit = limit
+        self.after = after
+        self.cursor_version = cursor_version
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str]) -> "ListingQuery":
+        fields = None
+        if args.get("fields"):
+            fields = {f.strip() for f in args["fields"].split(",") if f.strip()}
+            unknown = fields - FIELDS
+            if unknown:
+                raise ValueError(
+                    f"Unknown fields {', '.join(sorted(unknown))}; "
+                    f"fields must be among {', '.join(sorted(FIELDS))}"
+                )
+
+        sort, descending = args.get("sort"), False
+        if sort:
+            descending = sort.startswith("-")
+            sort = sort.lstrip("-")
+            if sort not in SORT_KEYS:
+                raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+
+        limit = None
+        if args.get("limit"):
+            try:
+                limit = int(args["limit"])
+            except ValueError:
+                raise ValueError("limit must be an integer")
+            if not 0 < limit <= SNAPSHOT_SETTINGS["max_page_size"]:
+                raise ValueError(
+                    f"limit must be between 1 and {SNAPSHOT_SETTINGS['max_page_size']}"
+                )
+
+        after, cursor_version = None, None
+        if args.get("cursor"):
+            cursor_version, cursor_sort, after = decode_cursor(args["cursor"])
+            if cursor_sort != _sort_spec(sort, descending):
+                raise ValueError("cursor was issued for a different sort")
+            # Keys are compared with this sort's keys; a mismatched type would not compare
+            key = after[0]
+            if (sort or "deal_id") == "deal_id":
+                valid = isinstance(key, str)
+            else:
+                valid = isinstance(key, (int, float)) and not isinstance(key, bool)
+            if not valid:
+                raise ValueError("Invalid cursor")
+
+        return cls(fields, sort, descending, limit, after, cursor_version)
+
+    @property
+    def is_default(self) -> bool:
+        return (
+            self.fields is None and self.sort is None and self.limit is None and self.after is None
+        )
+
+    @property
+    def needs_pricing(self) -> bool:
+        """False when every requested field and the sort key come straight from IG"""
+        if self.sort in PRICED_SORT_KEYS:
+            return True
+        return self.fields is None or bool(self.fields & DETAIL_FIELDS)
+
+    @property
+    def prices_page_only(self) -> bool:
+        """True when pages are chosen without pricing, so only the served page needs it"""
+        return self.limit is not None and self.sort not in PRICED_SORT_KEYS
+
+    def wants(self, field: str) -> bool:
+        return self.fields is None or field in self.fields
+
+    def project(self, item: Dict) -> Dict:
+        if self.fields is None:
+            return item
+        return {k: v for k, v in item.items() if k in self.fields}
+
+    def page(
+        self, entries: Mapping[str, Dict], version: Optional[int] = None
+    ) -> Tuple[List[Tuple[str, Dict]], Optional[str]]:
+        """Sorted page of (deal_id, entry) pairs plus the cursor for the next page"""
+        if self.limit is None and self.after is None and self.sort is None:
+            return list(entries.items()), None
+
+        key = SORT_KEYS[self.sort or "deal_id"]
+
+        def order(pair: Tuple[str, Dict]) -> Tuple:
+            return key(pair[1]), pair[0]
+
+        items = [(order(pair), pair) for pair in entries.items()]
+        if self.after is not None:
+            after = tuple(self.after)
+            items = [
+                item for item in items
+                if (item[0] < after if self.descending else item[0] > after)
+            ]
+
+        if self.limit is not None and self.limit < len(items):
+            # Top-N without sorting the whole book
+            select = heapq.nlargest if self.descending else heapq.nsmallest
+            page = select(self.limit, items, key=lambda item: item[0])
+            next_cursor = encode_cursor(version, _sort_spec(self.sort, self.descending), page[-1][0])
+        else:
+            page = sorted(items, key=lambda item: item[0], reverse=self.descending)
+            next_cursor = None
+        return [pair for _, pair in page], next_cursor
+
+
+def _sort_spec(sort: Optional[str], descending: bool) -> str:
+    return ("-" if descending else "") + (sort or "deal_id")
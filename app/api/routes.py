@@ -1,43 +1,70 @@
 # app/api/routes.py
+import hmac
+import json
 import logging
 import os
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
-from typing import Dict, List, Optional, Tuple, Union
-
-from flask import Response, jsonify, render_template, request
-
-from app import app
+from typing import Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    render_template,
+    request,
+    send_file,
+    stream_with_context,
+)
+
+from app.api.context import ApiContext
+from app.api.query import ListingQuery
+from app.core.batch_pricing import BatchPricer, parse_contracts
 from app.core.delta_hedger import DeltaHedger
-from app.models.position import Position
-from app.services.ig_client import IGClient, IGAPIError
+from app.core.events import format_sse
+from app.core.jobs import FINISHED_STATES
+from app.core.metrics import REGISTRY
+from app.core.profiler import PROFILER
+from app.core.risk import RiskAggregator, parse_group_by, signed_position_delta
+from app.core.snapshot import PortfolioSnapshot
+from app.core.tracing import TRACER
+from app.services.ig_client import IGClient
+from config.settings import EVENT_SETTINGS as _event_settings
 from config.settings import HEDGE_SETTINGS as _hedge_settings
+from config.settings import JOB_SETTINGS as _job_settings
+from config.settings import PNL_SETTINGS as _pnl_settings
+from config.settings import RISK_SETTINGS as _risk_settings
+from config.settings import STATE_SETTINGS as _state_settings
 
 # Type alias for Flask responses
 ApiResponse = Union[Response, Tuple[Response, int]]
 logger = logging.getLogger(__name__)
 
-# Initialize clients with proper error handling
-try:
-    # Initialize
-    ig_client = IGClient(
-        api_key=os.getenv("IG_API_KEY"),
-        username=os.getenv("IG_USERNAME"),
-        password=os.getenv("IG_PASSWORD")
-    )
-    
-    # Explicitly login after initialization
-    if not ig_client.login():
-        logger.critical("Failed to login to IG API")
-        raise IGAPIError("Failed to login to IG API")
-        
-    hedger = DeltaHedger(ig_client)
-except IGAPIError as e:
-    logger.critical(f"IG API Error: {str(e)}")
-    raise
-except Exception as e:
-    logger.critical(f"Failed to initialize clients: {str(e)}")
-    raise
+api = Blueprint("api", __name__)
+
+
+def _context() -> ApiContext:
+    return current_app.extensions["api_context"]
+
+
+def _hedger() -> DeltaHedger:
+    return _context().hedger
+
+
+def _ig_client() -> IGClient:
+    return _context().ig_client
+
+
+@api.before_app_request
+def _profile_request_started() -> None:
+    PROFILER.request_started()
+
+
+@api.teardown_app_request
+def _profile_request_finished(exc: Optional[BaseException]) -> None:
+    PROFILER.request_finished()
 
 
 def validate_json_request() -> Optional[Dict]:
@@ -50,18 +77,188 @@ def validate_json_request() -> Optional[Dict]:
     return data
 
 
-@app.route("/")
+@api.route("/")
 def index() -> str:
     """Render main application page"""
     return render_template("index.html")
 
-@app.route("/config")
+@api.route("/config")
 def get_config():
     return jsonify({
         "apiBaseUrl": os.getenv("API_BASE_URL", "http://localhost:8000/api")
     })
 
-@app.route("/api/monitor/start", methods=["POST"])
+@api.route("/metrics", methods=["GET"])
+def metrics() -> Response:
+    """
+    Prometheus text exposition of IG call, pricing, cycle and order metrics.
+
+    In worker mode the hot paths run in the engine, so its registry is served.
+    """
+    context = _context()
+    if context.mode == "worker":
+        from app.engine.remote import RemoteComponent
+
+        text = RemoteComponent(context.hedger.client, "metrics").render()
+    else:
+        text = REGISTRY.render()
+    return Response(text, mimetype="text/plain; version=0.0.4")
+
+
+def _admin_denied() -> Optional[ApiResponse]:
+    """Admin routes need ADMIN_TOKEN set and echoed in X-Admin-Token"""
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        return jsonify({"error": "Admin endpoints are disabled"}), HTTPStatus.FORBIDDEN
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token):
+        return jsonify({"error": "Invalid admin token"}), HTTPStatus.UNAUTHORIZED
+    return None
+
+
+def _profiler(target: Optional[str]):
+    """This process's profiler, or the engine's for target=engine in worker mode"""
+    if target in (None, "", "local"):
+        return PROFILER
+    if target != "engine":
+        raise ValueError("target must be local or engine")
+    context = _context()
+    if context.mode != "worker":
+        return PROFILER
+    from app.engine.remote import RemoteComponent
+
+    return RemoteComponent(context.hedger.client, "profiler")
+
+
+@api.route("/api/admin/profiles", methods=["GET", "POST"])
+def profiles() -> ApiResponse:
+    """
+    List profiles, or start one.
+
+    POST {"seconds": N} samples every thread for N seconds, {"requests": K}
+    samples only the threads serving the next K requests, and
+    {"cycle": true} samples the next hedge cycle. Optional "interval" is the
+    sampling period and "target": "engine" profiles the engine process in
+    worker mode. Output is collapsed stacks for flamegraph.pl or speedscope.
+    """
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        if request.method == "GET":
+            return jsonify(_profiler(request.args.get("target")).list())
+
+        data = validate_json_request() or {}
+        profiler = _profiler(data.get("target"))
+        session = profiler.start(
+            seconds=data.get("seconds"),
+            requests=data.get("requests"),
+            cycle=bool(data.get("cycle", False)),
+            interval=data.get("interval"),
+        )
+        response = jsonify(session)
+        response.status_code = HTTPStatus.ACCEPTED
+        response.headers["Location"] = f"/api/admin/profiles/{session['profile_id']}"
+        return response
+
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error handling profiler request: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/api/admin/profiles/current", methods=["DELETE"])
+def stop_profile() -> ApiResponse:
+    """Stop the running profile early; what was sampled is still written"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        session = _profiler(request.args.get("target")).stop()
+        if session is None:
+            return jsonify({"error": "No profile in progress"}), HTTPStatus.NOT_FOUND
+        return jsonify(session)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+
+
+@api.route("/api/admin/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id: str) -> ApiResponse:
+    """Profile status; ?download=true returns the collapsed-stack file"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        session = _profiler(request.args.get("target")).get(profile_id)
+        if "error" in session:
+            return jsonify(session), HTTPStatus.NOT_FOUND
+        if request.args.get("download", "").lower() != "true":
+            return jsonify(session)
+        if session["path"] is None:
+            return jsonify({"error": f"Profile is {session['state']}"}), HTTPStatus.CONFLICT
+        return send_file(
+            os.path.abspath(session["path"]),
+            mimetype="text/plain",
+            as_attachment=True,
+            download_name=os.path.basename(session["path"]),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+
+
+def _tracer():
+    """The tracer holding hedge-cycle spans: the engine's in worker mode"""
+    context = _context()
+    if context.mode != "worker":
+        return TRACER
+    from app.engine.remote import RemoteComponent
+
+    return RemoteComponent(context.hedger.client, "tracer")
+
+
+@api.route("/api/traces", methods=["GET"])
+def list_traces() -> ApiResponse:
+    """Recent traces, newest first; ?name=hedge_cycle keeps one root span name"""
+    try:
+        limit = int(request.args.get("limit", 50))
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        return jsonify(_tracer().list(name=request.args.get("name"), limit=limit))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error listing traces: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/api/traces/<trace_id>", methods=["GET"])
+def get_trace(trace_id: str) -> ApiResponse:
+    """
+    Time per span name (self time excludes children) and the slowest spans
+    of one trace; ?spans=true adds every span.
+    """
+    try:
+        trace = _tracer().get(
+            trace_id, spans=request.args.get("spans", "").lower() == "true"
+        )
+        if "error" in trace:
+            return jsonify(trace), HTTPStatus.NOT_FOUND
+        return jsonify(trace)
+    except Exception as e:
+        logger.error(f"Error getting trace {trace_id}: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/api/ready", methods=["GET"])
+def readiness() -> ApiResponse:
+    """Report client warm-up state; 503 until the hedger can serve requests"""
+    context = _context()
+    context.warm_up()
+    status = context.status()
+    return jsonify(status), (HTTPStatus.OK if status["ready"] else HTTPStatus.SERVICE_UNAVAILABLE)
+
+
+@api.route("/api/monitor/start", methods=["POST"])
 def start_monitoring() -> ApiResponse:
     """Start automated position monitoring and delta hedging"""
     try:
@@ -84,8 +281,10 @@ def start_monitoring() -> ApiResponse:
         if delta_threshold <= 0:
             return jsonify({"error": "Invalid delta threshold"}), HTTPStatus.BAD_REQUEST
 
-        result = hedger.start_monitoring(
-            interval=monitor_interval, delta_threshold=delta_threshold
+        result = _hedger().start_monitoring(
+            interval=monitor_interval,
+            delta_threshold=delta_threshold,
+            auto_hedge=bool(data.get("auto_hedge", False)),
         )
 
         logger.info(f"Started position monitoring: {result}")
@@ -98,103 +297,238 @@ def start_monitoring() -> ApiResponse:
         return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
-@app.route("/api/positions", methods=["GET"])
-def fetch_positions() -> ApiResponse:
-    try:
-        positions_response = ig_client.get_positions()
-        if "error" in positions_response:
-            return (
-                jsonify({"error": positions_response["error"]}),
-                HTTPStatus.BAD_REQUEST,
-            )
+def _position_item(entry: Dict, query: Optional[ListingQuery] = None) -> Dict:
+    """Flatten a status entry into the /api/positions item shape"""
+    delta_info = entry.get("delta", {})
+    position_dict = dict(entry.get("position", {}))
+    position_dict.update(
+        {
+            "delta": delta_info.get("delta", 0),
+            "needs_hedge": delta_info.get("needs_hedge", False),
+            "suggested_hedge": delta_info.get("suggested_hedge_size", 0),
+            "metrics": entry.get("metrics", {}),
+            "greeks": delta_info.get("greeks", {}),
+        }
+    )
+    return query.project(position_dict) if query else position_dict
+
+
+def _hedge_status_item(entry: Dict, query: Optional[ListingQuery] = None) -> Dict:
+    """Status entry with the nested position limited to the requested fields"""
+    if query is None or query.fields is None:
+        return entry
+    item = {"position": query.project(entry.get("position", {}))}
+    for part in ("delta", "metrics", "needs_hedge"):
+        if query.wants(part) and part in entry:
+            item[part] = entry[part]
+    if query.wants("greeks") and "greeks" in entry.get("delta", {}):
+        item["greeks"] = entry["delta"]["greeks"]
+    return item
+
+
+def _positions_summary(entries: Mapping[str, Dict], context: Dict) -> Dict:
+    total_delta = 0.0
+    total_pnl = 0.0
+    total_exposure = 0.0
+    for entry in entries.values():
+        metrics = entry.get("metrics", {})
+        total_delta += signed_position_delta(entry)
+        total_pnl += metrics.get("pnl", 0) or 0
+        total_exposure += metrics.get("exposure", 0) or 0
+
+    return {
+        "total_positions": len(entries),
+        "total_delta": round(total_delta, 4),
+        "total_pnl": round(total_pnl, 2),
+        "total_exposure": round(total_exposure, 2),
+        "monitoring_status": context["monitoring"],
+    }
+
+
+def _positions_body(
+    entries: Mapping[str, Dict], context: Dict, query: Optional[ListingQuery] = None
+) -> Dict:
+    if not entries:
+        return {
+            "version": context["version"],
+            "positions": [],
+            "message": "No positions found",
+            "monitoring_status": context["monitoring"],
+        }
+    if query is None:
+        return {
+            "version": context["version"],
+            "positions": [_position_item(entry) for entry in entries.values()],
+            "portfolio_summary": _positions_summary(entries, context),
+        }
+
+    page, next_cursor = query.page(entries, context["version"])
+    return {
+        "version": context["version"],
+        "positions": [_position_item(entry, query) for _, entry in page],
+        "next_cursor": next_cursor,
+        "portfolio_summary": _positions_summary(entries, context),
+    }
+
+
+def _hedge_status_summary(entries: Mapping[str, Dict], context: Dict) -> Dict:
+    return {
+        "total_positions": len(entries),
+        "positions_needing_hedge": sum(
+            1 for p in entries.values() if p.get("needs_hedge", False)
+        ),
+        "total_exposure": sum(
+            p.get("metrics", {}).get("exposure", 0) for p in entries.values()
+        ),
+        "last_update": context["last_update"],
+    }
+
+
+def _hedge_status_body(
+    entries: Mapping[str, Dict], context: Dict, query: Optional[ListingQuery] = None
+) -> Dict:
+    body = {
+        "version": context["version"],
+        "monitoring": context["monitoring"],
+        "summary": _hedge_status_summary(entries, context),
+    }
+    if query is None:
+        body["positions_status"] = dict(entries)
+    else:
+        page, body["next_cursor"] = query.page(entries, context["version"])
+        body["positions_status"] = {
+            deal_id: _hedge_status_item(entry, query) for deal_id, entry in page
+        }
+    return body
+
+
+def _snapshot_context(snapshot: PortfolioSnapshot) -> Dict:
+    return {
+        "version": snapshot.version,
+        "monitoring": snapshot.monitoring,
+        "last_update": snapshot.created_at.isoformat(),
+    }
+
+
+def _json_response(body: Union[str, Dict], etag: Optional[str] = None) -> Response:
+    if not isinstance(body, str):
+        body = json.dumps(body, default=str)
+    response = Response(body, mimetype="application/json")
+    if etag:
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _snapshot_response(
+    key: str,
+    build_body: Callable[..., Dict],
+    item: Callable[[Dict, Optional[ListingQuery]], Dict],
+    summary: Callable[[Mapping[str, Dict], Dict], Dict],
+) -> ApiResponse:
+    """
+    Serve a position listing rendered from the latest portfolio snapshot.
+
+    Supports If-None-Match (304 when the client already has this version),
+    ?since=<version> for only the positions changed or removed after that
+    version, and fields=/sort=/limit=/cursor=. When no snapshot is fresh,
+    positions are listed straight from IG if the requested fields need no
+    pricing, and only the served page is priced if the page can be chosen
+    without pricing (limit= with an unpriced sort).
+    """
+    query = ListingQuery.from_args(request.args)
+    hedger = _hedger()
+
+    if (not query.needs_pricing or query.prices_page_only) and not hedger.snapshot_is_fresh():
+        entries = hedger.get_position_entries()
+        if "error" in entries:
+            return jsonify({"error": entries["error"]}), HTTPStatus.BAD_REQUEST
+        if query.needs_pricing:
+            page, _ = query.page(entries)
+            entries.update(hedger.price_entries([deal_id for deal_id, _ in page]))
+        context = {
+            "version": None,
+            "monitoring": _hedger().get_monitoring_status(),
+            "last_update": datetime.now().isoformat(),
+        }
+        return _json_response(build_body(entries, context, query))
+
+    snapshot = _hedger().get_snapshot()
+    if snapshot is None:
+        return (
+            jsonify({"error": "Portfolio snapshot unavailable"}),
+            HTTPStatus.SERVICE_UNAVAILABLE,
+        )
 
-        positions = positions_response.get("positions", [])
-        if not positions:
-            return (
-                jsonify(
-                    {
-                        "positions": [],
-                        "message": "No positions found",
-                        "monitoring_status": hedger.get_monitoring_status(),
-                    }
-                ),
-                HTTPStatus.OK,
-            )
+    if request.if_none_match.contains(snapshot.etag):
+        response = Response(status=HTTPStatus.NOT_MODIFIED)
+        response.set_etag(snapshot.etag)
+        return response
+
+    context = _snapshot_context(snapshot)
+    since = request.args.get("since", type=int)
+    if since is not None and _hedger().snapshots.horizon <= since <= snapshot.version:
+        changed, removed = snapshot.changes_since(since)
+        body = {
+            "version": snapshot.version,
+            "since": since,
+            "changed": {deal_id: item(entry, query) for deal_id, entry in changed.items()},
+            "removed": removed,
+            "summary": summary(snapshot.positions, context),
+        }
+    elif query.is_default:
+        body = snapshot.render(key, lambda s: build_body(s.positions, context))
+    else:
+        body = build_body(snapshot.positions, context, query)
+
+    return _json_response(body, snapshot.etag)
+
+
+@api.route("/api/monitor/stop", methods=["POST"])
+def stop_monitoring() -> ApiResponse:
+    """Stop automated position monitoring"""
+    try:
+        return jsonify(_hedger().stop_monitoring())
+    except Exception as e:
+        logger.error(f"Error stopping monitoring: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
-        positions_data = []
-        total_delta = 0.0
-        total_pnl = 0.0
-        total_exposure = 0.0
-
-        for position_data in positions:
-            try:
-                position = Position.from_dict(position_data)
-                delta_info = hedger.calculate_position_delta(position)
-                position_metrics = hedger.calculate_position_metrics(position)
-
-                position_dict = position.to_dict()
-                position_dict.update(
-                    {
-                        "delta": delta_info.get("delta", 0),
-                        "needs_hedge": delta_info.get("needs_hedge", False),
-                        "suggested_hedge": delta_info.get("suggested_hedge_size", 0),
-                        "metrics": position_metrics,
-                        "greeks": delta_info.get("greeks", {}),
-                    }
-                )
-
-                positions_data.append(position_dict)
-                total_delta += delta_info.get("delta", 0)
-                total_pnl += position_metrics.get("pnl", 0)
-                total_exposure += position_metrics.get("exposure", 0)
-            except Exception as e:
-                logger.error(f"Error processing position: {str(e)}")
-                continue
 
-        return jsonify(
-            {
-                "positions": positions_data,
-                "portfolio_summary": {
-                    "total_positions": len(positions),
-                    "total_delta": round(total_delta, 4),
-                    "total_pnl": round(total_pnl, 2),
-                    "total_exposure": round(total_exposure, 2),
-                    "monitoring_status": hedger.get_monitoring_status(),
-                },
-            }
+@api.route("/api/positions", methods=["GET"])
+def fetch_positions() -> ApiResponse:
+    try:
+        return _snapshot_response(
+            "positions", _positions_body, _position_item, _positions_summary
         )
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         logger.error(f"Error getting positions: {str(e)}")
         return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
-@app.route("/api/positions/<position_id>", methods=["GET"])
+@api.route("/api/positions/<position_id>", methods=["GET"])
 def get_position(position_id: str) -> ApiResponse:
     try:
-        position = hedger.get_position(position_id)
+        position = _hedger().get_position(position_id)
         if not position:
             return jsonify({"error": "Position not found"}), HTTPStatus.NOT_FOUND
 
         if not position.epic or not isinstance(position.epic, str):
             return jsonify({"error": "Invalid epic value"}), HTTPStatus.BAD_REQUEST
 
-        market_data = ig_client.get_market_data(position.epic)
+        market_data = _hedger().get_market_data(position.epic)
         if not market_data:
             return (
                 jsonify({"error": "Failed to fetch market data"}),
                 HTTPStatus.SERVICE_UNAVAILABLE,
             )
 
-        delta_info = hedger.calculate_position_delta(position)
-        metrics = hedger.calculate_position_metrics(position)
-        greeks = hedger.calculator.calculate_greeks(
-            S=market_data["price"],
-            K=position.strike,
-            T=position.time_to_expiry,
-            sigma=market_data.get("volatility", 0.2),
-            option_type=position.option_type,
-        )
+        delta_info = _hedger().calculate_position_delta(position)
+        metrics = _hedger().calculate_position_metrics(position, delta_info)
+        # The hedger's Greeks, priced at the underlying's spot and vol
+        greeks = delta_info.get("greeks", {})
 
         return jsonify(
             {
@@ -202,7 +536,7 @@ def get_position(position_id: str) -> ApiResponse:
                 "market_data": market_data,
                 "analysis": {"delta": delta_info, "metrics": metrics, "greeks": greeks},
                 "hedge_history": [h.to_dict() for h in position.hedge_history],
-                "status": hedger.get_position_status(position_id),
+                "status": _hedger().get_position_status(position_id),
             }
         )
 
@@ -211,31 +545,28 @@ def get_position(position_id: str) -> ApiResponse:
         return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
-@app.route("/api/hedge/<position_id>", methods=["POST"])
+@api.route("/api/hedge/<position_id>", methods=["POST"])
 def hedge_position(position_id: str) -> ApiResponse:
     try:
+        # {} is a valid body: every field is optional
         data = validate_json_request()
-        if not data:
-            return jsonify({"error": "Invalid request data"}), HTTPStatus.BAD_REQUEST
-
-        force_hedge = bool(data.get("force", False))
         hedge_size = float(data["hedge_size"]) if "hedge_size" in data else None
 
-        result = hedger.hedge_position(
-            position_id=position_id, hedge_size=hedge_size, force_hedge=force_hedge
-        )
+        result = _hedger().hedge_position(position_id=position_id, hedge_size=hedge_size)
 
         if "error" in result:
             return jsonify(result), HTTPStatus.BAD_REQUEST
+        if result.get("status") == "skipped":
+            return jsonify(result), HTTPStatus.CONFLICT
 
-        position = hedger.get_position(position_id)
+        position = _hedger().get_position(position_id)
         if position:
-            market_data = ig_client.get_market_data(position.epic)
+            market_data = _hedger().get_market_data(position.epic)
             result.update(
                 {
                     "position": position.to_dict(),
                     "market_data": market_data,
-                    "metrics": hedger.calculate_position_metrics(position),
+                    "metrics": _hedger().calculate_position_metrics(position),
                 }
             )
 
@@ -248,39 +579,272 @@ def hedge_position(position_id: str) -> ApiResponse:
         return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
-@app.route("/api/hedge/status", methods=["GET"])
+@api.route("/api/hedge/status", methods=["GET"])
 def get_hedge_status() -> ApiResponse:
     """Get hedging status for all positions"""
     try:
-        positions_status = hedger.get_all_positions_status()
-        monitoring_status = hedger.get_monitoring_status()
-
-        positions_needing_hedge = sum(
-            1 for p in positions_status.values() if p.get("needs_hedge", False)
-        )
-        total_exposure = sum(
-            p.get("metrics", {}).get("exposure", 0) for p in positions_status.values()
-        )
-
-        return jsonify(
-            {
-                "positions_status": positions_status,
-                "monitoring": monitoring_status,
-                "summary": {
-                    "total_positions": len(positions_status),
-                    "positions_needing_hedge": positions_needing_hedge,
-                    "total_exposure": total_exposure,
-                    "last_update": datetime.now().isoformat(),
-                },
-            }
+        return _snapshot_response(
+            "hedge_status", _hedge_status_body, _hedge_status_item, _hedge_status_summary
         )
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         logger.error(f"Error getting hedge status: {str(e)}")
         return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
-@app.route("/api/settings", methods=["GET", "POST", "PUT"])
+def _state_store():
+    """The hedge state store: the engine's in worker mode, None when disabled"""
+    context = _context()
+    if context.mode != "worker":
+        return context.hedger.state_store
+    from app.engine.remote import RemoteComponent
+
+    return RemoteComponent(context.hedger.client, "state_store")
+
+
+@api.route("/api/hedge/history", methods=["GET"])
+def get_hedge_history() -> ApiResponse:
+    """
+    Persisted hedges, newest first. ?deal_id= keeps one position and
+    ?since=/?until= (ISO timestamps) bound the time range.
+    """
+    try:
+        limit = int(request.args.get("limit", 100))
+        if not 0 < limit <= _state_settings["max_history"]:
+            raise ValueError(f"limit must be between 1 and {_state_settings['max_history']}")
+        bounds = {}
+        for key in ("since", "until"):
+            if request.args.get(key):
+                bounds[key] = datetime.fromisoformat(request.args[key]).isoformat()
+
+        store = _state_store()
+        if store is None:
+            return jsonify({"error": "Hedge state store is disabled"}), HTTPStatus.SERVICE_UNAVAILABLE
+        result = store.history(deal_id=request.args.get("deal_id"), limit=limit, **bounds)
+        if "error" in result:
+            return jsonify(result), HTTPStatus.INTERNAL_SERVER_ERROR
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error getting hedge history: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/api/stream", methods=["GET"])
+def stream_events() -> ApiResponse:
+    """
+    Server-Sent Events feed of position, greek and hedge updates.
+
+    Opens with the full hedge status (or the changes since Last-Event-ID on
+    reconnect), then relays the hedger's events. Every viewer shares the same
+    monitoring cycle, so extra tabs add no IG calls.
+    """
+    try:
+        hedger = _hedger()
+    except Exception as e:
+        logger.error(f"Error opening event stream: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.SERVICE_UNAVAILABLE
+
+    subscription = hedger.events.subscribe()
+    try:
+        hedger.attach_viewer()
+        snapshot = hedger.get_snapshot()
+    except Exception as e:
+        hedger.events.unsubscribe(subscription)
+        hedger.detach_viewer()
+        logger.error(f"Error opening event stream: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    last_event_id = request.headers.get("Last-Event-ID", type=int)
+    closed = threading.Lock()
+
+    def close() -> None:
+        # Runs from the generator's finally and from the response close hook;
+        # the hook also covers a generator the server never started or resumed
+        if closed.acquire(blocking=False):
+            hedger.events.unsubscribe(subscription)
+            hedger.detach_viewer()
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            if snapshot is not None:
+                if (
+                    last_event_id is not None
+                    and hedger.snapshots.horizon <= last_event_id <= snapshot.version
+                ):
+                    yield format_sse(
+                        "positions", snapshot.change_set(last_event_id), snapshot.version
+                    )
+                else:
+                    body = snapshot.render(
+                        "hedge_status",
+                        lambda s: _hedge_status_body(s.positions, _snapshot_context(s)),
+                    )
+                    yield f"event: snapshot\nid: {snapshot.version}\ndata: {body}\n\n"
+
+            while True:
+                frame = subscription.get(timeout=_event_settings["keepalive"])
+                yield frame if frame is not None else ": keepalive\n\n"
+        finally:
+            close()
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.call_on_close(close)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api.route("/api/risk/greeks", methods=["GET"])
+def get_risk_greeks() -> ApiResponse:
+    """
+    Size-weighted book Greeks bucketed by underlying, expiry and strike band.
+
+    ?group_by= picks a subset of those dimensions and ?band= sets the strike
+    band width. Served from the portfolio snapshot with its ETag.
+    """
+    try:
+        group_by = parse_group_by(request.args.get("group_by"))
+        band = request.args.get("band", default=_risk_settings["strike_band_width"], type=float)
+        hedger = _hedger()
+        aggregator = RiskAggregator(hedger.calculator, strike_band_width=band)
+
+        snapshot = hedger.get_snapshot()
+        if snapshot is None:
+            return (
+                jsonify({"error": "Portfolio snapshot unavailable"}),
+                HTTPStatus.SERVICE_UNAVAILABLE,
+            )
+        if request.if_none_match.contains(snapshot.etag):
+            response = Response(status=HTTPStatus.NOT_MODIFIED)
+            response.set_etag(snapshot.etag)
+            return response
+
+        def build(s: PortfolioSnapshot) -> Dict:
+            body = aggregator.aggregate(s.positions, group_by)
+            body.update(_snapshot_context(s))
+            return body
+
+        key = f"risk:{','.join(group_by)}:{band}"
+        return _json_response(snapshot.render(key, build), snapshot.etag)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error aggregating greeks: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def _pnl():
+    """The P&L attributor fed by hedge cycles: the engine's in worker mode"""
+    context = _context()
+    if context.mode != "worker":
+        return context.hedger.pnl
+    from app.engine.remote import RemoteComponent
+
+    return RemoteComponent(context.hedger.client, "pnl")
+
+
+@api.route("/api/pnl/attribution", methods=["GET"])
+def get_pnl_attribution() -> ApiResponse:
+    """
+    Today's P&L split into delta, gamma, vega, theta, hedge and slippage,
+    per position (largest first) and for the book per day. Accumulated tick
+    by tick from the hedge cycles; nothing is repriced. ?deal_id= keeps one
+    position, ?limit= caps the positions and ?days= the daily history.
+    """
+    try:
+        limit = int(request.args.get("limit", 50))
+        if not 0 < limit <= _pnl_settings["max_positions"]:
+            raise ValueError(f"limit must be between 1 and {_pnl_settings['max_positions']}")
+        days = request.args.get("days", type=int)
+        if days is not None and days <= 0:
+            raise ValueError("days must be positive")
+
+        report = _pnl().report(deal_id=request.args.get("deal_id"), limit=limit, days=days)
+        if "error" in report:
+            return jsonify(report), HTTPStatus.NOT_FOUND
+        return jsonify(report)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error getting P&L attribution: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/api/price/batch", methods=["POST"])
+def price_batch() -> ApiResponse:
+    """
+    What-if pricing for hypothetical contracts sent as a JSON array or CSV.
+
+    Streams newline-delimited JSON: the current book Greeks, then chunks of
+    priced rows with each contract's marginal impact, then the book after
+    the whole batch.
+    """
+    try:
+        contracts = parse_contracts(request.get_data(), request.content_type or "")
+        hedger = _hedger()
+
+        snapshot = hedger.get_snapshot()
+        book, markets = {"version": None, "totals": {}}, {}
+        if snapshot is not None:
+            aggregator = RiskAggregator(hedger.calculator)
+            risk = aggregator.aggregate(snapshot.positions, ())
+            book = {"version": snapshot.version, "totals": risk["totals"]}
+            markets = aggregator.book_markets(snapshot.positions)
+
+        def market(underlying: str) -> Tuple[float, float]:
+            market_data = hedger.get_market_data(underlying)
+            if not market_data or not market_data.get("price"):
+                return float("nan"), float("nan")
+            return float(market_data["price"]), max(
+                hedger.get_volatility(underlying, market_data), 0.1
+            )
+
+        pricer = BatchPricer(hedger.calculator, market, book["totals"], markets=markets)
+        pricer.load_markets(contracts)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error preparing batch pricing: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    def generate():
+        yield json.dumps({"type": "book", "contracts": len(contracts), **book}) + "\n"
+        batch = {greek: 0.0 for greek in pricer.book}
+        priced = failed = 0
+        for rows in pricer.price(contracts):
+            for row in rows:
+                if "error" in row:
+                    failed += 1
+                    continue
+                priced += 1
+                for greek, value in row["impact"].items():
+                    batch[greek] += value
+            yield json.dumps({"type": "rows", "rows": rows}) + "\n"
+        yield json.dumps(
+            {
+                "type": "summary",
+                "priced": priced,
+                "failed": failed,
+                "batch_impact": {k: round(v, 6) for k, v in batch.items()},
+                "book_after": {k: round(pricer.book[k] + v, 6) for k, v in batch.items()},
+            }
+        ) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api.route("/api/settings", methods=["GET", "POST", "PUT"])
 def handle_settings() -> ApiResponse:
     """Handle hedging settings"""
     try:
@@ -289,20 +853,20 @@ def handle_settings() -> ApiResponse:
             if not data:
                 return jsonify({"error": "Invalid request data"}), HTTPStatus.BAD_REQUEST
                 
-            validation_result = hedger.validate_settings(data)
+            validation_result = _hedger().validate_settings(data)
 
             if "error" in validation_result:
                 return jsonify(validation_result), HTTPStatus.BAD_REQUEST
 
-            updated_settings = hedger.get_current_settings()
+            updated_settings = _hedger().get_current_settings()
             return jsonify({
                 "message": "Settings updated successfully",
                 "settings": updated_settings,
             })
 
         # GET request
-        current_settings = hedger.get_current_settings()
-        monitoring_status = hedger.get_monitoring_status()
+        current_settings = _hedger().get_current_settings()
+        monitoring_status = _hedger().get_monitoring_status()
 
         return jsonify({
             "settings": current_settings, 
@@ -315,30 +879,92 @@ def handle_settings() -> ApiResponse:
         logger.error(f"Error handling settings: {str(e)}")
         return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
-@app.route("/api/analytics/<position_id>", methods=["GET"])
+@api.route("/api/prices/status", methods=["GET"])
+def get_price_stream_status() -> ApiResponse:
+    """Get streaming connection state and quote ages from the price board"""
+    return jsonify(_hedger().price_stream_status())
+
+
+def _parse_utc(value: str) -> datetime:
+    """ISO timestamp as naive UTC; naive input is taken as UTC, offsets are converted"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@api.route("/api/prices/history/<epic>", methods=["GET"])
+def get_price_history(epic: str) -> ApiResponse:
+    """Get historical bars from the local price store, fetching only missing ranges"""
+    try:
+        resolution = request.args.get("resolution", "HOUR").upper()
+        end = (
+            _parse_utc(request.args["to"])
+            if "to" in request.args
+            else datetime.utcnow()
+        )
+        start = (
+            _parse_utc(request.args["from"])
+            if "from" in request.args
+            else end - timedelta(days=7)
+        )
+        if start >= end:
+            return jsonify({"error": "from must be before to"}), HTTPStatus.BAD_REQUEST
+
+        bars = _context().price_history.get_bars(epic, resolution, start, end)
+        return jsonify(
+            {
+                "epic": epic,
+                "resolution": resolution,
+                "count": int(len(bars["time"])),
+                "bars": {name: column.tolist() for name, column in bars.items()},
+            }
+        )
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error getting price history for {epic}: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/api/volatility/<epic>", methods=["GET"])
+def get_volatility_estimates(epic: str) -> ApiResponse:
+    """Get realized volatility estimates for an epic"""
+    return jsonify(
+        {
+            "epic": epic,
+            "source": _hedger().volatility_source,
+            "estimates": _hedger().vol_tracker.snapshot(epic),
+        }
+    )
+
+
+@api.route("/api/cache/stats", methods=["GET"])
+def get_cache_stats() -> ApiResponse:
+    """Get market data cache hit rate and age metrics"""
+    return jsonify(_ig_client().get_cache_stats())
+
+
+@api.route("/api/analytics/<position_id>", methods=["GET"])
 def get_position_analytics(position_id: str) -> ApiResponse:
     """Get detailed analytics for a position"""
     try:
-        position = hedger.get_position(position_id)
+        position = _hedger().get_position(position_id)
         if not position:
             return jsonify({"error": "Position not found"}), HTTPStatus.NOT_FOUND
 
-        market_data = ig_client.get_market_data(position.epic)  # type: ignore
+        market_data = _hedger().get_market_data(position.epic)  # type: ignore
         if not market_data:
             return (
                 jsonify({"error": "Failed to fetch market data"}),
                 HTTPStatus.SERVICE_UNAVAILABLE,
             )
 
-        delta_info = hedger.calculate_position_delta(position)
-        metrics = hedger.calculate_position_metrics(position)
-        greeks = hedger.calculator.calculate_greeks(
-            S=market_data["price"],
-            K=position.strike,
-            T=position.time_to_expiry,
-            sigma=market_data.get("volatility", 0.2),
-            option_type=position.option_type,
-        )
+        delta_info = _hedger().calculate_position_delta(position)
+        metrics = _hedger().calculate_position_metrics(position, delta_info)
+        # The hedger's Greeks, priced at the underlying's spot and vol
+        greeks = delta_info.get("greeks", {})
 
         return jsonify(
             {
@@ -356,63 +982,115 @@ def get_position_analytics(position_id: str) -> ApiResponse:
         return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
-@app.route("/api/hedge/all", methods=["POST"])
+@api.route("/api/hedge/all", methods=["POST"])
 def hedge_all_positions() -> ApiResponse:
-    """Hedge all positions with manual override support"""
+    """Queue a bulk hedge job; progress is served from /api/jobs/<job_id>"""
     try:
         data = validate_json_request() or {}
-        is_manual = data.get("manual", True)
-
-        positions_status = hedger.get_all_positions_status()
-        if "error" in positions_status:
-            return jsonify(positions_status), HTTPStatus.BAD_REQUEST
-
-        results = []
-        for pos_id, status in positions_status.items():
-            try:
-                if is_manual or status.get("needs_hedge", False):
-                    result = hedger.hedge_position(pos_id, force_hedge=True)
-                    results.append(
-                        {
-                            "position_id": pos_id,
-                            "result": result,
-                            "manually_hedged": is_manual,
-                        }
-                    )
-            except Exception as e:
-                logger.error(f"Error hedging position {pos_id}: {str(e)}")
-                results.append({"position_id": pos_id, "error": str(e)})
+        is_manual = bool(data.get("manual", True))
 
-        if not results:
-            return (
-                jsonify(
-                    {
-                        "message": "No positions require hedging",
-                        "positions_checked": len(positions_status),
-                        "mode": "manual" if is_manual else "automatic",
-                    }
-                ),
-                HTTPStatus.OK,
-            )
+        job = _hedger().submit_hedge_all(manual=is_manual)
+        response = jsonify(job)
+        response.status_code = HTTPStatus.ACCEPTED
+        response.headers["Location"] = f"/api/jobs/{job['job_id']}"
+        return response
 
-        return jsonify(
-            {
-                "message": f"Hedged {len(results)} positions",
-                "mode": "manual" if is_manual else "automatic",
-                "results": results,
-            }
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error queueing bulk hedge: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/api/jobs", methods=["GET"])
+def list_jobs() -> ApiResponse:
+    """Recent jobs without their per-item results"""
+    try:
+        return jsonify(_hedger().list_jobs())
+    except Exception as e:
+        logger.error(f"Error listing jobs: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def _job_stream(hedger: DeltaHedger, job_id: str, since: int) -> ApiResponse:
+    """SSE feed of a job: one progress event per batch of results, then done"""
+
+    def generate():
+        cursor = since
+        yield "retry: 3000\n\n"
+        while True:
+            job = hedger.wait_job(job_id, cursor, _job_settings["stream_timeout"])
+            if "error" in job:
+                yield format_sse("error", job)
+                return
+            if job["results"] or cursor == since:
+                cursor += len(job["results"])
+                yield format_sse("progress", job, cursor)
+            else:
+                yield ": keepalive\n\n"
+            if job["state"] in FINISHED_STATES:
+                yield format_sse("done", {k: v for k, v in job.items() if k != "results"}, cursor)
+                return
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id: str) -> ApiResponse:
+    """
+    Job state and per-position results.
+
+    ?since=N returns only results after the Nth. With ?stream=true or
+    Accept: text/event-stream, progress is pushed as results arrive.
+    """
+    try:
+        since = request.args.get("since", default=0, type=int)
+        if since < 0:
+            return jsonify({"error": "since must be non-negative"}), HTTPStatus.BAD_REQUEST
+        hedger = _hedger()
+
+        last_event_id = request.headers.get("Last-Event-ID", type=int)
+        if last_event_id is not None:
+            since = last_event_id
+        wants_stream = request.args.get("stream", "").lower() == "true" or (
+            request.accept_mimetypes.best == "text/event-stream"
         )
 
+        job = hedger.get_job(job_id, since)
+        if "error" in job:
+            return jsonify(job), HTTPStatus.NOT_FOUND
+        if wants_stream:
+            return _job_stream(hedger, job_id, since)
+        return jsonify(job)
+
+    except Exception as e:
+        logger.error(f"Error getting job {job_id}: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/api/jobs/<job_id>", methods=["DELETE"])
+@api.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id: str) -> ApiResponse:
+    """Cancel a job; positions not yet sent to IG are skipped"""
+    try:
+        job = _hedger().cancel_job(job_id)
+        if "error" in job:
+            return jsonify(job), HTTPStatus.NOT_FOUND
+        return jsonify(job)
+
     except Exception as e:
-        logger.error(f"Error hedging all positions: {str(e)}")
+        logger.error(f"Error cancelling job {job_id}: {str(e)}")
         return jsonify({"error": str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 '''
-@app.route("/api/positions/sold", methods=["GET"])
+@api.route("/api/positions/sold", methods=["GET"])
 def get_sold_positions() -> ApiResponse:
     """Get all sold positions"""
     try:
-        result = hedger.get_sold_positions()
+        result = _hedger().get_sold_positions()
         if "error" in result:
             return jsonify(result), HTTPStatus.BAD_REQUEST
 
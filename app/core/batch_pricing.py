@@ -0,0 +1,188 @@
+# app/core/batch_pricing.py
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.option_calculator import OptionCalculator
+from app.core.risk import GREEKS, book_sign
+from config.settings import PRICING_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UNDERLYING = "IX.D.SPTRD.IFS.IP"
+
+# (price, volatility) for an underlying epic
+MarketLookup = Callable[[str], Tuple[float, float]]
+
+
+def parse_contracts(payload: bytes, content_type: str) -> List[Dict]:
+    """Read hypothetical contracts from a JSON array/{"contracts": [...]} or CSV body"""
+    if "csv" in content_type:
+        text = payload.decode("utf-8-sig")
+        rows = [dict(row) for row in csv.DictReader(io.StringIO(text))]
+    else:
+        try:
+            data = json.loads(payload or b"null")
+        except ValueError:
+            raise ValueError("Request body must be a JSON array of contracts or CSV")
+        rows = data.get("contracts") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of contracts")
+
+    if not rows:
+        raise ValueError("No contracts supplied")
+    if len(rows) > PRICING_SETTINGS["max_contracts"]:
+        raise ValueError(f"At most {PRICING_SETTINGS['max_contracts']} contracts per request")
+    return [_normalize(i, row) for i, row in enumerate(rows)]
+
+
+def _number(row: Dict, key: str, default: Optional[float] = None) -> Optional[float]:
+    value = row.get(key)
+    if value is None or value == "":
+        return default
+    return float(value)
+
+
+def _years_to(expiry: str) -> float:
+    """Same convention as Position: IG expiry dates like 27-NOV-26"""
+    expiry_date = datetime.strptime(expiry, "%d-%b-%y")
+    return max((expiry_date - datetime.now()).days / 365.0, 0.001)
+
+
+def _normalize(index: int, row: Dict) -> Dict:
+    if not isinstance(row, dict):
+        raise ValueError(f"Contract {index}: expected an object")
+    try:
+        option_type = str(row.get("option_type") or "CALL").upper()
+        if option_type not in ("CALL", "PUT"):
+            raise ValueError(f"option_type must be CALL or PUT, got {option_type}")
+        direction = str(row.get("direction") or "BUY").upper()
+        if direction not in ("BUY", "SELL"):
+            raise ValueError(f"direction must be BUY or SELL, got {direction}")
+
+        strike = _number(row, "strike")
+        if not strike or strike <= 0:
+            raise ValueError("strike must be positive")
+
+        time_to_expiry = _number(row, "time_to_expiry")
+        if time_to_expiry is None:
+            if not row.get("expiry"):
+                raise ValueError("expiry or time_to_expiry is required")
+            time_to_expiry = _years_to(str(row["expiry"]))
+        if time_to_expiry <= 0:
+            raise ValueError("time_to_expiry must be positive")
+
+        size = _number(row, "size", 1.0)
+        contract_size = _number(row, "contract_size", 1.0)
+        return {
+            "id": row.get("id", index),
+            "underlying": row.get("underlying") or DEFAULT_UNDERLYING,
+            "option_type": option_type,
+            "direction": direction,
+            "strike": strike,
+            "expiry": row.get("expiry"),
+            "time_to_expiry": time_to_expiry,
+            "size": size,
+            "contract_size": contract_size,
+            "spot": _number(row, "spot"),
+            "volatility": _number(row, "volatility"),
+        }
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Contract {index}: {str(e)}")
+
+
+class BatchPricer:
+    """
+    Prices hypothetical contracts against current market state.
+
+    Spot and volatility are looked up once per underlying (a contract may
+    override either). Underlyings the book holds are priced at the book's own
+    spot and vol (markets), so a trade and the book it is added to share one
+    spot convention. Each chunk then goes through one vectorized
+    Black-Scholes call. Every row carries its per-unit Greeks, its signed
+    size-weighted impact on the book, and the book Greeks if that trade
+    alone were added.
+    """
+
+    def __init__(
+        self,
+        calculator: OptionCalculator,
+        market: MarketLookup,
+        book: Dict[str, float],
+        chunk_size: int = PRICING_SETTINGS["chunk_size"],
+        markets: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self.calculator = calculator
+        self.market = market
+        self.book = {greek: float(book.get(greek, 0.0)) for greek in GREEKS}
+        self.chunk_size = chunk_size
+        self._markets: Dict[str, Tuple[float, float]] = dict(markets or {})
+
+    def load_markets(self, contracts: List[Dict]) -> None:
+        """Fetch spot/vol for every underlying that some contract does not override"""
+        for contract in contracts:
+            underlying = contract["underlying"]
+            needs_market = contract["spot"] is None or contract["volatility"] is None
+            if needs_market and underlying not in self._markets:
+                self._markets[underlying] = self.market(underlying)
+
+    def price(self, contracts: List[Dict]) -> Iterator[List[Dict]]:
+        """Yield priced rows one chunk at a time"""
+        for start in range(0, len(contracts), self.chunk_size):
+            yield self._price_chunk(contracts[start : start + self.chunk_size])
+
+    def _price_chunk(self, chunk: List[Dict]) -> List[Dict]:
+        spots, vols = [], []
+        for contract in chunk:
+            market_price, market_vol = self._markets.get(contract["underlying"], (None, None))
+            spots.append(contract["spot"] if contract["spot"] is not None else market_price)
+            vols.append(
+                contract["volatility"] if contract["volatility"] is not None else market_vol
+            )
+
+        n = len(chunk)
+        greeks = self.calculator.calculate_greeks_vectorized(
+            S=np.array(spots, dtype=float),
+            K=np.fromiter((c["strike"] for c in chunk), float, n),
+            T=np.fromiter((c["time_to_expiry"] for c in chunk), float, n),
+            sigma=np.array(vols, dtype=float),
+            is_call=np.fromiter((c["option_type"] == "CALL" for c in chunk), bool, n),
+        )
+        quantity = np.fromiter(
+            (book_sign(c["direction"]) * c["size"] * c["contract_size"] for c in chunk), float, n
+        )
+
+        rows = []
+        for i, contract in enumerate(chunk):
+            unit = {greek: float(greeks[greek][i]) for greek in GREEKS}
+            if any(np.isnan(v) for v in unit.values()):
+                rows.append({"id": contract["id"], "error": "No market price for underlying"})
+                continue
+            impact = {greek: unit[greek] * quantity[i] for greek in GREEKS}
+            rows.append(
+                {
+                    "id": contract["id"],
+                    "underlying": contract["underlying"],
+                    "option_type": contract["option_type"],
+                    "direction": contract["direction"],
+                    "strike": contract["strike"],
+                    "time_to_expiry": round(contract["time_to_expiry"], 6),
+                    "spot": spots[i],
+                    "volatility": vols[i],
+                    "greeks": _rounded(unit),
+                    "impact": _rounded(impact),
+                    "book_after": _rounded(
+                        {greek: self.book[greek] + impact[greek] for greek in GREEKS}
+                    ),
+                }
+            )
+        return rows
+
+
+def _rounded(values: Dict[str, float]) -> Dict[str, float]:
+    return {k: round(v, 6) for k, v in values.items()}
@@ -1,23 +1,102 @@
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Set
 
+from app.core.events import EventBroadcaster
+from app.core.hedge_state import HedgeStateStore
+from app.core.jobs import JobManager
+from app.core.metrics import HEDGE_CYCLE_OVERRUNS, HEDGE_CYCLE_SECONDS, HEDGE_CYCLES
 from app.core.option_calculator import OptionCalculator
+from app.core.pnl import PnLAttributor
+from app.core.profiler import PROFILER
+from app.core.snapshot import PortfolioSnapshot, SnapshotStore
+from app.core.tracing import TRACER
+from app.core.volatility import VOLATILITY_SOURCES, RealizedVolatilityTracker
 from app.models.enums import OptionType, OrderDirection
 from app.models.position import Position
 from app.services.ig_client import IGClient
-from config.settings import HEDGE_SETTINGS
+from app.services.price_stream import PriceStreamClient
+from app.services.single_flight import SingleFlight
+from config.settings import CACHE_SETTINGS, HEDGE_SETTINGS, SNAPSHOT_SETTINGS
 
 logger = logging.getLogger(__name__)
 
 
+def _deal_attributes(hedger, position_id, *args, **kwargs) -> Dict:
+    return {"deal_id": position_id}
+
+
+def _position_attributes(hedger, position, *args, **kwargs) -> Dict:
+    return {"deal_id": position.deal_id, "epic": position.epic}
+
+
+def _price_of(market_data: Optional[Dict]) -> Optional[float]:
+    price = float((market_data or {}).get("price") or 0)
+    return price if price > 0 else None
+
+
+def _hedge_slippage(size: float, hedge_result: Dict) -> float:
+    """Half the spread quoted at submission: a market hedge fills at the touch, not mid"""
+    quote = hedge_result.get("quote") or {}
+    bid, offer = quote.get("bid"), quote.get("offer")
+    if not bid or not offer:
+        return 0.0
+    return -abs(size) * (float(offer) - float(bid)) / 2
+
+
+def _hedge_price(hedge_result: Dict, underlying_price: Optional[float]) -> Optional[float]:
+    """Underlying mid quoted at submission; the half spread is booked as slippage"""
+    quote = hedge_result.get("quote") or {}
+    bid, offer = quote.get("bid"), quote.get("offer")
+    if bid and offer:
+        return (float(bid) + float(offer)) / 2
+    return underlying_price
+
+
 class DeltaHedger:
-    def __init__(self, ig_client: IGClient):
+    def __init__(
+        self,
+        ig_client: IGClient,
+        price_stream: Optional[PriceStreamClient] = None,
+        owns: Optional[Callable[[Dict], bool]] = None,
+        state_store: Optional[HedgeStateStore] = None,
+    ):
         self.ig_client = ig_client
+        self.price_stream = price_stream
+        # Partition filter on raw IG position payloads; None hedges the whole book
+        self.owns = owns
+        # Durable hedge state; positions built from IG data get theirs back from it
+        self.state_store = state_store
+        if state_store is not None:
+            state_store.load()
         self.calculator = OptionCalculator()
+        self.vol_tracker = RealizedVolatilityTracker()
         self.positions: Dict[str, Position] = {}
+        # Deal ids this hedger owns in the last IG /positions listing, priced or not
+        self._listed_deal_ids: Set[str] = set()
         self.monitoring_active = False
         self.last_check_time: Optional[datetime] = None
+        self.auto_hedge = False
+        self.snapshots = SnapshotStore()
+        # Every published snapshot is a tick for P&L attribution
+        self.pnl = PnLAttributor()
+        self.snapshots.add_listener(self.pnl.on_snapshot)
+        self.events = EventBroadcaster()
+        self.jobs = JobManager()
+        self._cycle_lock = threading.Lock()
+        # Deals with a hedge order between pricing and update; others skip them
+        self._hedging: Set[str] = set()
+        self._hedging_lock = threading.Lock()
+        self._refresh_flight = SingleFlight()
+        self._monitor_stop = threading.Event()
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._monitoring_listeners: List[Callable[[bool], None]] = []
+        # Monitoring started on behalf of SSE viewers stops when the last one leaves
+        self._viewer_lock = threading.Lock()
+        self._viewers = 0
+        self._viewers_own_monitoring = False
 
         # Load settings
         self.min_hedge_size = HEDGE_SETTINGS["min_hedge_size"]
@@ -25,13 +104,16 @@ class DeltaHedger:
         self.hedge_interval = HEDGE_SETTINGS["hedge_interval"]
         self.delta_threshold = HEDGE_SETTINGS["delta_threshold"]
         self.pnl_threshold = HEDGE_SETTINGS["pnl_threshold"]
+        self.volatility_source = HEDGE_SETTINGS["volatility_source"]
+        self.option_prefixes = tuple(CACHE_SETTINGS["option_epic_prefixes"])
 
+    @TRACER.traced("hedger.get_position", _deal_attributes)
     def get_position(self, position_id: str) -> Optional[Position]:
         """Get position by ID with proper validation"""
         try:
             position = self.positions.get(position_id)
             if position:
-                logger.info(f"Retrieved position {position_id} from cache")
+                logger.debug("Retrieved position %s from cache", position_id)
                 return position
 
             positions_data = self.ig_client.get_positions()
@@ -41,7 +123,7 @@ class DeltaHedger:
 
             for pos_data in positions_data["positions"]:
                 if pos_data["position"]["dealId"] == position_id:
-                    new_position = Position.from_dict(pos_data)
+                    new_position = self._new_position(pos_data)
                     self.positions[position_id] = new_position
                     return new_position
 
@@ -52,29 +134,87 @@ class DeltaHedger:
             logger.error(f"Error getting position {position_id}: {str(e)}")
             return None
 
-    def calculate_position_delta(self, position: Position) -> Dict:
+    def get_market_data(self, epic: str, use_cache: bool = True) -> Dict:
+        """Read a quote from the streaming price board, falling back to REST"""
+        if self.price_stream and use_cache:
+            quote = self.price_stream.board.get(epic)
+            if quote and quote.get("price"):
+                self._track_volatility(epic, quote["price"])
+                return quote
+
+        market_data = self.ig_client.get_market_data(epic, use_cache=use_cache)
+        if self.price_stream and market_data:
+            # Seed the board with the full snapshot; streamed bid/offer merge into it
+            self.price_stream.board.update(epic, market_data)
+            self.price_stream.subscribe([epic])
+        if market_data:
+            self._track_volatility(epic, market_data.get("price"))
+        return market_data
+
+    def _track_volatility(self, epic: str, price: Optional[float]) -> None:
+        # Realized volatility is of underlyings; option premia would measure something else
+        if price and not epic.startswith(self.option_prefixes):
+            self.vol_tracker.update(epic, price)
+
+    def prefetch_market_data(self, epics: Iterable[Optional[str]]) -> None:
+        """Warm the market cache for a cycle in one concurrent batch instead of a request per position"""
+        fetch_many = getattr(self.ig_client, "get_market_data_many", None)
+        if fetch_many is None:
+            return
+        epics = [epic for epic in dict.fromkeys(epics) if epic]
+        if self.price_stream:
+            # Streamed quotes are read from the board, not the cache
+            epics = [epic for epic in epics if not (self.price_stream.board.get(epic) or {}).get("price")]
+        if not epics:
+            return
+        try:
+            fetch_many(epics)
+        except Exception as e:
+            # Positions still fetch their own quotes one by one
+            logger.warning(f"Market data prefetch failed: {str(e)}")
+
+    def get_volatility(self, epic: str, market_data: Dict) -> float:
+        """Sigma from the configured source, falling back to the market snapshot"""
+        volatility = self.vol_tracker.estimate(epic, self.volatility_source)
+        if volatility is None:
+            volatility = market_data.get("volatility", 0.2)
+        return volatility
+
+    @TRACER.traced("hedger.calculate_position_delta", _position_attributes)
+    def calculate_position_delta(
+        self, position: Position, use_cache: bool = True
+    ) -> Dict:
         """Calculate delta with improved error handling and edge case support"""
         try:
+            if self.price_stream:
+                self.price_stream.subscribe([position.epic, position.underlying_epic])
+
             if position.time_to_expiry <= 0.001:
                 logger.warning(f"Position near expiry: {position.deal_id}")
-                market_data = self.ig_client.get_market_data(position.epic)  # type: ignore
+                market_data = self.get_market_data(position.epic, use_cache)  # type: ignore
                 if not market_data:
                     return {"error": "Failed to fetch market data"}
 
                 current_price = float(market_data.get("price", 0))
-                intrinsic_value = position.calculate_intrinsic_value(current_price)
-                delta = (
-                    0 if intrinsic_value == 0 else (1 if intrinsic_value > 0 else -1)
+                underlying_price = _price_of(
+                    self.get_market_data(position.underlying_epic, use_cache)
+                )
+                if underlying_price is None:
+                    return {"error": "Failed to fetch underlying market data"}
+                intrinsic_value = position.calculate_intrinsic_value(underlying_price)
+                delta = 0 if intrinsic_value == 0 else (
+                    -1 if position.option_type == OptionType.PUT else 1
                 )
 
                 return {
                     "current_price": current_price,
+                    "underlying_price": underlying_price,
                     "delta": delta,
                     "position_delta": delta * position.size * position.contract_size,
                     "needs_hedge": False,
                 }
 
-            market_data = self.ig_client.get_market_data(position.epic)  # type: ignore
+            market_data = self.get_market_data(position.epic, use_cache)  # type: ignore
             if not market_data:
                 return {"error": "Failed to fetch market data"}
 
@@ -82,11 +222,17 @@ class DeltaHedger:
             if current_price <= 0:
                 return {"error": "Invalid market price"}
 
-            volatility = max(market_data.get("volatility", 0.2), 0.1)
+            # Greeks are priced at the underlying's spot and vol, as in batch pricing and
+            # the hedge; current_price stays the option premium
+            underlying_data = self.get_market_data(position.underlying_epic, use_cache)
+            underlying_price = _price_of(underlying_data)
+            if underlying_price is None:
+                return {"error": "Failed to fetch underlying market data"}
+            volatility = max(self.get_volatility(position.underlying_epic, underlying_data), 0.1)
             time_to_expiry = max(position.time_to_expiry, 0.001)
 
             greeks = self.calculator.calculate_greeks(
-                S=current_price,
+                S=underlying_price,
                 K=position.strike,
                 T=time_to_expiry,
                 sigma=volatility,
@@ -98,9 +244,11 @@ class DeltaHedger:
 
             return {
                 "current_price": current_price,
+                "underlying_price": underlying_price,
                 "delta": greeks["delta"],
                 "position_delta": position_delta,
                 "greeks": greeks,
+                "volatility": volatility,
                 "needs_hedge": needs_hedge,
                 "suggested_hedge_size": abs(position_delta),
             }
@@ -109,19 +257,40 @@ class DeltaHedger:
             logger.error(f"Delta calculation error: {str(e)}")
             return {"error": str(e)}
 
+    @TRACER.traced("hedger.hedge_position", _deal_attributes)
     def hedge_position(
         self,
         position_id: str,
         hedge_size: float = None,  # type: ignore
-        force_hedge: bool = False,  # noqa
+        unhedged_only: bool = False,
     ) -> Dict:
-        """Execute hedging with CFD positions"""
+        """
+        Execute hedging with CFD positions.
+
+        Returns a skipped status while another hedge of the deal is in flight:
+        that order is sized off the same delta, so a second one would double it.
+        """
+        with self._hedging_lock:
+            if position_id in self._hedging:
+                return {"status": "skipped", "reason": "Hedge already in flight"}
+            self._hedging.add(position_id)
+        try:
+            return self._hedge_position(position_id, unhedged_only)
+        finally:
+            with self._hedging_lock:
+                self._hedging.discard(position_id)
+
+    def _hedge_position(self, position_id: str, unhedged_only: bool) -> Dict:
         try:
             position = self.get_position(position_id)
             if not position:
                 return {"error": "Position not found"}
+            # Re-checked under the claim: a hedge that finished meanwhile already covers it
+            if unhedged_only and position.hedge_deal_id:
+                return {"status": "skipped", "reason": "Already hedged"}
 
-            delta_info = self.calculate_position_delta(position)
+            # Order-critical: price the hedge off a fresh quote, not the cache
+            delta_info = self.calculate_position_delta(position, use_cache=False)
             if "error" in delta_info:
                 return {"error": delta_info["error"]}
 
@@ -134,10 +303,10 @@ class DeltaHedger:
             except (TypeError, ValueError):
                 return {"error": f"Invalid delta value: {delta}"}
 
-            logger.info(f"Hedging position {position_id}")
-            logger.info(f"Delta: {delta}")
-            logger.info(f"Position size: {position.size}")
-            logger.info(f"Contract size: {position.contract_size}")
+            logger.info(
+                "Hedging position %s: delta=%s size=%s contract_size=%s",
+                position_id, delta, position.size, position.contract_size,
+            )
 
             if delta == 0 or position.time_to_expiry <= 0.001:
                 hedge_size = max(0.01, position.size * 0.1)
@@ -153,11 +322,27 @@ class DeltaHedger:
             )
 
             if "dealReference" in hedge_result:
+                hedge_price = _hedge_price(hedge_result, delta_info.get("underlying_price"))
                 position.update_hedge(
                     deal_id=hedge_result["dealReference"],
                     size=hedge_size,
-                    price=delta_info["current_price"],
+                    price=hedge_price,
                     direction=direction.value,
+                    slippage=_hedge_slippage(hedge_size, hedge_result),
+                )
+                if self.state_store is not None:
+                    self.state_store.record_hedge(position, delta=delta)
+                self.snapshots.invalidate()
+                self.events.publish(
+                    "hedge",
+                    {
+                        "position_id": position_id,
+                        "hedge_size": hedge_size,
+                        "direction": direction.value,
+                        "price": hedge_price,
+                        "hedge_reference": hedge_result["dealReference"],
+                        "delta": delta,
+                    },
                 )
 
             return {
@@ -172,17 +357,17 @@ class DeltaHedger:
             logger.error(f"Hedging error: {str(e)}")
             return {"error": f"Hedging failed: {str(e)}"}
 
-    def calculate_pnl(self, position: Position, current_price: float) -> float:
-        """Calculate position PnL including hedges"""
+    def calculate_pnl(self, position: Position, underlying_price: float) -> float:
+        """Calculate position PnL including hedges, at the underlying's price"""
         try:
-            intrinsic_value = position.calculate_intrinsic_value(current_price)
+            intrinsic_value = position.calculate_intrinsic_value(underlying_price)
             option_pnl = position.premium - (
                 intrinsic_value * position.size * position.contract_size
             )
 
             if position.hedge_size and position.last_hedge_price is not None:
                 hedge_pnl = position.hedge_size * (
-                    current_price - position.last_hedge_price
+                    underlying_price - position.last_hedge_price
                 )
                 option_pnl += hedge_pnl
 
@@ -196,18 +381,14 @@ class DeltaHedger:
         """Get current monitoring status"""
         return {
             "active": self.monitoring_active,
+            "auto_hedge": self.auto_hedge,
             "last_check": (
                 self.last_check_time.isoformat() if self.last_check_time else None
             ),
-            "settings": {
-                "min_hedge_size": self.min_hedge_size,
-                "max_hedge_size": self.max_hedge_size,
-                "hedge_interval": self.hedge_interval,
-                "delta_threshold": self.delta_threshold,
-                "pnl_threshold": self.pnl_threshold,
-            },
+            "settings": self.get_current_settings(),
         }
 
+    @TRACER.traced("hedger.get_all_positions_status")
     def get_all_positions_status(self) -> Dict:
         """Get status for all positions"""
         try:
@@ -217,21 +398,24 @@ class DeltaHedger:
             if "error" in positions_data:
                 return {"error": positions_data["error"]}
 
-            for pos_data in positions_data.get("positions", []):
+            owned = [
+                pos_data
+                for pos_data in positions_data.get("positions", [])
+                if self.owns is None or self.owns(pos_data)
+            ]
+            epics = [pos_data.get("market", {}).get("epic") for pos_data in owned]
+            underlyings = {Position.underlying_for(pos_data.get("market", {})) for pos_data in owned}
+            self._listed_deal_ids = {
+                pos_data.get("position", {}).get("dealId") for pos_data in owned
+            }
+            self.prefetch_market_data(epics + sorted(underlyings))
+
+            for pos_data in owned:
                 try:
-                    position = Position.from_dict(pos_data)
+                    position = self._sync_position(pos_data)
                     if not position:
                         continue
-
-                    delta_info = self.calculate_position_delta(position)
-                    metrics = self.calculate_position_metrics(position)
-
-                    positions_status[position.deal_id] = {
-                        "position": position.to_dict(),
-                        "delta": delta_info,
-                        "metrics": metrics,
-                        "needs_hedge": delta_info.get("needs_hedge", False),
-                    }
+                    positions_status[position.deal_id] = self._status_entry(position)
                 except Exception as e:
                     logger.error(f"Error processing position status: {str(e)}")
                     continue
@@ -242,16 +426,329 @@ class DeltaHedger:
             logger.error(f"Error getting positions status: {str(e)}")
             return {"error": str(e)}
 
-    def calculate_position_metrics(self, position: Position) -> Dict:
+    def price_entries(self, deal_ids: Iterable[str]) -> Dict:
+        """Status entries for just these already-listed positions, e.g. one page of a listing"""
+        positions = [self.positions[deal_id] for deal_id in deal_ids if deal_id in self.positions]
+        self.prefetch_market_data(
+            [position.epic for position in positions]
+            + sorted({position.underlying_epic for position in positions})
+        )
+        entries = {}
+        for position in positions:
+            try:
+                entries[position.deal_id] = self._status_entry(position)
+            except Exception as e:
+                logger.error(f"Error pricing position {position.deal_id}: {str(e)}")
+        return entries
+
+    def _status_entry(self, position: Position) -> Dict:
+        delta_info = self.calculate_position_delta(position)
+        metrics = self.calculate_position_metrics(position, delta_info)
+        return {
+            "position": position.to_dict(),
+            "delta": delta_info,
+            "metrics": metrics,
+            "needs_hedge": delta_info.get("needs_hedge", False),
+        }
+
+    def _sync_position(self, pos_data: Dict) -> Position:
+        """Refresh a cached position from IG data, keeping its hedge state"""
+        deal_id = pos_data.get("position", {}).get("dealId")
+        position = self.positions.get(deal_id)
+        if position is None:
+            position = self._new_position(pos_data)
+            self.positions[position.deal_id] = position
+        else:
+            position.sync(pos_data)
+        return position
+
+    def _new_position(self, pos_data: Dict) -> Position:
+        """Position from IG data with any hedge state persisted for it"""
+        position = Position.from_dict(pos_data)
+        if self.state_store is not None:
+            self.state_store.restore(position)
+        return position
+
+    def run_cycle(self, auto_hedge: bool = False) -> Optional[PortfolioSnapshot]:
+        """Recompute the book, optionally hedge, and publish a new snapshot"""
+        PROFILER.cycle_started()
+        try:
+            with TRACER.span("hedge_cycle", auto_hedge=auto_hedge) as span:
+                snapshot = self._run_cycle(auto_hedge)
+                if snapshot is None:
+                    span.set_error("Hedge cycle failed")
+                else:
+                    span.set_attribute("positions", len(snapshot.positions))
+                    span.set_attribute("version", snapshot.version)
+                return snapshot
+        finally:
+            PROFILER.cycle_finished()
+
+    def collect_positions(self, auto_hedge: bool = False) -> Dict:
+        """Status of every position, first hedging those that need it if auto_hedge"""
+        positions_status = self.get_all_positions_status()
+        if "error" in positions_status:
+            return positions_status
+
+        # Drop closed positions so their hedge state does not linger; a listed
+        # position that failed to price this cycle is still open
+        closed = set(self.positions) - self._listed_deal_ids
+        for deal_id in closed:
+            self.positions.pop(deal_id, None)
+        if closed and self.state_store is not None:
+            self.state_store.mark_closed(closed)
+
+        if auto_hedge:
+            for deal_id, status in positions_status.items():
+                position = self.positions.get(deal_id)
+                if not status.get("needs_hedge") or not position or position.hedge_deal_id:
+                    continue
+                result = self.hedge_position(deal_id, unhedged_only=True)
+                if "error" in result:
+                    logger.error("Auto-hedge failed for %s: %s", deal_id, result["error"])
+                    continue
+                if result.get("status") == "skipped":
+                    continue
+                positions_status[deal_id] = dict(status, position=position.to_dict())
+        return positions_status
+
+    def _run_cycle(self, auto_hedge: bool) -> Optional[PortfolioSnapshot]:
+        with self._cycle_lock:
+            started = time.perf_counter()
+            positions_status = self.collect_positions(auto_hedge)
+            if "error" in positions_status:
+                logger.error("Hedge cycle failed: %s", positions_status["error"])
+                HEDGE_CYCLES.inc(result="error")
+                return None
+
+            self.last_check_time = datetime.now()
+            snapshot = self.snapshots.publish(positions_status, self.get_monitoring_status())
+            self._publish_changes(snapshot)
+            HEDGE_CYCLES.inc(result="ok")
+            HEDGE_CYCLE_SECONDS.observe(
+                time.perf_counter() - started, auto_hedge=str(auto_hedge).lower()
+            )
+            return snapshot
+
+    def _publish_changes(self, snapshot: PortfolioSnapshot) -> None:
+        """Push the positions (and their greeks) that changed in this snapshot"""
+        if self.events.subscriber_count:
+            self.events.publish(
+                "positions", snapshot.change_set(snapshot.version - 1), event_id=snapshot.version
+            )
+
+    def refresh_snapshot(self) -> Optional[PortfolioSnapshot]:
+        """Run one read-only cycle, coalescing concurrent callers"""
+        requested_at = time.monotonic()
+
+        def refresh() -> Optional[PortfolioSnapshot]:
+            with self._cycle_lock:
+                snapshot = self.snapshots.current()
+                # A cycle that finished while we waited for the lock is fresh enough
+                if snapshot and snapshot.created_monotonic >= requested_at:
+                    return snapshot
+            return self.run_cycle()
+
+        return self._refresh_flight.do("snapshot", refresh)
+
+    def snapshot_is_fresh(self) -> bool:
+        snapshot = self.snapshots.current()
+        if snapshot is None or self.snapshots.invalidated:
+            return False
+        return self.monitoring_active or snapshot.age <= SNAPSHOT_SETTINGS["max_age"]
+
+    def get_snapshot(self) -> Optional[PortfolioSnapshot]:
+        """Latest snapshot, recomputed only when monitoring is not keeping it fresh"""
+        if self.snapshot_is_fresh():
+            return self.snapshots.current()
+        return self.refresh_snapshot() or self.snapshots.current()
+
+    def get_position_entries(self) -> Dict:
+        """Positions as status entries without pricing them"""
+        try:
+            positions_data = self.ig_client.get_positions()
+            if "error" in positions_data:
+                return {"error": positions_data["error"]}
+
+            entries = {}
+            for pos_data in positions_data.get("positions", []):
+                if self.owns is not None and not self.owns(pos_data):
+                    continue
+                try:
+                    position = self._sync_position(pos_data)
+                    entries[position.deal_id] = {"position": position.to_dict()}
+                except Exception as e:
+                    logger.error(f"Error processing position: {str(e)}")
+                    continue
+            return entries
+
+        except Exception as e:
+            logger.error(f"Error listing positions: {str(e)}")
+            return {"error": str(e)}
+
+    def start_monitoring(
+        self,
+        interval: Optional[float] = None,
+        delta_threshold: Optional[float] = None,
+        auto_hedge: bool = False,
+    ) -> Dict:
+        """Start the background hedge cycle"""
+        # An explicit start outlives the SSE viewers
+        self._viewers_own_monitoring = False
+        if interval is not None:
+            self.hedge_interval = interval
+        if delta_threshold is not None:
+            self.delta_threshold = delta_threshold
+        self.auto_hedge = auto_hedge
+
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            return {"status": "already_running", "monitoring": self.get_monitoring_status()}
+
+        self._monitor_stop.clear()
+        self._set_monitoring(True)
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_loop, name="hedge-monitor", daemon=True
+        )
+        self._monitor_thread.start()
+        self.events.publish("monitoring", self.get_monitoring_status())
+        logger.info(
+            "Monitoring started: interval=%ss threshold=%s auto_hedge=%s",
+            self.hedge_interval, self.delta_threshold, self.auto_hedge,
+        )
+        return {"status": "started", "monitoring": self.get_monitoring_status()}
+
+    def stop_monitoring(self) -> Dict:
+        """Stop the background hedge cycle"""
+        self._monitor_stop.set()
+        if self._monitor_thread:
+            self._monitor_thread.join(timeout=5)
+            self._monitor_thread = None
+        self._set_monitoring(False)
+        self.events.publish("monitoring", self.get_monitoring_status())
+        return {"status": "stopped", "monitoring": self.get_monitoring_status()}
+
+    def add_monitoring_listener(self, callback: Callable[[bool], None]) -> None:
+        """Call back whenever monitoring starts or stops, including the loop dying on its own"""
+        self._monitoring_listeners.append(callback)
+
+    def _set_monitoring(self, active: bool) -> None:
+        self.monitoring_active = active
+        for callback in self._monitoring_listeners:
+            try:
+                callback(active)
+            except Exception as e:
+                logger.error(f"Monitoring listener failed: {str(e)}")
+
+    def attach_viewer(self) -> None:
+        """Register a live dashboard viewer, starting monitoring if it is off"""
+        with self._viewer_lock:
+            self._viewers += 1
+            if not self.monitoring_active:
+                self.start_monitoring()
+                self._viewers_own_monitoring = True
+
+    def detach_viewer(self) -> None:
+        with self._viewer_lock:
+            self._viewers = max(self._viewers - 1, 0)
+            if self._viewers == 0 and self._viewers_own_monitoring:
+                self._viewers_own_monitoring = False
+                self.stop_monitoring()
+
+    def price_stream_status(self) -> Dict:
+        """Streaming connection state and quote ages from the price board"""
+        if not self.price_stream:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "connected": self.price_stream.connected,
+            "board": self.price_stream.board.status(),
+        }
+
+    def submit_hedge_all(self, manual: bool = True) -> Dict:
+        """Queue a bulk hedge; manual hedges every position, otherwise only those needing it"""
+
+        def plan():
+            snapshot = self.get_snapshot()
+            if snapshot is None:
+                raise RuntimeError("Could not load positions")
+            return [
+                deal_id
+                for deal_id, status in snapshot.positions.items()
+                if manual or status.get("needs_hedge", False)
+            ]
+
+        def hedge(position_id: str) -> Dict:
+            return self.hedge_position(position_id)
+
+        mode = "manual" if manual else "automatic"
+        job = self.jobs.submit("hedge_all", plan, hedge, params={"mode": mode})
+        logger.info("Queued bulk hedge job %s (%s)", job.id, mode)
+        return job.to_dict()
+
+    def get_job(self, job_id: str, since: int = 0) -> Dict:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"error": "Job not found"}
+        return job.to_dict(since)
+
+    def wait_job(self, job_id: str, since: int = 0, timeout: float = 15.0) -> Dict:
+        """Job state once it has results past `since`, finishes, or `timeout` expires"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"error": "Job not found"}
+        job.wait(since, timeout)
+        return job.to_dict(since)
+
+    def cancel_job(self, job_id: str) -> Dict:
+        job = self.jobs.cancel(job_id)
+        if job is None:
+            return {"error": "Job not found"}
+        return job.to_dict()
+
+    def list_jobs(self) -> Dict:
+        return {"jobs": self.jobs.list()}
+
+    def _monitor_loop(self) -> None:
+        try:
+            while not self._monitor_stop.is_set():
+                started = time.monotonic()
+                try:
+                    self.run_cycle(auto_hedge=self.auto_hedge)
+                except Exception as e:
+                    logger.error(f"Monitoring cycle error: {str(e)}")
+                elapsed = time.monotonic() - started
+                if elapsed > self.hedge_interval:
+                    HEDGE_CYCLE_OVERRUNS.inc()
+                    logger.warning(
+                        "Hedge cycle took %.2fs, longer than the %ss interval",
+                        elapsed, self.hedge_interval,
+                    )
+                self._monitor_stop.wait(max(self.hedge_interval - elapsed, 0))
+        finally:
+            # A loop superseded by a newer start must not flag that one as stopped
+            if self._monitor_thread in (None, threading.current_thread()):
+                self._set_monitoring(False)
+                if not self._monitor_stop.is_set():
+                    logger.error("Monitoring loop exited unexpectedly")
+                    self.events.publish("monitoring", self.get_monitoring_status())
+
+    @TRACER.traced("hedger.calculate_position_metrics", _position_attributes)
+    def calculate_position_metrics(
+        self, position: Position, delta_info: Optional[Dict] = None
+    ) -> Dict:
         """Calculate key metrics for a position including PnL and delta"""
         try:
-            market_data = self.ig_client.get_market_data(position.epic)  # type: ignore
+            market_data = self.get_market_data(position.epic)  # type: ignore
             if not market_data:
                 return {"error": "Failed to fetch market data"}
 
             current_price = (market_data["bid"] + market_data["offer"]) / 2
-            pnl = self.calculate_pnl(position, current_price)
-            delta_info = self.calculate_position_delta(position)
+            if delta_info is None:
+                delta_info = self.calculate_position_delta(position)
+            underlying_price = delta_info.get("underlying_price")
+            if underlying_price is None:
+                return {"error": "Failed to fetch underlying market data"}
+            pnl = self.calculate_pnl(position, underlying_price)
 
             return {
                 "pnl": pnl,
@@ -272,6 +769,12 @@ class DeltaHedger:
             if not isinstance(settings, dict):
                 return {"error": "Settings must be a dictionary"}
 
+            volatility_source = settings.get("volatility_source", self.volatility_source)
+            if volatility_source not in VOLATILITY_SOURCES:
+                return {
+                    "error": f"volatility_source must be one of {', '.join(VOLATILITY_SOURCES)}"
+                }
+
             try:
                 settings = {
                     "min_hedge_size": float(settings.get("min_hedge_size", 0)),
@@ -297,6 +800,7 @@ class DeltaHedger:
             self.hedge_interval = settings["hedge_interval"]
             self.delta_threshold = settings["delta_threshold"]
             self.pnl_threshold = settings["pnl_threshold"]
+            self.volatility_source = volatility_source
 
             return {"status": "success", "settings": self.get_current_settings()}
 
@@ -312,6 +816,7 @@ class DeltaHedger:
             "hedge_interval": self.hedge_interval,
             "delta_threshold": self.delta_threshold,
             "pnl_threshold": self.pnl_threshold,
+            "volatility_source": self.volatility_source,
         }
 
     def get_position_status(self, position_id: str) -> Dict:
@@ -322,7 +827,7 @@ class DeltaHedger:
                 return {"error": "Position not found"}
 
             delta_info = self.calculate_position_delta(position)
-            metrics = self.calculate_position_metrics(position)
+            metrics = self.calculate_position_metrics(position, delta_info)
 
             return {
                 "position": position.to_dict(),
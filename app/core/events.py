@@ -0,0 +1,97 @@
+# app/core/events.py
+import json
+import logging
+import queue
+import threading
+from typing import Dict, List, Optional
+
+from config.settings import EVENT_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events frame"""
+    frame = f"event: {event}\n"
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    return frame + f"data: {json.dumps(data, default=str)}\n\n"
+
+
+class Subscription:
+    def __init__(self, queue_size: int):
+        self.queue: "queue.Queue[str]" = queue.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def get(self, timeout: float) -> Optional[str]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroadcaster:
+    """
+    Fans hedger events out to SSE subscribers.
+
+    Each event is serialized once and the same frame is queued for every
+    subscriber. A subscriber that falls queue_size frames behind is reset to
+    a single resync frame instead of blocking the publisher.
+    """
+
+    def __init__(self, queue_size: int = EVENT_SETTINGS["queue_size"]):
+        self.queue_size = queue_size
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "delivered": 0, "resyncs": 0}
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> int:
+        """Remove a subscriber; returns how many remain"""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            return len(self._subscribers)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data: Dict, event_id: Optional[int] = None) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._stats["published"] += 1
+        if not subscribers:
+            return
+
+        frame = format_sse(event, data, event_id)
+        delivered = 0
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(frame)
+                delivered += 1
+            except queue.Full:
+                self._resync(subscription)
+        with self._lock:
+            self._stats["delivered"] += delivered
+
+    def _resync(self, subscription: Subscription) -> None:
+        while True:
+            try:
+                subscription.queue.get_nowait()
+            except queue.Empty:
+                break
+        subscription.overflowed = True
+        subscription.queue.put_nowait(format_sse("resync", {"reason": "subscriber too slow"}))
+        with self._lock:
+            self._stats["resyncs"] += 1
+        logger.warning("SSE subscriber fell behind; sent resync")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, subscribers=len(self._subscribers))
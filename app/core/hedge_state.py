@@ -0,0 +1,343 @@
+# app/core/hedge_state.py
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from app.models.position import Position
+from config.settings import STATE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hedge_state (
+    deal_id TEXT PRIMARY KEY,
+    epic TEXT,
+    hedge_size REAL NOT NULL DEFAULT 0,
+    hedge_deal_id TEXT,
+    hedge_direction TEXT,
+    last_hedge_price REAL,
+    last_hedge_time TEXT,
+    hedge_slippage REAL NOT NULL DEFAULT 0,
+    pnl_threshold_crossed INTEGER NOT NULL DEFAULT 0,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT NOT NULL,
+    closed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS hedge_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    deal_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    delta REAL,
+    hedge_size REAL,
+    price REAL,
+    pnl REAL,
+    hedge_deal_id TEXT,
+    direction TEXT
+);
+CREATE INDEX IF NOT EXISTS hedge_history_deal_time ON hedge_history (deal_id, timestamp);
+CREATE INDEX IF NOT EXISTS hedge_history_time ON hedge_history (timestamp);
+"""
+
+STATE_COLUMNS = (
+    "deal_id", "epic", "hedge_size", "hedge_deal_id", "hedge_direction", "last_hedge_price",
+    "last_hedge_time", "hedge_slippage", "pnl_threshold_crossed", "is_active", "updated_at",
+)
+# Columns added after the first release: (name, definition) for databases created before them
+ADDED_STATE_COLUMNS = (("hedge_slippage", "REAL NOT NULL DEFAULT 0"),)
+HISTORY_COLUMNS = (
+    "deal_id", "timestamp", "delta", "hedge_size", "price", "pnl", "hedge_deal_id", "direction",
+)
+
+UPSERT_STATE = (
+    f"INSERT INTO hedge_state ({', '.join(STATE_COLUMNS)}, closed_at) "
+    f"VALUES ({', '.join('?' * len(STATE_COLUMNS))}, NULL) "
+    "ON CONFLICT (deal_id) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in STATE_COLUMNS[1:])
+    + ", closed_at = NULL"
+)
+INSERT_HISTORY = (
+    f"INSERT INTO hedge_history ({', '.join(HISTORY_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(HISTORY_COLUMNS))})"
+)
+CLOSE_STATE = "UPDATE hedge_state SET closed_at = ? WHERE deal_id = ? AND closed_at IS NULL"
+
+
+class HedgeStateStore:
+    """
+    Durable hedge state and history in an embedded SQLite database.
+
+    The database runs in WAL mode so readers (recovery, history queries,
+    other processes) never block the writer. Writes are queued and committed
+    by a background thread, one transaction per batch of whatever queued up
+    meanwhile, so hedging never waits on disk. flush() waits for everything
+    queued so far.
+
+    The latest state per deal is also mirrored in memory: restore() reapplies
+    it to a Position the hedger builds from IG data, whether after a restart
+    (load() fills the mirror from the database) or after a position dropped
+    out of a cycle and came back.
+    """
+
+    def __init__(
+        self,
+        path: str = STATE_SETTINGS["path"],
+        batch_size: int = STATE_SETTINGS["batch_size"],
+        busy_timeout: float = STATE_SETTINGS["busy_timeout"],
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.last_error: Optional[str] = None
+        self.recovery_seconds: Optional[float] = None
+        self._states: Dict[str, Dict] = {}
+        self._histories: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._read_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._reader = self._connect()
+        self._reader.executescript(SCHEMA)
+        self._migrate()
+
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="hedge-state-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls) -> Optional["HedgeStateStore"]:
+        """Store at HEDGE_STATE_PATH, or None when HEDGE_STATE_ENABLED=false"""
+        enabled = os.getenv("HEDGE_STATE_ENABLED", str(STATE_SETTINGS["enabled"])).lower() == "true"
+        if not enabled:
+            return None
+        return cls(path=os.getenv("HEDGE_STATE_PATH", STATE_SETTINGS["path"]))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Durable across process crashes; only a power loss can drop the last commits
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _migrate(self) -> None:
+        existing = {row["name"] for row in self._reader.execute("PRAGMA table_info(hedge_state)")}
+        with self._reader:
+            for name, definition in ADDED_STATE_COLUMNS:
+                if name not in existing:
+                    self._reader.execute(f"ALTER TABLE hedge_state ADD COLUMN {name} {definition}")
+                    logger.info("Added hedge_state.%s to %s", name, self.path)
+
+    # Recovery
+
+    def load(self) -> int:
+        """Fill the mirror with every open deal's state and history; returns the count"""
+        started = time.perf_counter()
+        try:
+            with self._read_lock:
+                # Plain tuples: sqlite3.Row costs more than the query itself here
+                cursor = self._reader.cursor()
+                cursor.row_factory = None
+                states = cursor.execute(
+                    f"SELECT {', '.join(STATE_COLUMNS)} FROM hedge_state WHERE closed_at IS NULL"
+                ).fetchall()
+                history = cursor.execute(
+                    f"SELECT {', '.join('h.' + c for c in HISTORY_COLUMNS)} FROM hedge_history h "
+                    "JOIN hedge_state s USING (deal_id) WHERE s.closed_at IS NULL ORDER BY h.id"
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error loading hedge state from {self.path}: {str(e)}")
+            return 0
+
+        with self._lock:
+            for row in states:
+                state = dict(zip(STATE_COLUMNS, row))
+                self._states[state["deal_id"]] = state
+            for row in history:
+                self._histories.setdefault(row[0], []).append(dict(zip(HISTORY_COLUMNS, row)))
+        self.recovery_seconds = time.perf_counter() - started
+        logger.info(
+            "Recovered hedge state for %d positions (%d hedges) from %s in %.1fms",
+            len(states), len(history), self.path, self.recovery_seconds * 1000,
+        )
+        return len(states)
+
+    def restore(self, position: Position) -> bool:
+        """Reapply the mirrored hedge state to a freshly built position"""
+        with self._lock:
+            state = self._states.get(position.deal_id)
+            history = list(self._histories.get(position.deal_id, ()))
+        if state is None:
+            return False
+        position.restore_hedge_state(state, history)
+        return True
+
+    # Writes
+
+    def record_hedge(self, position: Position, delta: Optional[float] = None) -> None:
+        """Queue a position's new hedge state plus the hedge it just placed"""
+        record = position.hedge_history[-1].to_dict() if position.hedge_history else {}
+        state = _state_from_position(position)
+        hedge = {
+            "deal_id": position.deal_id,
+            "timestamp": record.get("timestamp", state["updated_at"]),
+            "delta": delta if delta is not None else record.get("delta"),
+            "hedge_size": record.get("hedge_size", position.hedge_size),
+            "price": record.get("price", position.last_hedge_price),
+            "pnl": record.get("pnl"),
+            "hedge_deal_id": position.hedge_deal_id,
+            "direction": position.hedge_direction,
+        }
+        with self._lock:
+            self._states[position.deal_id] = state
+            self._histories.setdefault(position.deal_id, []).append(hedge)
+        self._queue.put(("hedge", state, hedge))
+
+    def mark_closed(self, deal_ids: Iterable[str]) -> None:
+        """Queue closing deals; closed deals are skipped by load()"""
+        closed_at = datetime.now().isoformat()
+        with self._lock:
+            closed = [(closed_at, deal_id) for deal_id in deal_ids if deal_id in self._states]
+        if closed:
+            self._queue.put(("close", closed, None))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every write queued before this call is committed"""
+        done = threading.Event()
+        self._queue.put(("flush", done, None))
+        return done.wait(timeout)
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._commit(conn, batch)
+            if stop:
+                conn.close()
+                return
+
+    def _commit(self, conn: sqlite3.Connection, batch: List) -> bool:
+        states, hedges, closed, waiters, stop = [], [], [], [], False
+        for kind, first, second in batch:
+            if kind == "hedge":
+                states.append(tuple(first[c] for c in STATE_COLUMNS))
+                hedges.append(tuple(second[c] for c in HISTORY_COLUMNS))
+            elif kind == "close":
+                closed.extend(first)
+            elif kind == "flush":
+                waiters.append(first)
+            elif kind == "stop":
+                waiters.append(first)
+                stop = True
+
+        if states or closed:
+            try:
+                with conn:
+                    conn.executemany(UPSERT_STATE, states)
+                    conn.executemany(INSERT_HISTORY, hedges)
+                    conn.executemany(CLOSE_STATE, closed)
+                self.written += len(states) + len(closed)
+                self.batches += 1
+            except sqlite3.Error as e:
+                self.write_errors += len(states) + len(closed)
+                self.last_error = str(e)
+                logger.error(f"Error writing hedge state to {self.path}: {str(e)}")
+        for waiter in waiters:
+            waiter.set()
+        return stop
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Commit queued writes and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        done = threading.Event()
+        self._queue.put(("stop", done, None))
+        done.wait(timeout)
+        with self._read_lock:
+            self._reader.close()
+
+    # Queries
+
+    def history(
+        self,
+        deal_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 100,
+    ) -> Dict:
+        """Hedges newest first, optionally for one deal and within [since, until]"""
+        clauses, params = [], []
+        if deal_id:
+            clauses.append("deal_id = ?")
+            params.append(deal_id)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        try:
+            with self._read_lock:
+                rows = self._reader.execute(
+                    f"SELECT * FROM hedge_history {where}ORDER BY timestamp DESC, id DESC LIMIT ?",
+                    params + [limit],
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error querying hedge history: {str(e)}")
+            return {"error": str(e)}
+        return {"hedges": [dict(row) for row in rows], "count": len(rows)}
+
+    def get_state(self, deal_id: str) -> Optional[Dict]:
+        with self._lock:
+            state = self._states.get(deal_id)
+            return dict(state) if state else None
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "positions": len(self._states),
+            "pending_writes": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "last_error": self.last_error,
+            "recovery_ms": (
+                round(self.recovery_seconds * 1000, 3) if self.recovery_seconds is not None else None
+            ),
+        }
+
+
+def _state_from_position(position: Position) -> Dict:
+    return {
+        "deal_id": position.deal_id,
+        "epic": position.epic,
+        "hedge_size": position.hedge_size,
+        "hedge_deal_id": position.hedge_deal_id,
+        "hedge_direction": position.hedge_direction,
+        "last_hedge_price": position.last_hedge_price,
+        "last_hedge_time": position.last_hedge_time,
+        "hedge_slippage": position.hedge_slippage,
+        "pnl_threshold_crossed": int(position.pnl_threshold_crossed),
+        "is_active": int(position.is_active),
+        "updated_at": datetime.now().isoformat(),
+    }
+
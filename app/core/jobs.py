@@ -0,0 +1,219 @@
+# app/core/jobs.py
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from config.settings import JOB_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ("completed", "cancelled", "failed")
+
+
+class Job:
+    """One background job: a list of per-item tasks plus their results"""
+
+    def __init__(self, kind: str, params: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.state = "queued"  # queued | running | completed | cancelled | failed
+        # Not "error": callers treat any result dict with that key as a failed call
+        self.failure: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.total = 0
+        self.results: List[Dict] = []
+        self.cancel_event = threading.Event()
+        self.futures: List[Future] = []
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def _notify(self) -> None:
+        self._changed.notify_all()
+
+    def start(self, total: int) -> None:
+        with self._changed:
+            if self.finished:
+                return
+            self.state = "running"
+            self.started_at = datetime.now()
+            self.total = total
+            if total == 0:
+                self._finish_locked()
+            self._notify()
+
+    def record(self, result: Dict) -> None:
+        with self._changed:
+            self.results.append(dict(result, seq=len(self.results) + 1))
+            if len(self.results) >= self.total:
+                self._finish_locked()
+            self._notify()
+
+    def fail(self, error: str) -> None:
+        with self._changed:
+            self.state = "failed"
+            self.failure = error
+            self.finished_at = datetime.now()
+            self._notify()
+
+    def _finish_locked(self) -> None:
+        if self.finished:
+            return
+        self.state = "cancelled" if self.cancelled else "completed"
+        self.finished_at = datetime.now()
+
+    def wait(self, since: int, timeout: float) -> None:
+        """Block until there are results past `since` or the job finishes"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while len(self.results) <= since and not self.finished:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._changed.wait(remaining)
+
+    def to_dict(self, since: int = 0) -> Dict:
+        with self._changed:
+            results = self.results[since:]
+            succeeded = sum(1 for r in self.results if r.get("status") == "done")
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "params": self.params,
+                "state": self.state,
+                "failure": self.failure,
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "progress": {
+                    "total": self.total,
+                    "completed": len(self.results),
+                    "succeeded": succeeded,
+                    "failed": sum(1 for r in self.results if r.get("status") == "error"),
+                    "cancelled": sum(1 for r in self.results if r.get("status") == "cancelled"),
+                },
+                "since": since,
+                "results": results,
+            }
+
+
+class JobManager:
+    """
+    Runs jobs on a shared worker pool.
+
+    A job is planned on the pool (so submit() returns at once), then each
+    item becomes its own task. Cancelling stops items that have not started;
+    items already talking to IG run to completion.
+    """
+
+    def __init__(self, max_workers: int = JOB_SETTINGS["max_workers"]):
+        self.max_workers = max_workers
+        self.max_finished = JOB_SETTINGS["max_finished"]
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="job-worker"
+                )
+            return self._executor
+
+    def submit(
+        self,
+        kind: str,
+        plan: Callable[[], List[str]],
+        run_item: Callable[[str], Dict],
+        params: Optional[Dict] = None,
+    ) -> Job:
+        """Queue a job; plan() lists the items and run_item(item) handles one"""
+        job = Job(kind, params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune_locked()
+        self._pool().submit(self._plan, job, plan, run_item)
+        return job
+
+    def _plan(self, job: Job, plan: Callable[[], List[str]], run_item: Callable[[str], Dict]) -> None:
+        try:
+            items = [] if job.cancelled else plan()
+        except Exception as e:
+            logger.error(f"Job {job.id} planning failed: {str(e)}")
+            job.fail(str(e))
+            return
+
+        job.start(len(items))
+        if job.finished:
+            return
+        pool = self._pool()
+        # Items are not awaited here, so a small pool cannot deadlock on its own planner
+        job.futures = [pool.submit(self._run_item, job, item, run_item) for item in items]
+
+    def _run_item(self, job: Job, item: str, run_item: Callable[[str], Dict]) -> None:
+        if job.cancelled:
+            job.record({"item": item, "status": "cancelled"})
+            return
+        started = time.monotonic()
+        try:
+            result = run_item(item)
+        except Exception as e:
+            logger.error(f"Job {job.id} item {item} failed: {str(e)}")
+            result = {"error": str(e)}
+        job.record(
+            {
+                "item": item,
+                "status": "error" if "error" in result else "done",
+                "duration": round(time.monotonic() - started, 3),
+                "result": result,
+            }
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.state == "queued":
+            # Never planned: nothing will record results, so close it here
+            job.start(0)
+        return job
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [
+            {k: v for k, v in job.to_dict().items() if k != "results"} for job in reversed(jobs)
+        ]
+
+    def _prune_locked(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel_event.set()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
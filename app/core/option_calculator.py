@@ -1,14 +1,27 @@
 import logging
+import time
 from typing import Dict, Tuple
 
 import numpy as np
-from scipy.stats import norm
 
+from app.core.metrics import GREEKS_SECONDS
 from app.models.enums import OptionType
 from config.settings import HEDGE_SETTINGS
 
 logger = logging.getLogger(__name__)
 
+_norm = None
+
+
+def load_pricing_backend():
+    """Import scipy.stats on first use; it dominates cold-start time"""
+    global _norm
+    if _norm is None:
+        from scipy.stats import norm
+
+        _norm = norm
+    return _norm
+
 
 class OptionCalculator:
     def __init__(self, rate: float = HEDGE_SETTINGS["default_rate"]):
@@ -40,7 +53,7 @@ class OptionCalculator:
             T = max(T, min_time)
             sigma = max(min(sigma, max_vol), min_vol)
 
-            logger.debug(f"Using adjusted inputs: T={T}, sigma={sigma}")
+            logger.debug("Using adjusted inputs: T=%s, sigma=%s", T, sigma)
 
             d1 = (np.log(S / K) + (self.rate + sigma**2 / 2) * T) / (sigma * np.sqrt(T))
             d2 = d1 - sigma * np.sqrt(T)
@@ -58,6 +71,7 @@ class OptionCalculator:
         try:
             self.validate_inputs(S, K, T, sigma)
             d1, _ = self._calculate_d1_d2(S, K, T, sigma)
+            norm = load_pricing_backend()
 
             if option_type == OptionType.CALL:
                 delta = float(norm.cdf(d1))
@@ -65,7 +79,7 @@ class OptionCalculator:
                 delta = float(norm.cdf(d1) - 1)
 
             logger.debug(
-                f"Delta calculated: {delta} for S={S}, K={K}, T={T}, sigma={sigma}"
+                "Delta calculated: %s for S=%s, K=%s, T=%s, sigma=%s", delta, S, K, T, sigma
             )
             return delta
 
@@ -77,6 +91,7 @@ class OptionCalculator:
         self, S: float, K: float, T: float, sigma: float, option_type: OptionType
     ) -> Dict[str, float]:
         """Calculate Greeks with proper validation and realistic values"""
+        started = time.perf_counter()
         try:
             self.validate_inputs(S, K, T, sigma)
 
@@ -88,6 +103,7 @@ class OptionCalculator:
             d2 = d1 - sigma * np.sqrt(T)
 
             # Common terms for efficiency
+            norm = load_pricing_backend()
             npd1 = norm.pdf(d1)
             sqrt_t = np.sqrt(T)
             exp_rt = np.exp(-self.rate * T)
@@ -125,13 +141,65 @@ class OptionCalculator:
                 ),
             }
 
-            logger.debug(f"Greeks calculated: {greeks}")
+            logger.debug("Greeks calculated: %s", greeks)
+            GREEKS_SECONDS.observe(time.perf_counter() - started, mode="scalar")
             return greeks
 
         except Exception as e:
             logger.error(f"Error calculating Greeks: {str(e)}")
             raise
 
+    def calculate_greeks_vectorized(
+        self,
+        S: np.ndarray,
+        K: np.ndarray,
+        T: np.ndarray,
+        sigma: np.ndarray,
+        is_call: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Per-unit Greeks for many options in one pass.
+
+        Same input clamping and units as calculate_greeks; rows with a
+        non-positive S or K come back as NaN instead of raising.
+        """
+        started = time.perf_counter()
+        S = np.asarray(S, dtype=float)
+        K = np.asarray(K, dtype=float)
+        T = np.maximum(np.asarray(T, dtype=float), 0.001)
+        sigma = np.clip(np.asarray(sigma, dtype=float), self.min_volatility, self.max_volatility)
+        is_call = np.asarray(is_call, dtype=bool)
+
+        valid = (S > 0) & (K > 0)
+        S = np.where(valid, S, np.nan)
+        K = np.where(valid, K, np.nan)
+
+        norm = load_pricing_backend()
+        sqrt_t = np.sqrt(T)
+        d1 = (np.log(S / K) + (self.rate + sigma**2 / 2) * T) / (sigma * sqrt_t)
+        d2 = d1 - sigma * sqrt_t
+        npd1 = norm.pdf(d1)
+        cdf_d1 = norm.cdf(d1)
+        cdf_d2 = norm.cdf(d2)
+        exp_rt = np.exp(-self.rate * T)
+
+        decay = -S * sigma * npd1 / (2 * sqrt_t)
+        greeks = {
+            "delta": np.where(is_call, cdf_d1, cdf_d1 - 1),
+            "gamma": npd1 / (S * sigma * sqrt_t),
+            "theta": np.where(
+                is_call,
+                decay - self.rate * K * exp_rt * cdf_d2,
+                decay + self.rate * K * exp_rt * (1 - cdf_d2),
+            )
+            / 365,
+            "vega": S * sqrt_t * npd1 / 100,
+            "rho": np.where(is_call, K * T * exp_rt * cdf_d2, -K * T * exp_rt * (1 - cdf_d2))
+            / 100,
+        }
+        GREEKS_SECONDS.observe(time.perf_counter() - started, mode="vectorized")
+        return greeks
+
     def calculate_hedge_size(
         self, delta: float, position_size: float, min_size: float, max_size: float
     ) -> float:
@@ -149,7 +217,8 @@ class OptionCalculator:
             hedge_size = max(min_size, min(max_size, hedge_size))
 
             logger.debug(
-                f"Calculated hedge size: {hedge_size} (delta={delta}, position_size={position_size})"
+                "Calculated hedge size: %s (delta=%s, position_size=%s)",
+                hedge_size, delta, position_size,
             )
             return float(hedge_size)
 
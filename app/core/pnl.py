@@ -0,0 +1,225 @@
+# app/core/pnl.py
+import logging
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.core.risk import book_sign
+from config.settings import PNL_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = ("delta", "gamma", "vega", "theta", "hedge", "slippage", "unexplained")
+UNEXPLAINED = COMPONENTS.index("unexplained")
+
+# Per-position observation columns kept from one tick to the next
+(
+    PRICE, VOLATILITY, DELTA, GAMMA, VEGA, THETA, QUANTITY, HEDGE, HEDGE_PRICE, SLIPPAGE,
+    UNDERLYING,
+) = range(11)
+STATE_COLUMNS = 11
+
+
+def _observe(entry: Dict) -> Optional[Tuple[float, ...]]:
+    """One position's inputs for this tick, or None when it was not priced"""
+    position = entry.get("position", {})
+    delta_info = entry.get("delta", {})
+    price = delta_info.get("current_price")
+    underlying_price = delta_info.get("underlying_price")
+    # Greeks are sensitivities to the underlying; without its price there is no move to attribute
+    if "error" in delta_info or not price or not underlying_price:
+        return None
+
+    greeks = delta_info.get("greeks", {})
+    hedge_size = position.get("hedge_size") or 0.0
+    hedge_price = position.get("last_hedge_price")
+    return (
+        float(price),
+        float(delta_info.get("volatility") or math.nan),
+        float(delta_info.get("delta") or 0.0),
+        float(greeks.get("gamma") or 0.0),
+        float(greeks.get("vega") or 0.0),
+        float(greeks.get("theta") or 0.0),
+        book_sign(position.get("direction"))
+        * float(position.get("size") or 0)
+        * float(position.get("contract_size") or 1),
+        book_sign(position.get("hedge_direction")) * float(hedge_size),
+        float(hedge_price) if hedge_price is not None else math.nan,
+        float(position.get("hedge_slippage") or 0.0),
+        float(underlying_price),
+    )
+
+
+def attribute(prev: np.ndarray, new: np.ndarray, dt_days: float) -> np.ndarray:
+    """
+    P&L over one tick per row, in COMPONENTS order, from the previous
+    tick's Greeks (Taylor expansion in the underlying's price, volatility
+    and time).
+
+    Hedge P&L is on the same underlying: the previous hedge marked to its
+    move plus any hedge traded since, marked from its trade price; slippage
+    is the change in the position's cumulative hedge slippage. Unexplained
+    is the option's mark-to-market change on its premium less the Greek
+    terms, so the components always sum to the actual P&L.
+    """
+    d_price = new[:, UNDERLYING] - prev[:, UNDERLYING]
+    quantity = prev[:, QUANTITY]
+
+    out = np.empty((len(new), len(COMPONENTS)))
+    out[:, 0] = quantity * prev[:, DELTA] * d_price
+    out[:, 1] = 0.5 * quantity * prev[:, GAMMA] * d_price**2
+    # vega is per vol point and theta per calendar day, as the calculator quotes them
+    out[:, 2] = quantity * prev[:, VEGA] * (new[:, VOLATILITY] - prev[:, VOLATILITY]) * 100
+    out[:, 3] = quantity * prev[:, THETA] * dt_days
+    out[:, 4] = prev[:, HEDGE] * (new[:, UNDERLYING] - prev[:, UNDERLYING]) + (
+        new[:, HEDGE] - prev[:, HEDGE]
+    ) * (new[:, UNDERLYING] - new[:, HEDGE_PRICE])
+    out[:, 5] = new[:, SLIPPAGE] - prev[:, SLIPPAGE]
+    np.nan_to_num(out[:, :UNEXPLAINED], copy=False)
+    option_pnl = np.nan_to_num(quantity * (new[:, PRICE] - prev[:, PRICE]))
+    out[:, UNEXPLAINED] = option_pnl - out[:, :4].sum(axis=1)
+    return out
+
+
+class PnLAttributor:
+    """
+    Incremental P&L attribution over the book.
+
+    Each published snapshot is one tick. Every position keeps the inputs and
+    Greeks of its previous tick in a row of a numpy array, so a tick costs
+    O(1) per position: read this tick's inputs from the snapshot entry, then
+    attribute the whole book in one vectorized pass against the previous
+    row and overwrite it. Nothing is repriced; the Greeks are the ones the
+    hedge cycle already computed.
+
+    Components accumulate per position for the current day and per day for
+    the book, for the last max_days days.
+    """
+
+    def __init__(
+        self,
+        max_days: int = PNL_SETTINGS["max_days"],
+        capacity: int = PNL_SETTINGS["initial_capacity"],
+    ):
+        self.max_days = max_days
+        self.ticks = 0
+        self.last_tick: Optional[datetime] = None
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._allocated = 0
+        self._state = np.full((capacity, STATE_COLUMNS), np.nan)
+        self._today = np.zeros((capacity, len(COMPONENTS)))
+        self._day: Optional[str] = None
+        self._days: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_snapshot(self, snapshot) -> None:
+        """SnapshotStore listener"""
+        self.update(snapshot.positions, snapshot.created_at)
+
+    def update(self, entries: Mapping[str, Dict], at: Optional[datetime] = None) -> None:
+        at = at or datetime.now()
+        with self._lock:
+            day = at.date().isoformat()
+            if day != self._day:
+                self._roll(day)
+            dt_days = (at - self.last_tick).total_seconds() / 86400 if self.last_tick else 0.0
+
+            for deal_id in set(self._slots) - set(entries):
+                self._release(deal_id)
+
+            slots: List[int] = []
+            rows: List[Tuple[float, ...]] = []
+            for deal_id, entry in entries.items():
+                row = _observe(entry)
+                if row is None:
+                    continue  # attributed over a longer step once it prices again
+                slot = self._slots.get(deal_id)
+                if slot is None:
+                    slot = self._allocate(deal_id)
+                slots.append(slot)
+                rows.append(row)
+
+            if rows:
+                index = np.fromiter(slots, int, len(slots))
+                new = np.array(rows, dtype=float)
+                prev = self._state[index]
+                pnl = attribute(prev, new, dt_days)
+                # First sighting only sets the baseline
+                pnl[np.isnan(prev[:, PRICE])] = 0.0
+                self._today[index] += pnl
+                self._days[day]["components"] += pnl.sum(axis=0)
+                self._state[index] = new
+
+            self._days[day]["ticks"] += 1
+            self.ticks += 1
+            self.last_tick = at
+
+    def _roll(self, day: str) -> None:
+        self._day = day
+        self._today[:] = 0.0
+        self._days[day] = {"components": np.zeros(len(COMPONENTS)), "ticks": 0}
+        while len(self._days) > self.max_days:
+            self._days.popitem(last=False)
+
+    def _allocate(self, deal_id: str) -> int:
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = self._allocated
+            self._allocated += 1
+            if slot >= len(self._state):
+                self._grow()
+        self._slots[deal_id] = slot
+        return slot
+
+    def _grow(self) -> None:
+        size = len(self._state) * 2
+        state = np.full((size, STATE_COLUMNS), np.nan)
+        state[: len(self._state)] = self._state
+        today = np.zeros((size, len(COMPONENTS)))
+        today[: len(self._today)] = self._today
+        self._state, self._today = state, today
+
+    def _release(self, deal_id: str) -> None:
+        slot = self._slots.pop(deal_id)
+        self._state[slot] = np.nan
+        self._today[slot] = 0.0
+        self._free.append(slot)
+
+    def report(self, deal_id: Optional[str] = None, limit: int = 50, days: Optional[int] = None) -> Dict:
+        """Today's attribution per position (largest total first) and the book per day"""
+        with self._lock:
+            if deal_id is not None and deal_id not in self._slots:
+                return {"error": "Position not tracked"}
+
+            deal_ids = [deal_id] if deal_id is not None else list(self._slots)
+            index = np.fromiter((self._slots[d] for d in deal_ids), int, len(deal_ids))
+            today = self._today[index]
+            order = np.argsort(-np.abs(today.sum(axis=1)), kind="stable")[:limit]
+            history = list(self._days.items())[::-1][:days]
+
+            return {
+                "day": self._day,
+                "ticks": self.ticks,
+                "last_tick": self.last_tick.isoformat() if self.last_tick else None,
+                "components": list(COMPONENTS),
+                "positions_tracked": len(self._slots),
+                "positions": [
+                    dict(_components(today[i]), deal_id=deal_ids[i]) for i in order
+                ],
+                "days": [
+                    dict(_components(d["components"]), date=date, ticks=d["ticks"])
+                    for date, d in history
+                ],
+            }
+
+
+def _components(values: np.ndarray) -> Dict:
+    row = {name: round(float(v), 6) for name, v in zip(COMPONENTS, values)}
+    row["total"] = round(float(values.sum()), 6)
+    return row
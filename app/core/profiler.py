@@ -0,0 +1,226 @@
+# app/core/profiler.py
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from types import FrameType
+from typing import Dict, List, Optional, Set
+
+from config.settings import PROFILER_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame: Optional[FrameType], thread_name: str, max_depth: int) -> str:
+    """Root-first, semicolon-joined stack as used by flamegraph.pl and speedscope"""
+    labels: List[str] = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame).replace(";", ":"))
+        frame = frame.f_back
+    labels.append(thread_name.replace(";", ":"))
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    def __init__(self, mode: str, limit: float, interval: float, output_dir: str):
+        self.id = f"{datetime.now():%Y%m%d-%H%M%S}-{mode}-{uuid.uuid4().hex[:6]}"
+        self.mode = mode  # seconds | requests | cycle
+        self.limit = limit
+        self.interval = interval
+        self.path = os.path.join(output_dir, f"{self.id}.folded")
+        self.state = "armed"  # armed | running | completed | failed
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def to_dict(self) -> Dict:
+        return {
+            "profile_id": self.id,
+            "mode": self.mode,
+            "limit": self.limit,
+            "interval": self.interval,
+            "state": self.state,
+            "failure": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "samples": self.samples,
+            "unique_stacks": len(self.stacks),
+            "path": self.path if self.state == "completed" else None,
+        }
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples Python stacks on a background thread.
+
+    A session samples every thread for N seconds, only the threads serving
+    the next K requests, or only the thread running the next hedge cycle,
+    and writes collapsed stacks to output_dir. While nothing is armed the
+    request and cycle hooks are a single attribute check and no sampler
+    thread exists.
+    """
+
+    def __init__(self, output_dir: str = PROFILER_SETTINGS["output_dir"]):
+        self.output_dir = output_dir
+        self._session: Optional[ProfileSession] = None
+        self._history: "OrderedDict[str, ProfileSession]" = OrderedDict()
+        self._targets: Set[int] = set()
+        self._requests_left = 0
+        self._cycle_armed = False
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # Control
+
+    def start(
+        self,
+        seconds: Optional[float] = None,
+        requests: Optional[int] = None,
+        cycle: bool = False,
+        interval: Optional[float] = None,
+    ) -> Dict:
+        """Arm one session; exactly one of seconds, requests or cycle"""
+        chosen = [m for m, v in (("seconds", seconds), ("requests", requests), ("cycle", cycle)) if v]
+        if len(chosen) != 1:
+            raise ValueError("Give exactly one of seconds, requests or cycle")
+        interval = float(interval or PROFILER_SETTINGS["interval"])
+        if not PROFILER_SETTINGS["min_interval"] <= interval <= 1.0:
+            raise ValueError(f"interval must be between {PROFILER_SETTINGS['min_interval']} and 1.0")
+        mode = chosen[0]
+        if mode == "seconds" and not 0 < float(seconds) <= PROFILER_SETTINGS["max_seconds"]:
+            raise ValueError(f"seconds must be between 0 and {PROFILER_SETTINGS['max_seconds']}")
+        if mode == "requests" and not 0 < int(requests) <= PROFILER_SETTINGS["max_requests"]:
+            raise ValueError(f"requests must be between 1 and {PROFILER_SETTINGS['max_requests']}")
+
+        with self._lock:
+            if self._session is not None:
+                raise ValueError(f"Profile {self._session.id} is already in progress")
+            os.makedirs(self.output_dir, exist_ok=True)
+            limit = float(seconds) if mode == "seconds" else (int(requests) if requests else 1)
+            session = ProfileSession(mode, limit, interval, self.output_dir)
+            self._session = session
+            self._history[session.id] = session
+            while len(self._history) > PROFILER_SETTINGS["max_history"]:
+                self._history.popitem(last=False)
+            self._targets = set()
+            self._stop.clear()
+            if mode == "requests":
+                self._requests_left = int(requests)
+            elif mode == "cycle":
+                self._cycle_armed = True
+
+        threading.Thread(
+            target=self._sample_loop, args=(session,), name="profiler", daemon=True
+        ).start()
+        logger.info("Profiler armed: %s", session.id)
+        return session.to_dict()
+
+    def stop(self) -> Optional[Dict]:
+        """End the current session early, keeping what was sampled"""
+        session = self._session
+        if session is None:
+            return None
+        self._stop.set()
+        return session.to_dict()
+
+    def get(self, profile_id: str) -> Dict:
+        session = self._history.get(profile_id)
+        if session is None:
+            return {"error": "Profile not found"}
+        return session.to_dict()
+
+    def list(self) -> Dict:
+        return {"profiles": [s.to_dict() for s in reversed(list(self._history.values()))]}
+
+    # Hooks; each is one attribute check while nothing is armed
+
+    def request_started(self) -> None:
+        if not self._requests_left:
+            return
+        with self._lock:
+            if len(self._targets) < self._requests_left:
+                self._targets.add(threading.get_ident())
+
+    def request_finished(self) -> None:
+        if not self._requests_left:
+            return
+        with self._lock:
+            ident = threading.get_ident()
+            if ident not in self._targets:
+                return
+            self._targets.discard(ident)
+            self._requests_left -= 1
+            if self._requests_left <= 0:
+                self._stop.set()
+
+    def cycle_started(self) -> None:
+        if not self._cycle_armed:
+            return
+        with self._lock:
+            if self._cycle_armed and not self._targets:
+                self._targets.add(threading.get_ident())
+
+    def cycle_finished(self) -> None:
+        if not self._cycle_armed:
+            return
+        with self._lock:
+            if threading.get_ident() in self._targets:
+                self._cycle_armed = False
+                self._targets.discard(threading.get_ident())
+                self._stop.set()
+
+    # Sampling
+
+    def _sample_loop(self, session: ProfileSession) -> None:
+        me = threading.get_ident()
+        max_depth = PROFILER_SETTINGS["max_depth"]
+        deadline = time.monotonic() + (
+            session.limit if session.mode == "seconds" else PROFILER_SETTINGS["max_seconds"]
+        )
+        session.started_at = datetime.now()
+        session.state = "running"
+        try:
+            while not self._stop.is_set() and time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                targets = None if session.mode == "seconds" else set(self._targets)
+                for ident, frame in sys._current_frames().items():
+                    if ident == me or (targets is not None and ident not in targets):
+                        continue
+                    session.stacks[collapse_stack(frame, names.get(ident, str(ident)), max_depth)] += 1
+                    session.samples += 1
+                self._stop.wait(session.interval)
+            self._write(session)
+            session.state = "completed"
+        except Exception as e:
+            logger.error(f"Profiler session {session.id} failed: {str(e)}")
+            session.state = "failed"
+            session.error = str(e)
+        finally:
+            session.finished_at = datetime.now()
+            with self._lock:
+                self._requests_left = 0
+                self._cycle_armed = False
+                self._targets = set()
+                self._session = None
+            logger.info("Profiler finished: %s (%d samples)", session.id, session.samples)
+
+    def _write(self, session: ProfileSession) -> None:
+        with open(session.path, "w") as f:
+            for stack, count in session.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+PROFILER = SamplingProfiler()
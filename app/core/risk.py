@@ -0,0 +1,199 @@
+# app/core/risk.py
+import logging
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.core.option_calculator import OptionCalculator
+from config.settings import RISK_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+GREEKS = ("delta", "gamma", "vega", "theta", "rho")
+BUCKET_DIMENSIONS = ("underlying", "expiry", "strike_band")
+
+
+def book_sign(direction: Optional[str]) -> float:
+    """+1 for long (BUY) exposure, -1 for short (SELL)"""
+    return -1.0 if str(direction).upper() == "SELL" else 1.0
+
+
+def signed_position_delta(entry: Dict) -> float:
+    """Size-weighted delta of one status entry, negative for short options"""
+    position_delta = entry.get("delta", {}).get("position_delta") or 0
+    return book_sign(entry.get("position", {}).get("direction")) * position_delta
+
+
+def parse_group_by(value: Optional[str]) -> Tuple[str, ...]:
+    """Comma-separated bucket dimensions; defaults to all of them"""
+    if not value:
+        return BUCKET_DIMENSIONS
+    dimensions = tuple(d.strip() for d in value.split(",") if d.strip())
+    unknown = [d for d in dimensions if d not in BUCKET_DIMENSIONS]
+    if unknown:
+        raise ValueError(
+            f"Unknown group_by {', '.join(unknown)}; use {', '.join(BUCKET_DIMENSIONS)}"
+        )
+    return dimensions
+
+
+class RiskAggregator:
+    """
+    Size-weighted Greeks for the whole book.
+
+    Every priced position in a snapshot goes through one vectorized
+    Black-Scholes pass at its underlying's spot, the same inputs the hedger
+    prices it with, then the signed exposures are summed per bucket of
+    underlying, expiry and strike band. Hedge legs are delta-one in their
+    underlying and are reported alongside the options so net delta is
+    what the desk actually carries.
+    """
+
+    def __init__(
+        self,
+        calculator: Optional[OptionCalculator] = None,
+        strike_band_width: float = RISK_SETTINGS["strike_band_width"],
+    ):
+        if strike_band_width <= 0:
+            raise ValueError("strike_band_width must be positive")
+        self.calculator = calculator or OptionCalculator()
+        self.strike_band_width = strike_band_width
+
+    def strike_band(self, strike: float) -> Tuple[float, float]:
+        low = math.floor(strike / self.strike_band_width) * self.strike_band_width
+        return low, low + self.strike_band_width
+
+    def aggregate(
+        self, entries: Mapping[str, Dict], group_by: Iterable[str] = BUCKET_DIMENSIONS
+    ) -> Dict:
+        group_by = tuple(group_by)
+        rows: List[Dict] = []
+        unpriced: List[str] = []
+        hedge_delta: Dict[str, float] = defaultdict(float)
+
+        for deal_id, entry in entries.items():
+            position = entry.get("position", {})
+            delta_info = entry.get("delta", {})
+            underlying = position.get("underlying_epic") or position.get("epic")
+
+            if position.get("hedge_size") and position.get("hedge_direction"):
+                hedge_delta[underlying] += (
+                    book_sign(position["hedge_direction"]) * position["hedge_size"]
+                )
+
+            market = _market(delta_info)
+            if market is None or not position.get("strike"):
+                unpriced.append(deal_id)
+                continue
+            rows.append(
+                {
+                    "underlying": underlying,
+                    "expiry": position.get("expiry") or "unknown",
+                    "strike": float(position["strike"]),
+                    "price": market[0],
+                    "time_to_expiry": float(position.get("time_to_expiry") or 0),
+                    "volatility": market[1],
+                    "is_call": position.get("option_type") != "PUT",
+                    "quantity": book_sign(position.get("direction"))
+                    * float(position.get("size") or 0)
+                    * float(position.get("contract_size") or 1),
+                }
+            )
+
+        exposures = self._exposures(rows)
+        buckets: Dict[Tuple, Dict] = {}
+        for i, row in enumerate(rows):
+            key = self._bucket_key(row, group_by)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = self._bucket(row, group_by)
+            bucket["positions"] += 1
+            bucket["quantity"] += row["quantity"]
+            for greek in GREEKS:
+                value = exposures[greek][i]
+                if not math.isnan(value):
+                    bucket[greek] += value
+
+        totals = {greek: sum(b[greek] for b in buckets.values()) for greek in GREEKS}
+        total_hedge_delta = sum(hedge_delta.values(), 0.0)
+        totals.update(
+            {
+                "option_delta": totals["delta"],
+                "hedge_delta": total_hedge_delta,
+                "net_delta": totals["delta"] + total_hedge_delta,
+            }
+        )
+
+        return {
+            "group_by": list(group_by),
+            "strike_band_width": self.strike_band_width,
+            "positions": len(entries),
+            "priced_positions": len(rows),
+            "unpriced_positions": unpriced,
+            "totals": _rounded(totals),
+            "buckets": [_rounded(buckets[key]) for key in sorted(buckets)],
+            "hedges": [
+                {"underlying": underlying, "delta": round(delta, 6)}
+                for underlying, delta in hedge_delta.items()
+            ],
+        }
+
+    def book_markets(self, entries: Mapping[str, Dict]) -> Dict[str, Tuple[float, float]]:
+        """(spot, volatility) per underlying as the book was priced, for what-if pricing"""
+        markets: Dict[str, Tuple[float, float]] = {}
+        for entry in entries.values():
+            position = entry.get("position", {})
+            underlying = position.get("underlying_epic") or position.get("epic")
+            market = _market(entry.get("delta", {}))
+            if market is not None and underlying not in markets:
+                markets[underlying] = market
+        return markets
+
+    def _exposures(self, rows: List[Dict]) -> Dict[str, np.ndarray]:
+        """Per-unit Greeks for all rows, scaled by signed quantity"""
+        if not rows:
+            return {greek: np.empty(0) for greek in GREEKS}
+        greeks = self.calculator.calculate_greeks_vectorized(
+            S=np.fromiter((r["price"] for r in rows), float, len(rows)),
+            K=np.fromiter((r["strike"] for r in rows), float, len(rows)),
+            T=np.fromiter((r["time_to_expiry"] for r in rows), float, len(rows)),
+            sigma=np.fromiter((r["volatility"] for r in rows), float, len(rows)),
+            is_call=np.fromiter((r["is_call"] for r in rows), bool, len(rows)),
+        )
+        quantity = np.fromiter((r["quantity"] for r in rows), float, len(rows))
+        return {greek: greeks[greek] * quantity for greek in GREEKS}
+
+    def _bucket_key(self, row: Dict, group_by: Tuple[str, ...]) -> Tuple:
+        key = []
+        for dimension in group_by:
+            if dimension == "strike_band":
+                key.append(self.strike_band(row["strike"]))
+            else:
+                key.append(row[dimension])
+        return tuple(key)
+
+    def _bucket(self, row: Dict, group_by: Tuple[str, ...]) -> Dict:
+        bucket: Dict = {}
+        if "underlying" in group_by:
+            bucket["underlying"] = row["underlying"]
+        if "expiry" in group_by:
+            bucket["expiry"] = row["expiry"]
+        if "strike_band" in group_by:
+            bucket["strike_band"] = list(self.strike_band(row["strike"]))
+        bucket.update({"positions": 0, "quantity": 0.0})
+        bucket.update({greek: 0.0 for greek in GREEKS})
+        return bucket
+
+
+def _market(delta_info: Dict) -> Optional[Tuple[float, float]]:
+    """(underlying spot, volatility) a status entry was priced at, or None if unpriced"""
+    spot = delta_info.get("underlying_price")
+    if "error" in delta_info or not spot:
+        return None
+    return float(spot), float(delta_info.get("volatility") or RISK_SETTINGS["default_volatility"])
+
+
+def _rounded(values: Dict) -> Dict:
+    return {k: round(v, 6) if isinstance(v, float) else v for k, v in values.items()}
@@ -0,0 +1,236 @@
+# app/core/snapshot.py
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from config.settings import SNAPSHOT_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Fields that change on every rebuild without the position itself changing
+VOLATILE_POSITION_FIELDS = ("created_at", "last_update")
+
+
+def _fingerprint(entry: Dict) -> str:
+    position = entry.get("position")
+    if isinstance(position, dict):
+        entry = dict(entry)
+        entry["position"] = {
+            k: v for k, v in position.items() if k not in VOLATILE_POSITION_FIELDS
+        }
+    return json.dumps(entry, sort_keys=True, default=str)
+
+
+class PortfolioSnapshot:
+    """
+    Immutable view of the book published after a hedge cycle.
+
+    positions maps deal id to the status entry produced by
+    DeltaHedger.get_all_positions_status; position_versions records the
+    snapshot version in which each entry last changed, and change_log the
+    deal ids changed in each recent version, newest last.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        positions: Dict[str, Dict],
+        position_versions: Dict[str, int],
+        removed: Dict[str, int],
+        monitoring: Dict,
+        change_log: Sequence[Tuple[int, Sequence[str]]] = (),
+    ):
+        self.version = version
+        self.created_at = datetime.now()
+        self.created_monotonic = time.monotonic()
+        self.positions: Mapping[str, Dict] = MappingProxyType(positions)
+        self.position_versions: Mapping[str, int] = MappingProxyType(position_versions)
+        self.removed: Mapping[str, int] = MappingProxyType(removed)
+        self.monitoring = monitoring
+        self.change_log = change_log
+        # Versions start from the publishing process's epoch, so this is unique across restarts
+        self.etag = f"v{version}"
+        self._rendered: Dict[str, str] = {}
+        self._render_lock = threading.Lock()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_monotonic
+
+    def changes_since(self, version: int) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        Entries changed and deal ids removed after the given version, walking
+        only the change log entries newer than it. The caller checks the
+        version against the store's horizon, below which the log is trimmed.
+        """
+        changed: Dict[str, Dict] = {}
+        for changed_in, deal_ids in reversed(self.change_log):
+            if changed_in <= version:
+                break
+            for deal_id in deal_ids:
+                if deal_id not in changed and deal_id in self.positions:
+                    changed[deal_id] = self.positions[deal_id]
+        removed = [deal_id for deal_id, removed_in in self.removed.items() if removed_in > version]
+        return changed, removed
+
+    def change_set(self, since: int) -> Dict:
+        """Event payload with the positions changed after `since`"""
+        changed, removed = self.changes_since(since)
+        return {
+            "version": self.version,
+            "since": since,
+            "changed": changed,
+            "removed": removed,
+            "summary": {
+                "total_positions": len(self.positions),
+                "positions_needing_hedge": sum(
+                    1 for p in self.positions.values() if p.get("needs_hedge")
+                ),
+                "last_update": self.created_at.isoformat(),
+            },
+            "monitoring": self.monitoring,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "created_at": self.created_at.isoformat(),
+            "created_monotonic": self.created_monotonic,
+            "positions": dict(self.positions),
+            "position_versions": dict(self.position_versions),
+            "removed": dict(self.removed),
+            "monitoring": self.monitoring,
+            "change_log": [[changed_in, list(deal_ids)] for changed_in, deal_ids in self.change_log],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PortfolioSnapshot":
+        """Rebuild a snapshot published by another process on this host"""
+        snapshot = cls(
+            version=data["version"],
+            positions=data["positions"],
+            position_versions=data["position_versions"],
+            removed=data["removed"],
+            monitoring=data["monitoring"],
+            change_log=[(changed_in, deal_ids) for changed_in, deal_ids in data.get("change_log", ())],
+        )
+        snapshot.created_at = datetime.fromisoformat(data["created_at"])
+        # CLOCK_MONOTONIC is host-wide, so ages stay comparable across processes
+        snapshot.created_monotonic = data["created_monotonic"]
+        return snapshot
+
+    def render(self, key: str, builder: Callable[["PortfolioSnapshot"], Dict]) -> str:
+        """Serialize a response body once per snapshot and reuse it"""
+        body = self._rendered.get(key)
+        if body is None:
+            with self._render_lock:
+                body = self._rendered.get(key)
+                if body is None:
+                    body = json.dumps(builder(self), default=str)
+                    self._rendered[key] = body
+        return body
+
+
+class SnapshotStore:
+    """
+    Publishes versioned PortfolioSnapshots and tracks per-position changes.
+
+    Versions continue from an epoch taken when the store is created
+    (milliseconds since 1970), so a version or ETag a client kept from an
+    earlier process is always older than this process's horizon and gets a
+    full response instead of a wrong incremental one.
+    """
+
+    def __init__(
+        self,
+        max_tombstones: int = SNAPSHOT_SETTINGS["max_tombstones"],
+        max_change_log: int = SNAPSHOT_SETTINGS["max_change_log"],
+    ):
+        self.max_tombstones = max_tombstones
+        self.max_change_log = max_change_log
+        self.epoch = int(time.time() * 1000)
+        self._current: Optional[PortfolioSnapshot] = None
+        self._fingerprints: Dict[str, str] = {}
+        self._removed: "OrderedDict[str, int]" = OrderedDict()
+        self._change_log: "OrderedDict[int, Tuple[str, ...]]" = OrderedDict()
+        self._change_log_size = 0
+        # Oldest version a ?since= request can be answered from incrementally
+        self.horizon = self.epoch
+        # Set when state changed outside a cycle, e.g. a manual hedge
+        self.invalidated = False
+        self._listeners: List[Callable[[PortfolioSnapshot], None]] = []
+        self._condition = threading.Condition()
+
+    def current(self) -> Optional[PortfolioSnapshot]:
+        return self._current
+
+    def invalidate(self) -> None:
+        self.invalidated = True
+
+    def add_listener(self, callback: Callable[[PortfolioSnapshot], None]) -> None:
+        """Call back with every published snapshot, e.g. to mirror it elsewhere"""
+        self._listeners.append(callback)
+
+    def publish(self, positions_status: Dict[str, Dict], monitoring: Dict) -> PortfolioSnapshot:
+        with self._condition:
+            previous = self._current
+            version = (previous.version if previous else self.epoch) + 1
+            versions = dict(previous.position_versions) if previous else {}
+
+            fingerprints = {}
+            changed: List[str] = []
+            for deal_id, entry in positions_status.items():
+                fingerprint = _fingerprint(entry)
+                fingerprints[deal_id] = fingerprint
+                if self._fingerprints.get(deal_id) != fingerprint:
+                    versions[deal_id] = version
+                    changed.append(deal_id)
+                self._removed.pop(deal_id, None)
+
+            for deal_id in set(versions) - set(positions_status):
+                versions.pop(deal_id)
+                self._removed[deal_id] = version
+            while len(self._removed) > self.max_tombstones:
+                _, dropped_in = self._removed.popitem(last=False)
+                self.horizon = max(self.horizon, dropped_in)
+
+            self._change_log[version] = tuple(changed)
+            self._change_log_size += len(changed)
+            while self._change_log_size > self.max_change_log and len(self._change_log) > 1:
+                dropped_in, dropped = self._change_log.popitem(last=False)
+                self._change_log_size -= len(dropped)
+                self.horizon = max(self.horizon, dropped_in)
+
+            self._fingerprints = fingerprints
+            snapshot = PortfolioSnapshot(
+                version=version,
+                positions=dict(positions_status),
+                position_versions=versions,
+                removed=dict(self._removed),
+                monitoring=monitoring,
+                change_log=tuple(self._change_log.items()),
+            )
+            self._current = snapshot
+            self.invalidated = False
+            self._condition.notify_all()
+
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"Snapshot listener failed: {str(e)}")
+        return snapshot
+
+    def wait_for_newer(self, version: int, timeout: float) -> Optional[PortfolioSnapshot]:
+        """Block until a snapshot newer than version is published, or time out"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._current is not None and self._current.version > version,
+                timeout=timeout,
+            )
+            return self._current
@@ -0,0 +1,278 @@
+# app/core/tracing.py
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import TRACING_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Innermost open span of the current thread (or asyncio task)
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+
+class Trace:
+    def __init__(self, max_spans: int):
+        self.id = uuid.uuid4().hex[:16]
+        self.spans: List["Span"] = []
+        self.max_spans = max_spans
+        self.opened = 0
+        self.dropped = 0
+        self.root: Optional["Span"] = None
+        self._lock = threading.Lock()
+
+    def admit(self) -> Optional[int]:
+        """Next span id, or None once the trace is full"""
+        with self._lock:
+            if self.opened >= self.max_spans:
+                self.dropped += 1
+                return None
+            self.opened += 1
+            return self.opened
+
+    def summary(self) -> Dict:
+        root = self.root
+        slowest = _breakdown(self.spans)[:1]
+        return {
+            "trace_id": self.id,
+            "name": root.name,
+            "started_at": datetime.fromtimestamp(root.start_time).isoformat(),
+            "duration_ms": round(root.duration * 1000, 3),
+            "status": root.status,
+            "attributes": root.attributes,
+            "span_count": len(self.spans),
+            "dropped_spans": self.dropped,
+            "slowest": slowest[0]["name"] if slowest else None,
+        }
+
+
+class Span:
+    __slots__ = (
+        "tracer", "trace", "name", "span_id", "parent_id", "attributes",
+        "status", "message", "start_time", "duration", "_started", "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", trace: Trace, name: str, span_id: int,
+                 parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.trace = trace
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = "ok"
+        self.message: Optional[str] = None
+        self.start_time = 0.0
+        self.duration = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: Any) -> None:
+        self.status = "error"
+        self.message = str(message)
+
+    def __enter__(self) -> "Span":
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self._started
+        if exc is not None:
+            self.set_error(f"{exc_type.__name__}: {exc}")
+        _current.reset(self._token)
+        self.trace.spans.append(self)
+        if self.parent_id is None:
+            self.tracer._finish(self.trace)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace.id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.start_time).isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "message": self.message,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in when tracing is off or a trace hit max_spans"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, message: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _breakdown(spans: List[Span]) -> List[Dict]:
+    """Time per span name, slowest self time first"""
+    child_time: Dict[int, float] = defaultdict(float)
+    for span in spans:
+        if span.parent_id is not None:
+            child_time[span.parent_id] += span.duration
+
+    rows: Dict[str, Dict] = {}
+    for span in spans:
+        row = rows.setdefault(
+            span.name,
+            {"name": span.name, "count": 0, "errors": 0, "total_ms": 0.0, "self_ms": 0.0, "max_ms": 0.0},
+        )
+        row["count"] += 1
+        row["errors"] += span.status == "error"
+        row["total_ms"] += span.duration * 1000
+        row["self_ms"] += max(span.duration - child_time[span.span_id], 0.0) * 1000
+        row["max_ms"] = max(row["max_ms"], span.duration * 1000)
+
+    for row in rows.values():
+        for key in ("total_ms", "self_ms", "max_ms"):
+            row[key] = round(row[key], 3)
+    return sorted(rows.values(), key=lambda r: r["self_ms"], reverse=True)
+
+
+class Tracer:
+    """
+    In-process tracing for hedge cycles and the calls inside them.
+
+    A span opened with no span around it starts a trace; spans opened inside
+    it, on the same thread, become its children. Finished traces are kept in
+    a ring of max_traces per root span name, so API-driven traces never push
+    out hedge cycles, and when export_path is set they are appended to it as
+    one JSON line per span.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = TRACING_SETTINGS["enabled"],
+        max_traces: int = TRACING_SETTINGS["max_traces"],
+        max_spans: int = TRACING_SETTINGS["max_spans"],
+        export_path: Optional[str] = TRACING_SETTINGS["export_path"],
+    ):
+        self.enabled = enabled
+        self.max_traces = max_traces
+        self.max_spans = max_spans
+        self.export_path = export_path
+        self._traces: Dict[str, "OrderedDict[str, Trace]"] = defaultdict(OrderedDict)
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+
+    def span(self, name: str, **attributes: Any):
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current.get()
+        if parent is None:
+            trace = Trace(self.max_spans)
+            span_id = trace.admit()
+            span = Span(self, trace, name, span_id, None, attributes)  # type: ignore
+            trace.root = span
+            return span
+        span_id = parent.trace.admit()
+        if span_id is None:
+            return NOOP_SPAN
+        return Span(self, parent.trace, name, span_id, parent.span_id, attributes)
+
+    def current_span(self):
+        return _current.get() or NOOP_SPAN
+
+    def traced(
+        self, name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None
+    ) -> Callable:
+        """
+        Run the decorated function in a span. attributes(*args, **kwargs)
+        supplies span attributes; a returned dict with an "error" key marks
+        the span as failed, matching how this codebase reports errors.
+        """
+
+        def decorator(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                attrs = {}
+                if attributes is not None:
+                    try:
+                        attrs = attributes(*args, **kwargs)
+                    except Exception:
+                        pass  # attributes are best effort; never fail the call
+                with self.span(name, **attrs) as span:
+                    result = fn(*args, **kwargs)
+                    if isinstance(result, dict) and "error" in result:
+                        span.set_error(result["error"])
+                    return result
+
+            return wrapper
+
+        return decorator
+
+    def _finish(self, trace: Trace) -> None:
+        with self._lock:
+            ring = self._traces[trace.root.name]
+            ring[trace.id] = trace
+            while len(ring) > self.max_traces:
+                ring.popitem(last=False)
+        if self.export_path:
+            self._export(trace)
+
+    def _export(self, trace: Trace) -> None:
+        try:
+            directory = os.path.dirname(self.export_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in trace.spans)
+            with self._export_lock, open(self.export_path, "a") as f:
+                f.write(lines)
+        except Exception as e:
+            logger.error(f"Error exporting trace {trace.id}: {str(e)}")
+
+    # Viewer
+
+    def list(self, name: Optional[str] = None, limit: int = 50) -> Dict:
+        with self._lock:
+            rings = [self._traces.get(name, {})] if name else list(self._traces.values())
+            traces = [t for ring in rings for t in ring.values()]
+        traces.sort(key=lambda t: t.root.start_time, reverse=True)
+        return {"enabled": self.enabled, "traces": [t.summary() for t in traces[:limit]]}
+
+    def get(self, trace_id: str, spans: bool = False, slowest: int = 20) -> Dict:
+        with self._lock:
+            trace = next((r[trace_id] for r in self._traces.values() if trace_id in r), None)
+        if trace is None:
+            return {"error": "Trace not found"}
+        children = [s for s in trace.spans if s.parent_id is not None]
+        children.sort(key=lambda s: s.duration, reverse=True)
+        result = trace.summary()
+        result["breakdown"] = _breakdown(trace.spans)
+        result["slowest_spans"] = [s.to_dict() for s in children[:slowest]]
+        if spans:
+            ordered = sorted(trace.spans, key=lambda s: (s.start_time, s.span_id))
+            result["spans"] = [s.to_dict() for s in ordered]
+        return result
+
+
+TRACER = Tracer(
+    enabled=os.getenv("TRACING_ENABLED", str(TRACING_SETTINGS["enabled"])).lower() == "true",
+    export_path=os.getenv("TRACE_EXPORT_PATH", TRACING_SETTINGS["export_path"] or "") or None,
+)
@@ -0,0 +1,218 @@
+# app/core/volatility.py
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from config.settings import VOLATILITY_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+VOLATILITY_SOURCES = ("market", "ewma", "rolling", "parkinson", "garman_klass")
+
+_PARKINSON_FACTOR = 1.0 / (4.0 * math.log(2.0))
+_GK_CLOSE_FACTOR = 2.0 * math.log(2.0) - 1.0
+
+
+class EWMAVolatility:
+    """Time-weighted EWMA of squared log returns per unit time"""
+
+    def __init__(self, halflife: float):
+        self.tau = halflife / math.log(2.0)
+        self.variance_rate: Optional[float] = None  # variance per second
+        self.samples = 0
+
+    def update(self, log_return: float, dt: float) -> None:
+        if dt <= 0:
+            return
+        rate = log_return * log_return / dt
+        if self.variance_rate is None:
+            self.variance_rate = rate
+        else:
+            decay = math.exp(-dt / self.tau)
+            self.variance_rate = decay * self.variance_rate + (1 - decay) * rate
+        self.samples += 1
+
+    def value(self) -> Optional[float]:
+        if self.variance_rate is None:
+            return None
+        return math.sqrt(self.variance_rate * SECONDS_PER_YEAR)
+
+
+class RollingVolatility:
+    """Realized variance over the last `window` returns via running sums"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._returns: deque = deque()
+        self._sum_sq = 0.0
+        self._sum_dt = 0.0
+
+    @property
+    def samples(self) -> int:
+        return len(self._returns)
+
+    def update(self, log_return: float, dt: float) -> None:
+        if dt <= 0:
+            return
+        self._returns.append((log_return * log_return, dt))
+        self._sum_sq += log_return * log_return
+        self._sum_dt += dt
+        if len(self._returns) > self.window:
+            old_sq, old_dt = self._returns.popleft()
+            self._sum_sq -= old_sq
+            self._sum_dt -= old_dt
+
+    def value(self) -> Optional[float]:
+        if self._sum_dt <= 0:
+            return None
+        return math.sqrt(max(self._sum_sq, 0.0) / self._sum_dt * SECONDS_PER_YEAR)
+
+
+class RangeVolatility:
+    """
+    Rolling range-based estimator over OHLC bars.
+
+    method="parkinson" uses high/low only; method="garman_klass" also uses
+    open/close. Each bar contributes one term, kept in a running sum.
+    """
+
+    def __init__(self, window: int, method: str = "parkinson"):
+        if method not in ("parkinson", "garman_klass"):
+            raise ValueError(f"Unknown range estimator: {method}")
+        self.window = window
+        self.method = method
+        self._terms: deque = deque()
+        self._sum_terms = 0.0
+        self._sum_dt = 0.0
+
+    @property
+    def samples(self) -> int:
+        return len(self._terms)
+
+    def update_bar(
+        self, open_: float, high: float, low: float, close: float, duration: float
+    ) -> None:
+        if min(open_, high, low, close) <= 0 or duration <= 0:
+            return
+        hl = math.log(high / low)
+        if self.method == "parkinson":
+            term = _PARKINSON_FACTOR * hl * hl
+        else:
+            co = math.log(close / open_)
+            term = 0.5 * hl * hl - _GK_CLOSE_FACTOR * co * co
+
+        self._terms.append((term, duration))
+        self._sum_terms += term
+        self._sum_dt += duration
+        if len(self._terms) > self.window:
+            old_term, old_dt = self._terms.popleft()
+            self._sum_terms -= old_term
+            self._sum_dt -= old_dt
+
+    def value(self) -> Optional[float]:
+        if self._sum_dt <= 0:
+            return None
+        return math.sqrt(max(self._sum_terms, 0.0) / self._sum_dt * SECONDS_PER_YEAR)
+
+
+class _UnderlyingState:
+    def __init__(self, settings: Dict):
+        self.ewma = EWMAVolatility(settings["ewma_halflife"])
+        self.rolling = RollingVolatility(settings["rolling_window"])
+        self.parkinson = RangeVolatility(settings["range_window"], "parkinson")
+        self.garman_klass = RangeVolatility(settings["range_window"], "garman_klass")
+        self.last_price: Optional[float] = None
+        self.last_time: Optional[float] = None
+        self.bar: Optional[Dict] = None
+
+
+class RealizedVolatilityTracker:
+    """Per-epic realized volatility estimators fed tick by tick"""
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = dict(VOLATILITY_SETTINGS, **(settings or {}))
+        self.bar_seconds = float(self.settings["bar_seconds"])
+        self.min_samples = int(self.settings["min_samples"])
+        self._states: Dict[str, _UnderlyingState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, epic: str) -> _UnderlyingState:
+        state = self._states.get(epic)
+        if state is None:
+            state = _UnderlyingState(self.settings)
+            self._states[epic] = state
+        return state
+
+    def update(self, epic: str, price: float, timestamp: Optional[float] = None) -> None:
+        """Feed one observed price; O(1) per call"""
+        if not price or price <= 0:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+
+        with self._lock:
+            state = self._state(epic)
+            if state.last_price is not None and timestamp > state.last_time:
+                log_return = math.log(price / state.last_price)
+                dt = timestamp - state.last_time
+                state.ewma.update(log_return, dt)
+                state.rolling.update(log_return, dt)
+            if state.last_time is None or timestamp > state.last_time:
+                state.last_price = price
+                state.last_time = timestamp
+            self._update_bar(state, price, timestamp)
+
+    def _update_bar(self, state: _UnderlyingState, price: float, timestamp: float) -> None:
+        bar_start = timestamp - timestamp % self.bar_seconds
+        bar = state.bar
+        if bar is not None and bar_start > bar["start"]:
+            self._close_bar(state, bar)
+            bar = None
+        if bar is None:
+            state.bar = {"start": bar_start, "open": price, "high": price, "low": price, "close": price}
+        else:
+            bar["high"] = max(bar["high"], price)
+            bar["low"] = min(bar["low"], price)
+            bar["close"] = price
+
+    def _close_bar(self, state: _UnderlyingState, bar: Dict) -> None:
+        for estimator in (state.parkinson, state.garman_klass):
+            estimator.update_bar(
+                bar["open"], bar["high"], bar["low"], bar["close"], self.bar_seconds
+            )
+
+    def add_bar(
+        self,
+        epic: str,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        duration: float,
+    ) -> None:
+        """Feed a completed OHLC bar, e.g. from the historical price store"""
+        with self._lock:
+            state = self._state(epic)
+            state.parkinson.update_bar(open_, high, low, close, duration)
+            state.garman_klass.update_bar(open_, high, low, close, duration)
+
+    def estimate(self, epic: str, source: str) -> Optional[float]:
+        """Annualized sigma for an epic, or None until enough samples are seen"""
+        if source not in VOLATILITY_SOURCES or source == "market":
+            return None
+        with self._lock:
+            state = self._states.get(epic)
+            if state is None:
+                return None
+            estimator = getattr(state, source)
+            min_samples = self.min_samples if source in ("ewma", "rolling") else 2
+            if estimator.samples < min_samples:
+                return None
+            return estimator.value()
+
+    def snapshot(self, epic: str) -> Dict:
+        """All current estimates for an epic"""
+        return {source: self.estimate(epic, source) for source in VOLATILITY_SOURCES[1:]}
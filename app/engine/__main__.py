@@ -0,0 +1,8 @@
+# app/engine/__main__.py
+from config.logging_config import configure_logging
+
+configure_logging()
+
+from app.engine.engine import run_engine  # noqa: E402
+
+run_engine()
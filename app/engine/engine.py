@@ -0,0 +1,217 @@
+# app/engine/engine.py
+import logging
+import os
+import signal
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.delta_hedger import DeltaHedger
+from app.core.hedge_state import HedgeStateStore
+from app.core.metrics import REGISTRY
+from app.core.profiler import PROFILER
+from app.core.snapshot import PortfolioSnapshot
+from app.core.tracing import TRACER
+from app.engine.ipc import CommandServer, parse_address
+from app.engine.shared_state import SharedStateWriter
+from app.engine.supervisor import PartitionedHedger, PartitionSupervisor
+from app.services.ig_client import IGAPIError, IGClient
+from app.services.price_history import PriceHistoryStore
+from app.services.price_stream import PriceStreamClient
+from config.settings import ENGINE_SETTINGS, STREAM_SETTINGS, SUPERVISOR_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Everything API workers may invoke remotely, per engine component
+ENGINE_COMMANDS = {
+    "hedger": {
+        "attach_viewer",
+        "calculate_position_delta",
+        "calculate_position_metrics",
+        "cancel_job",
+        "detach_viewer",
+        "get_all_positions_status",
+        "get_current_settings",
+        "get_job",
+        "get_market_data",
+        "get_monitoring_status",
+        "get_position",
+        "get_position_entries",
+        "get_position_status",
+        "get_volatility",
+        "hedge_position",
+        "list_jobs",
+        "price_entries",
+        "price_stream_status",
+        "refresh_snapshot",
+        "start_monitoring",
+        "stop_monitoring",
+        "submit_hedge_all",
+        "validate_settings",
+        "wait_job",
+    },
+    "ig_client": {"get_cache_stats"},
+    "vol_tracker": {"snapshot"},
+    "price_history": {"get_bars"},
+    "metrics": {"render"},
+    "profiler": {"get", "list", "start", "stop"},
+    "tracer": {"get", "list"},
+    "state_store": {"history", "stats"},
+    "pnl": {"report"},
+}
+
+# Engine commands served by a part of the hedger rather than the engine itself
+HEDGER_COMPONENTS = ("vol_tracker", "pnl")
+
+
+def engine_authkey() -> bytes:
+    authkey = os.getenv("ENGINE_AUTHKEY")
+    if not authkey:
+        raise RuntimeError("ENGINE_AUTHKEY must be set for the engine and its API workers")
+    return authkey.encode()
+
+
+class HedgingEngine:
+    """
+    Sole owner of IGClient and DeltaHedger in multi-process deployments.
+
+    Publishes every portfolio snapshot to shared memory for API workers and
+    executes the commands they forward over the local command socket, so
+    logins and hedges happen exactly once however many workers serve reads.
+    With workers > 1 the book itself is partitioned across hedger processes
+    (see app.engine.supervisor) whose results the engine merges.
+    """
+
+    def __init__(
+        self,
+        address: Optional[str] = None,
+        shm_name: Optional[str] = None,
+        shm_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        partition_by: Optional[str] = None,
+    ):
+        self.address = parse_address(
+            address or os.getenv("ENGINE_ADDRESS", ENGINE_SETTINGS["address"])
+        )
+        self.shm_name = shm_name or os.getenv("ENGINE_SHM_NAME", ENGINE_SETTINGS["shm_name"])
+        self.shm_size = shm_size or int(os.getenv("ENGINE_SHM_SIZE", ENGINE_SETTINGS["shm_size"]))
+        self.workers = workers or int(os.getenv("ENGINE_WORKERS", SUPERVISOR_SETTINGS["workers"]))
+        self.partition_by = partition_by or os.getenv(
+            "ENGINE_PARTITION_BY", SUPERVISOR_SETTINGS["partition_by"]
+        )
+
+        self.ig_client: Optional[IGClient] = None
+        self.price_stream: Optional[PriceStreamClient] = None
+        self.hedger: Optional[DeltaHedger] = None
+        self.supervisor: Optional[PartitionSupervisor] = None
+        self.state_store: Optional[HedgeStateStore] = None
+        self.price_history: Optional[PriceHistoryStore] = None
+        self.state: Optional[SharedStateWriter] = None
+        self.server: Optional[CommandServer] = None
+        self.metrics = REGISTRY
+        self.profiler = PROFILER
+        self.tracer = TRACER
+        self._state_lock = threading.Lock()
+        self.publish_errors = 0
+        self.last_publish_error: Optional[str] = None
+
+    def start(self) -> None:
+        self.ig_client = IGClient(
+            api_key=os.getenv("IG_API_KEY"),
+            username=os.getenv("IG_USERNAME"),
+            password=os.getenv("IG_PASSWORD"),
+        )
+        if not self.ig_client.login():
+            raise IGAPIError("Failed to login to IG API")
+        self.ig_client.start_token_refresher()
+
+        if os.getenv("IG_STREAMING", str(STREAM_SETTINGS["enabled"])).lower() == "true":
+            self.price_stream = PriceStreamClient(self.ig_client)
+            self.price_stream.start()
+
+        # Partition workers persist their own positions; the engine's store then only serves queries
+        self.state_store = HedgeStateStore.from_env()
+        if self.workers > 1:
+            self.supervisor = PartitionSupervisor(self.workers, self.partition_by).start()
+            self.hedger = PartitionedHedger(
+                self.ig_client, self.supervisor, price_stream=self.price_stream
+            )
+        else:
+            self.hedger = DeltaHedger(
+                self.ig_client, price_stream=self.price_stream, state_store=self.state_store
+            )
+        self.price_history = PriceHistoryStore(self.ig_client.get_historical_prices)
+
+        self.state = SharedStateWriter(self.shm_name, self.shm_size)
+        self.hedger.snapshots.add_listener(self._publish)
+        self.hedger.add_monitoring_listener(self._publish_monitoring)
+        self.server = CommandServer(self.address, engine_authkey(), self.handle)
+        logger.info("Engine started; shared state in %s", self.state.name)
+
+    def _publish(self, snapshot: PortfolioSnapshot) -> None:
+        with self._state_lock:
+            try:
+                self.state.write_snapshot(snapshot, self.hedger.snapshots.horizon)
+            except ValueError as e:
+                # Workers keep the previous snapshot; the flag makes their /api/ready report it
+                self.publish_errors += 1
+                self.last_publish_error = str(e)
+                self.state.set_publish_failed(True)
+                logger.error(f"Failed to publish snapshot {snapshot.version}: {str(e)}")
+                return
+            self.state.set_publish_failed(False)
+
+    def _publish_monitoring(self, active: bool) -> None:
+        with self._state_lock:
+            self.state.set_monitoring(active)
+
+    def handle(self, target: str, method: str, args: tuple, kwargs: Dict) -> Any:
+        if method not in ENGINE_COMMANDS.get(target, ()):
+            raise ValueError(f"Unknown engine command {target}.{method}")
+
+        component = (
+            getattr(self.hedger, target) if target in HEDGER_COMPONENTS else getattr(self, target)
+        )
+        if component is None:
+            raise RuntimeError(f"Engine component {target} is not running")
+        result = getattr(component, method)(*args, **kwargs)
+
+        if isinstance(result, PortfolioSnapshot):
+            # Workers read the snapshot itself from shared memory
+            return result.version
+        return result
+
+    def serve_forever(self) -> None:
+        self.server.serve_forever()
+
+    def stop(self) -> None:
+        if self.server:
+            self.server.close()
+        if self.hedger:
+            self.hedger.stop_monitoring()
+        if self.supervisor:
+            self.supervisor.stop()
+        if self.state_store:
+            self.state_store.close()
+        if self.price_stream:
+            self.price_stream.stop()
+        if self.ig_client and self.ig_client.token_refresher:
+            self.ig_client.token_refresher.stop()
+        if self.state:
+            self.state.close()
+
+
+def run_engine() -> None:
+    """Entry point for `python -m app.engine`"""
+    engine = HedgingEngine()
+    engine.start()
+
+    def shutdown(signum, frame):
+        logger.info("Engine shutting down")
+        engine.server.close()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    try:
+        engine.serve_forever()
+    finally:
+        engine.stop()
@@ -0,0 +1,125 @@
+# app/engine/ipc.py
+import logging
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+Address = Union[str, Tuple[str, int]]
+
+
+class EngineError(Exception):
+    """A command forwarded to the engine failed or the engine is unreachable"""
+
+
+def parse_address(address: str) -> Address:
+    """'host:port' for TCP on loopback, anything else is a unix socket path"""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+class CommandServer:
+    """Accepts worker connections and answers (target, method, args, kwargs) requests"""
+
+    def __init__(
+        self,
+        address: Address,
+        authkey: bytes,
+        handler: Callable[[str, str, tuple, dict], Any],
+    ):
+        self.listener = Listener(address, authkey=authkey)
+        self.handler = handler
+        self._running = False
+
+    def serve_forever(self) -> None:
+        self._running = True
+        logger.info("Engine listening on %s", self.listener.address)
+        while self._running:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                if self._running:
+                    logger.exception("Engine listener failed")
+                break
+            except Exception as e:
+                # Failed handshakes (bad authkey) must not stop the engine
+                logger.warning(f"Rejected engine connection: {str(e)}")
+                continue
+            threading.Thread(
+                target=self._serve_connection, args=(conn,), name="engine-conn", daemon=True
+            ).start()
+
+    def _serve_connection(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    target, method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ("ok", self.handler(target, method, args, kwargs))
+                except Exception as e:
+                    logger.error(f"Engine command {target}.{method} failed: {str(e)}")
+                    reply = ("error", f"{type(e).__name__}: {str(e)}")
+                try:
+                    conn.send(reply)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to reply to engine client: {str(e)}")
+                    return
+
+    def close(self) -> None:
+        self._running = False
+        self.listener.close()
+
+
+class CommandClient:
+    """Worker side: one persistent engine connection per thread"""
+
+    def __init__(self, address: Address, authkey: bytes, connect_timeout: float = 10.0):
+        self.address = address
+        self.authkey = authkey
+        self.connect_timeout = connect_timeout
+        self._local = threading.local()
+
+    def _connection(self) -> Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                conn = Client(self.address, authkey=self.authkey)
+                break
+            except (ConnectionRefusedError, FileNotFoundError) as e:
+                if time.monotonic() >= deadline:
+                    raise EngineError(f"Engine unreachable at {self.address}: {str(e)}")
+                time.sleep(0.2)
+        self._local.conn = conn
+        return conn
+
+    def call(self, target: str, method: str, *args, **kwargs) -> Any:
+        request = (target, method, args, kwargs)
+        conn = self._connection()
+        try:
+            conn.send(request)
+        except OSError:
+            # Stale connection from before an engine restart; nothing was sent
+            self._local.conn = None
+            conn = self._connection()
+            conn.send(request)
+
+        try:
+            status, result = conn.recv()
+        except (EOFError, OSError) as e:
+            # Not retried: the engine may already have executed the command
+            self._local.conn = None
+            raise EngineError(f"Lost connection to engine: {str(e)}")
+
+        if status == "error":
+            raise EngineError(result)
+        return result
@@ -0,0 +1,174 @@
+# app/engine/remote.py
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.core.events import EventBroadcaster
+from app.core.option_calculator import OptionCalculator
+from app.core.snapshot import PortfolioSnapshot
+from app.engine.engine import ENGINE_COMMANDS, engine_authkey
+from app.engine.ipc import CommandClient, parse_address
+from app.engine.shared_state import SharedStateReader
+from config.settings import ENGINE_SETTINGS, SNAPSHOT_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteComponent:
+    """Forwards allow-listed method calls to one engine component"""
+
+    def __init__(self, client: CommandClient, target: str):
+        self._client = client
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in ENGINE_COMMANDS.get(self._target, ()):
+            raise AttributeError(f"{self._target}.{name} is not available in worker mode")
+
+        def call(*args, **kwargs):
+            return self._client.call(self._target, name, *args, **kwargs)
+
+        return call
+
+
+class SharedSnapshotView:
+    """SnapshotStore look-alike backed by the engine's shared memory segment"""
+
+    def __init__(self, reader: SharedStateReader):
+        self.reader = reader
+        self.horizon = 0
+        self.invalidated = False
+        self._seq = -1
+        self._current: Optional[PortfolioSnapshot] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[PortfolioSnapshot]:
+        """Latest published snapshot, decoded at most once per version"""
+        if self.reader.seq() == self._seq:
+            return self._current
+        with self._lock:
+            seq, version, payload = self.reader.read()
+            if payload is not None and (self._current is None or version != self._current.version):
+                data = json.loads(payload)
+                self.horizon = data.pop("horizon", 0)
+                self._current = PortfolioSnapshot.from_dict(data)
+                self.invalidated = False
+            self._seq = seq
+            return self._current
+
+    def invalidate(self) -> None:
+        self.invalidated = True
+
+    def wait_for_newer(self, version: int, timeout: float) -> Optional[PortfolioSnapshot]:
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self.current()
+            if (snapshot and snapshot.version > version) or time.monotonic() >= deadline:
+                return snapshot
+            time.sleep(ENGINE_SETTINGS["poll_interval"])
+
+
+class RemoteHedger:
+    """
+    DeltaHedger stand-in for API worker processes.
+
+    Reads come from the engine's shared memory without any IPC; everything
+    that computes, trades or changes settings is forwarded to the engine.
+    """
+
+    def __init__(self, client: CommandClient, reader: SharedStateReader):
+        self.client = client
+        self.calculator = OptionCalculator()
+        self.snapshots = SharedSnapshotView(reader)
+        self.vol_tracker = RemoteComponent(client, "vol_tracker")
+        self.events = EventBroadcaster()
+        self._engine = RemoteComponent(client, "hedger")
+        self._relay = threading.Thread(target=self._relay_snapshots, name="snapshot-relay", daemon=True)
+        self._relay.start()
+
+    @classmethod
+    def from_env(cls) -> "RemoteHedger":
+        address = parse_address(os.getenv("ENGINE_ADDRESS", ENGINE_SETTINGS["address"]))
+        client = CommandClient(address, engine_authkey(), ENGINE_SETTINGS["connect_timeout"])
+
+        shm_name = os.getenv("ENGINE_SHM_NAME", ENGINE_SETTINGS["shm_name"])
+        deadline = time.monotonic() + ENGINE_SETTINGS["connect_timeout"]
+        while True:
+            try:
+                reader = SharedStateReader(shm_name)
+                break
+            except FileNotFoundError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.2)
+        return cls(client, reader)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._engine, name)
+
+    @property
+    def monitoring_active(self) -> bool:
+        return self.snapshots.reader.monitoring()
+
+    def engine_status(self) -> Dict:
+        """Engine health as seen through shared memory, for /api/ready"""
+        if self.snapshots.reader.publish_failed():
+            return {
+                "publishing": False,
+                "error": "Engine snapshots exceed the shared memory slot; raise ENGINE_SHM_SIZE",
+            }
+        return {"publishing": True}
+
+    @property
+    def volatility_source(self) -> str:
+        return self._engine.get_current_settings()["volatility_source"]
+
+    def snapshot_is_fresh(self) -> bool:
+        snapshot = self.snapshots.current()
+        if snapshot is None or self.snapshots.invalidated:
+            return False
+        return self.monitoring_active or snapshot.age <= SNAPSHOT_SETTINGS["max_age"]
+
+    def get_snapshot(self) -> Optional[PortfolioSnapshot]:
+        if not self.snapshot_is_fresh():
+            self.refresh_snapshot()
+        return self.snapshots.current()
+
+    def refresh_snapshot(self) -> Optional[PortfolioSnapshot]:
+        version = self._engine.refresh_snapshot()
+        if version is None:
+            return None
+        if self.snapshots.reader.publish_failed():
+            # The engine could not fit it into shared memory; waiting would only time out
+            return self.snapshots.current()
+        # The engine wrote shared memory before replying
+        return self.snapshots.wait_for_newer(version - 1, ENGINE_SETTINGS["connect_timeout"])
+
+    def hedge_position(self, *args, **kwargs) -> Dict:
+        result = self._engine.hedge_position(*args, **kwargs)
+        if "error" not in result:
+            self.snapshots.invalidate()
+        return result
+
+    def _relay_snapshots(self) -> None:
+        """Turn shared-memory version changes into SSE events for this worker"""
+        last_version = None
+        while True:
+            time.sleep(ENGINE_SETTINGS["poll_interval"])
+            try:
+                if not self.events.subscriber_count:
+                    last_version = None
+                    continue
+                snapshot = self.snapshots.current()
+                if snapshot is None or snapshot.version == last_version:
+                    continue
+                if last_version is not None:
+                    self.events.publish(
+                        "positions", snapshot.change_set(last_version), event_id=snapshot.version
+                    )
+                last_version = snapshot.version
+            except Exception as e:
+                logger.error(f"Snapshot relay error: {str(e)}")
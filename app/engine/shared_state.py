@@ -0,0 +1,138 @@
+# app/engine/shared_state.py
+import json
+import logging
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Tuple
+
+from app.core.snapshot import PortfolioSnapshot
+
+logger = logging.getLogger(__name__)
+
+# seq, version, active slot, flags, slot 0 length, slot 1 length
+HEADER = struct.Struct("<QQIIQQ")
+FLAG_MONITORING = 1
+# The engine's last snapshot did not fit a slot; the one published before it is still served
+FLAG_PUBLISH_FAILED = 2
+
+
+class SharedStateWriter:
+    """
+    Single-writer portfolio state in a shared memory segment.
+
+    The segment holds two payload slots. A snapshot is copied into the slot
+    readers are not using, then published by flipping the active slot under a
+    seqlock: seq is odd while the header changes and readers retry whenever
+    seq moved during their copy, so they never see a torn snapshot.
+    """
+
+    def __init__(self, name: str, size: int):
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            logger.warning("Removed stale shared state segment %s", name)
+        except FileNotFoundError:
+            pass
+
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.slot_size = (size - HEADER.size) // 2
+        self._seq = 0
+        self._version = 0
+        self._active = 0
+        self._flags = 0
+        self._lengths = [0, 0]
+        self._write_header()
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _write_header(self) -> None:
+        HEADER.pack_into(
+            self.shm.buf, 0, self._seq, self._version, self._active, self._flags, *self._lengths
+        )
+
+    def _commit(self) -> None:
+        self._seq += 1
+        struct.pack_into("<Q", self.shm.buf, 0, self._seq)
+        self._seq += 1
+        self._write_header()
+
+    def write(self, version: int, payload: bytes) -> None:
+        if len(payload) > self.slot_size:
+            raise ValueError(
+                f"Snapshot of {len(payload)} bytes exceeds shared slot of {self.slot_size}; "
+                "raise ENGINE_SHM_SIZE"
+            )
+        slot = 1 - self._active
+        offset = HEADER.size + slot * self.slot_size
+        self.shm.buf[offset:offset + len(payload)] = payload
+
+        self._version = version
+        self._active = slot
+        self._lengths[slot] = len(payload)
+        self._commit()
+
+    def write_snapshot(self, snapshot: PortfolioSnapshot, horizon: int) -> None:
+        data = snapshot.to_dict()
+        data["horizon"] = horizon
+        self.write(snapshot.version, json.dumps(data, default=str).encode())
+
+    def set_monitoring(self, active: bool) -> None:
+        self._set_flag(FLAG_MONITORING, active)
+
+    def set_publish_failed(self, failed: bool) -> None:
+        if bool(self._flags & FLAG_PUBLISH_FAILED) != failed:
+            self._set_flag(FLAG_PUBLISH_FAILED, failed)
+
+    def _set_flag(self, flag: int, on: bool) -> None:
+        self._flags = (self._flags | flag) if on else (self._flags & ~flag)
+        self._commit()
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SharedStateReader:
+    """Lock-free reader side of SharedStateWriter"""
+
+    def __init__(self, name: str):
+        self.shm = shared_memory.SharedMemory(name=name)
+        # Attaching registers the segment with this process's resource tracker,
+        # which would unlink it when a worker exits; the engine owns it
+        resource_tracker.unregister(self.shm._name, "shared_memory")  # type: ignore[attr-defined]
+        self.slot_size = (self.shm.size - HEADER.size) // 2
+        self.retries = 0
+
+    def _header(self) -> Tuple[int, int, int, int, int, int]:
+        return HEADER.unpack_from(self.shm.buf, 0)
+
+    def seq(self) -> int:
+        return struct.unpack_from("<Q", self.shm.buf, 0)[0]
+
+    def monitoring(self) -> bool:
+        return bool(self._header()[3] & FLAG_MONITORING)
+
+    def publish_failed(self) -> bool:
+        return bool(self._header()[3] & FLAG_PUBLISH_FAILED)
+
+    def read(self) -> Tuple[int, int, Optional[bytes]]:
+        """Consistent (seq, version, payload); payload is None before the first write"""
+        while True:
+            seq, version, active, _, length0, length1 = self._header()
+            if seq % 2:
+                self.retries += 1
+                time.sleep(0)
+                continue
+            length = length1 if active else length0
+            offset = HEADER.size + active * self.slot_size
+            payload = bytes(self.shm.buf[offset:offset + length]) if length else None
+            if self.seq() == seq:
+                return seq, version, payload
+            self.retries += 1
+
+    def close(self) -> None:
+        self.shm.close()
@@ -0,0 +1,401 @@
+# app/engine/supervisor.py
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.delta_hedger import DeltaHedger
+from app.core.hedge_state import HedgeStateStore
+from app.engine.ipc import Address, CommandClient, CommandServer, EngineError
+from app.models.enums import OrderDirection
+from app.models.position import Position
+from app.services.ig_client import IGAPIError, IGClient
+from config.settings import SUPERVISOR_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEYS = ("epic", "underlying")
+
+# What the supervisor may invoke on a partition worker's hedger
+PARTITION_COMMANDS = {
+    "collect_positions",
+    "get_position",
+    "get_position_entries",
+    "hedge_position",
+    "price_entries",
+    "validate_settings",
+}
+# Run under the hedger's cycle lock, as the engine's own cycle does; hedges are
+# left to hedge_position's per-deal guard so they are not queued behind a cycle
+CYCLE_COMMANDS = {"collect_positions", "get_position_entries", "price_entries"}
+
+
+class BookPartition:
+    """
+    Stable assignment of IG positions to one of `count` partitions.
+
+    "epic" keys on the option market, which spreads a book evenly and keeps
+    every position on one market (and its cached quote) in one worker;
+    "underlying" keeps each underlying's options together. crc32 rather than
+    hash() so every process agrees on the assignment.
+    """
+
+    def __init__(self, index: int, count: int, by: str = "epic"):
+        if by not in PARTITION_KEYS:
+            raise ValueError(f"partition_by must be one of {', '.join(PARTITION_KEYS)}")
+        if not 0 <= index < count:
+            raise ValueError(f"Partition index {index} out of range for {count} partitions")
+        self.index = index
+        self.count = count
+        self.by = by
+
+    def key(self, pos_data: Dict) -> str:
+        market = pos_data.get("market", {})
+        if self.by == "underlying":
+            return Position.underlying_for(market)
+        return str(market.get("epic", ""))
+
+    def index_of(self, pos_data: Dict) -> int:
+        return zlib.crc32(self.key(pos_data).encode()) % self.count
+
+    def owns(self, pos_data: Dict) -> bool:
+        return self.index_of(pos_data) == self.index
+
+
+def run_partition_worker(index: int, count: int, by: str, authkey: bytes, ready) -> None:
+    """Child process: one partition's IG session and hedger behind a command socket"""
+    from config.logging_config import configure_logging
+
+    configure_logging()
+    partition = BookPartition(index, count, by)
+
+    ig_client = IGClient(
+        api_key=os.getenv("IG_API_KEY"),
+        username=os.getenv("IG_USERNAME"),
+        password=os.getenv("IG_PASSWORD"),
+    )
+    if not ig_client.login():
+        raise IGAPIError(f"Partition {index}: failed to login to IG API")
+    ig_client.start_token_refresher()
+    state_store = HedgeStateStore.from_env()
+    hedger = DeltaHedger(ig_client, owns=partition.owns, state_store=state_store)
+
+    def handle(target: str, method: str, args: tuple, kwargs: Dict) -> Any:
+        if target != "hedger" or method not in PARTITION_COMMANDS:
+            raise ValueError(f"Unknown partition command {target}.{method}")
+        # The command server runs a thread per connection
+        if method in CYCLE_COMMANDS:
+            with hedger._cycle_lock:
+                return getattr(hedger, method)(*args, **kwargs)
+        return getattr(hedger, method)(*args, **kwargs)
+
+    server = CommandServer(("127.0.0.1", 0), authkey, handle)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.close())
+    ready.put((index, server.listener.address))
+    logger.info("Partition %d/%d (%s) ready on %s", index, count, by, server.listener.address)
+    try:
+        server.serve_forever()
+    finally:
+        ig_client.token_refresher.stop()
+        if state_store:
+            state_store.close()
+
+
+class PartitionWorker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[multiprocessing.Process] = None
+        self.address: Optional[Address] = None
+        self.client: Optional[CommandClient] = None
+        self.restarts = 0
+        self.positions = 0
+        self.last_call_seconds: Optional[float] = None
+        self.last_cycle_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def status(self) -> Dict:
+        return {
+            "partition": self.index,
+            "pid": self.process.pid if self.process else None,
+            "alive": bool(self.process and self.process.is_alive()),
+            "restarts": self.restarts,
+            "positions": self.positions,
+            "last_cycle_seconds": self.last_cycle_seconds,
+            "last_error": self.last_error,
+        }
+
+
+class PartitionSupervisor:
+    """
+    Starts one hedger process per partition and restarts any that exit.
+
+    Each worker logs in with its own IGClient, so each has its own session,
+    market cache and request-rate budget; the supervisor talks to them over
+    the same authenticated local sockets API workers use for the engine.
+    """
+
+    def __init__(
+        self,
+        workers: int = SUPERVISOR_SETTINGS["workers"],
+        partition_by: str = SUPERVISOR_SETTINGS["partition_by"],
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.partition_by = partition_by
+        self.partition = BookPartition(0, workers, partition_by)  # validates partition_by
+        self.workers = [PartitionWorker(i) for i in range(workers)]
+        self._authkey = os.urandom(32)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._ready = self._ctx.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="partition")
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "PartitionSupervisor":
+        for worker in self.workers:
+            self._spawn(worker)
+        self._await_ready(self.workers)
+        self._watchdog = threading.Thread(target=self._watch, name="partition-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("Started %d partition workers by %s", len(self.workers), self.partition_by)
+        return self
+
+    def _spawn(self, worker: PartitionWorker) -> None:
+        worker.process = self._ctx.Process(
+            target=run_partition_worker,
+            args=(worker.index, len(self.workers), self.partition_by, self._authkey, self._ready),
+            name=f"hedger-partition-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+
+    def _await_ready(self, pending: List[PartitionWorker]) -> None:
+        waiting = {w.index for w in pending}
+        deadline = time.monotonic() + SUPERVISOR_SETTINGS["start_timeout"]
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"Partition workers {sorted(waiting)} did not start")
+            try:
+                index, address = self._ready.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                dead = [i for i in waiting if not self.workers[i].process.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Partition workers {dead} exited during startup")
+                continue
+            worker = self.workers[index]
+            worker.address = address
+            worker.client = CommandClient(address, self._authkey, SUPERVISOR_SETTINGS["start_timeout"])
+            waiting.discard(index)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(SUPERVISOR_SETTINGS["restart_delay"]):
+            for worker in self.workers:
+                if worker.process.is_alive() or self._stop.is_set():
+                    continue
+                logger.error(
+                    "Partition %d exited with code %s; restarting",
+                    worker.index, worker.process.exitcode,
+                )
+                try:
+                    with self._lock:
+                        worker.client = None
+                        self._spawn(worker)
+                        self._await_ready([worker])
+                    worker.restarts += 1
+                except Exception as e:
+                    worker.last_error = str(e)
+                    logger.error(f"Failed to restart partition {worker.index}: {str(e)}")
+
+    def call(self, index: int, method: str, *args, **kwargs) -> Any:
+        worker = self.workers[index]
+        if worker.client is None:
+            raise EngineError(f"Partition {index} is restarting")
+        started = time.perf_counter()
+        try:
+            return worker.client.call("hedger", method, *args, **kwargs)
+        finally:
+            worker.last_call_seconds = round(time.perf_counter() - started, 3)
+
+    def call_all(self, method: str, *args, **kwargs) -> List[Any]:
+        """Call every partition concurrently; failures come back as exceptions"""
+        futures = [
+            self._pool.submit(self.call, worker.index, method, *args, **kwargs)
+            for worker in self.workers
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def owner(self, pos_data: Dict) -> int:
+        return self.partition.index_of(pos_data)
+
+    def status(self) -> List[Dict]:
+        return [worker.status() for worker in self.workers]
+
+    def stop(self) -> None:
+        self._stop.set()
+        for worker in self.workers:
+            if worker.process and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process:
+                worker.process.join(timeout=10)
+        self._pool.shutdown(wait=False)
+
+
+class PartitionedHedger(DeltaHedger):
+    """
+    Coordinator DeltaHedger whose book lives in partition workers.
+
+    Each cycle runs every partition's collect_positions concurrently and
+    merges the results into one snapshot, so cycle time falls with the
+    number of workers. Hedges go to the owning partition, which holds that
+    position's hedge state; settings are applied to every partition. Its
+    own IGClient serves the ad-hoc quotes and lookups API routes make.
+    """
+
+    def __init__(self, ig_client: IGClient, supervisor: PartitionSupervisor, price_stream=None):
+        super().__init__(ig_client, price_stream=price_stream)
+        self.supervisor = supervisor
+        self._owners: Dict[str, int] = {}
+        self._last_status: Dict[int, Dict] = {}
+
+    def collect_positions(self, auto_hedge: bool = False) -> Dict:
+        results = self.supervisor.call_all("collect_positions", auto_hedge)
+        merged: Dict[str, Dict] = {}
+        failed = 0
+        for worker, result in zip(self.supervisor.workers, results):
+            if isinstance(result, Exception) or "error" in result:
+                failed += 1
+                worker.last_error = str(result if isinstance(result, Exception) else result["error"])
+                logger.error("Partition %d cycle failed: %s", worker.index, worker.last_error)
+                # Keep serving its last good entries rather than reporting them closed
+                result = self._last_status.get(worker.index, {})
+            else:
+                worker.last_error = None
+                worker.last_cycle_seconds = worker.last_call_seconds
+                self._last_status[worker.index] = result
+            worker.positions = len(result)
+            for deal_id in result:
+                self._owners[deal_id] = worker.index
+            merged.update(result)
+
+        if failed == len(results):
+            return {"error": "Every partition failed"}
+        for deal_id in set(self._owners) - set(merged):
+            self._owners.pop(deal_id, None)
+        return merged
+
+    def get_all_positions_status(self) -> Dict:
+        return self.collect_positions(auto_hedge=False)
+
+    def get_position_entries(self) -> Dict:
+        """Unpriced listing from the partitions, which hold each position's hedge state"""
+        entries: Dict[str, Dict] = {}
+        results = self.supervisor.call_all("get_position_entries")
+        for worker, result in zip(self.supervisor.workers, results):
+            if isinstance(result, Exception):
+                return {"error": str(result)}
+            if "error" in result:
+                return result
+            for deal_id in result:
+                self._owners[deal_id] = worker.index
+            entries.update(result)
+        return entries
+
+    def price_entries(self, deal_ids: Iterable[str]) -> Dict:
+        """Price each deal in the partition that holds it"""
+        by_owner: Dict[int, List[str]] = {}
+        for deal_id in deal_ids:
+            index = self._owners.get(deal_id)
+            if index is not None:
+                by_owner.setdefault(index, []).append(deal_id)
+        entries: Dict[str, Dict] = {}
+        for index, owned in by_owner.items():
+            try:
+                entries.update(self.supervisor.call(index, "price_entries", owned))
+            except Exception as e:
+                logger.error(f"Partition {index} failed to price entries: {str(e)}")
+        return entries
+
+    def _owner(self, position_id: str) -> Optional[int]:
+        index = self._owners.get(position_id)
+        if index is not None:
+            return index
+        positions_data = self.ig_client.get_positions()
+        for pos_data in positions_data.get("positions", []):
+            if pos_data.get("position", {}).get("dealId") == position_id:
+                return self.supervisor.owner(pos_data)
+        return None
+
+    def get_position(self, position_id: str) -> Optional[Position]:
+        try:
+            index = self._owner(position_id)
+            if index is None:
+                return None
+            return self.supervisor.call(index, "get_position", position_id)
+        except Exception as e:
+            logger.error(f"Error getting position {position_id}: {str(e)}")
+            return None
+
+    def hedge_position(
+        self,
+        position_id: str,
+        hedge_size: float = None,  # type: ignore
+    ) -> Dict:
+        try:
+            index = self._owner(position_id)
+            if index is None:
+                return {"error": "Position not found"}
+            result = self.supervisor.call(index, "hedge_position", position_id, hedge_size=hedge_size)
+        except Exception as e:
+            logger.error(f"Hedging error: {str(e)}")
+            return {"error": f"Hedging failed: {str(e)}"}
+
+        if "error" not in result and result.get("hedge_reference"):
+            delta_info = result.get("delta", {})
+            self.snapshots.invalidate()
+            self.events.publish(
+                "hedge",
+                {
+                    "position_id": position_id,
+                    "hedge_size": result["hedge_size"],
+                    "direction": (
+                        OrderDirection.BUY if result["hedge_size"] > 0 else OrderDirection.SELL
+                    ).value,
+                    "price": delta_info.get("current_price"),
+                    "hedge_reference": result["hedge_reference"],
+                    "delta": delta_info.get("delta"),
+                },
+            )
+        return result
+
+    def validate_settings(self, settings: Dict) -> Dict:
+        result = super().validate_settings(settings)
+        if "error" in result:
+            return result
+        for worker, reply in zip(
+            self.supervisor.workers,
+            self.supervisor.call_all("validate_settings", self.get_current_settings()),
+        ):
+            if isinstance(reply, Exception) or "error" in reply:
+                error = reply if isinstance(reply, Exception) else reply["error"]
+                return {"error": f"Partition {worker.index} rejected settings: {error}"}
+        return result
+
+    def get_monitoring_status(self) -> Dict:
+        status = super().get_monitoring_status()
+        status["partitions"] = self.supervisor.status()
+        return status
@@ -19,12 +19,14 @@ class HedgeRecord:
     def from_dict(cls, data: Dict) -> "HedgeRecord":
         """Create HedgeRecord from dictionary"""
         try:
-            return cls(
-                delta=data.get("delta", 0.0),
-                hedge_size=data.get("hedge_size", 0.0),
-                price=data.get("price", 0.0),
-                pnl=data.get("pnl", 0.0),
+            record = cls(
+                delta=data.get("delta") or 0.0,
+                hedge_size=data.get("hedge_size") or 0.0,
+                price=data.get("price") or 0.0,
+                pnl=data.get("pnl") or 0.0,
             )
+            record.timestamp = data.get("timestamp") or record.timestamp
+            return record
         except Exception as e:
             raise ValueError(f"Error creating HedgeRecord from dict: {str(e)}")
 
@@ -1,4 +1,5 @@
 import logging
+import re
 from datetime import datetime
 from typing import Dict, List, Optional, Union
 
@@ -7,6 +8,9 @@ from .hedge_record import HedgeRecord
 
 logger = logging.getLogger(__name__)
 
+# The strike in an IG option's instrument name, just before CALL/PUT
+STRIKE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s+(?:CALL|PUT)\b", re.IGNORECASE)
+
 
 class Position:
     def __init__(self, data: Dict):
@@ -27,10 +31,10 @@ class Position:
         if not self.epic:
             raise ValueError("Epic is required")
 
-        self.underlying_epic = "IX.D.SPTRD.IFS.IP"
+        self.underlying_epic = self.underlying_for(market)
 
         # Position details
-        self.strike = float(data.get("strike", pos.get("level", 0)))
+        self.strike = float(data.get("strike") or self.strike_for(market) or pos.get("level", 0))
         self.size = float(pos.get("size", 0))
         self.direction = pos.get("direction", "SELL")
         self.contract_size = float(pos.get("contractSize", 1.0))
@@ -82,6 +86,8 @@ class Position:
         self.last_hedge_price: Optional[float] = data.get("last_hedge_price")
         self.last_hedge_time: Optional[str] = data.get("last_hedge_time")
         self.hedge_history: List[HedgeRecord] = []
+        # Cumulative cost of filling hedges away from mid (negative is a cost)
+        self.hedge_slippage = float(data.get("hedge_slippage", 0.0))
         self.pnl_threshold_crossed = bool(data.get("pnl_threshold_crossed", False))
         self.is_active = bool(data.get("is_active", True))
 
@@ -110,6 +116,17 @@ class Position:
 
         return 0.25
 
+    @staticmethod
+    def underlying_for(market: Dict) -> str:
+        """Epic hedges are placed on; every option is hedged with the S&P 500 CFD"""
+        return "IX.D.SPTRD.IFS.IP"
+
+    @staticmethod
+    def strike_for(market: Dict) -> Optional[float]:
+        """Strike from an IG option name like "US 500 5025 CALL"; None when it has none"""
+        match = STRIKE_PATTERN.search(str(market.get("instrumentName", "")))
+        return float(match.group(1)) if match else None
+
     @classmethod
     def from_dict(cls, data: Dict) -> "Position":
         """Create Position from IG API response data"""
@@ -128,6 +145,24 @@ class Position:
             logger.error(f"Error creating Position from dict: {str(e)}")
             raise ValueError(f"Error creating Position from dict: {str(e)}")
 
+    def sync(self, data: Dict) -> None:
+        """Refresh from a new IG positions payload, keeping hedge state"""
+        pos = data.get("position", {})
+        market = data.get("market", {})
+
+        # Size and direction change on partial closes and top-ups
+        self.size = float(pos.get("size", self.size))
+        self.direction = pos.get("direction", self.direction)
+        self.contract_size = float(pos.get("contractSize", self.contract_size))
+        self.level = float(pos.get("level", self.level))
+        self.total_size = self.size * self.contract_size
+        self.entry_value = self.total_size * self.level
+        self.premium = self.entry_value
+
+        self.expiry = market.get("expiry", self.expiry)
+        self.time_to_expiry = self._calculate_time_to_expiry()
+        self.update_market_data(market)
+
     def update_market_data(self, market_data: Dict) -> None:
         """Update position with latest market data"""
         if not isinstance(market_data, dict):
@@ -162,10 +197,11 @@ class Position:
             raise ValueError("Invalid price for intrinsic value calculation")
 
     def update_hedge(
-        self, deal_id: str, size: float, price: float, direction: str
+        self, deal_id: str, size: float, price: float, direction: str, slippage: float = 0.0
     ) -> None:
         """Update hedge position details"""
         try:
+            self.hedge_slippage += float(slippage)
             self.hedge_deal_id = str(deal_id)
             self.hedge_size = float(size)
             self.last_hedge_price = float(price)
@@ -197,6 +233,21 @@ class Position:
         except (ValueError, TypeError) as e:
             raise ValueError(f"Invalid hedge record data: {str(e)}")
 
+    def restore_hedge_state(self, state: Dict, history: List[Dict]) -> None:
+        """Reapply persisted hedge state and history, e.g. after a restart"""
+        try:
+            self.hedge_size = float(state.get("hedge_size") or 0.0)
+            self.hedge_deal_id = state.get("hedge_deal_id")
+            self.hedge_direction = state.get("hedge_direction")
+            self.last_hedge_price = state.get("last_hedge_price")
+            self.last_hedge_time = state.get("last_hedge_time")
+            self.hedge_slippage = float(state.get("hedge_slippage") or 0.0)
+            self.pnl_threshold_crossed = bool(state.get("pnl_threshold_crossed", False))
+            self.is_active = bool(state.get("is_active", True))
+            self.hedge_history = [HedgeRecord.from_dict(h) for h in history]
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid hedge state data: {str(e)}")
+
     def needs_hedge(self, current_pnl: float, threshold: float) -> bool:
         """Check if position needs hedging based on PnL threshold"""
         try:
@@ -239,6 +290,7 @@ class Position:
                 "hedge_direction": self.hedge_direction,
                 "last_hedge_time": self.last_hedge_time,
                 "last_hedge_price": self.last_hedge_price,
+                "hedge_slippage": round(self.hedge_slippage, 6),
                 "is_active": self.is_active,
                 "pnl_threshold_crossed": self.pnl_threshold_crossed,
                 "total_hedges": len(self.hedge_history),
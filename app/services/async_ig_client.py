@@ -0,0 +1,393 @@
+# app/services/async_ig_client.py
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+import aiohttp
+
+from app.core.metrics import RATE_LIMIT_WAIT_SECONDS, RATE_LIMIT_WAITS
+from app.models.enums import OrderDirection, OrderType
+from app.services.ig_client import DEFAULT_BASE_URL, IGAPIError, IGClient, parse_market_data
+from app.services.rate_budget import RateBudget
+from config.settings import HEDGE_SETTINGS as _hedge_settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRateLimiter:
+    """Await request slots from a RateBudget, possibly shared with a blocking IGClient"""
+
+    def __init__(self, budget: RateBudget):
+        self.budget = budget
+
+    async def wait(self) -> None:
+        delay = self.budget.reserve()
+        if delay > 0:
+            RATE_LIMIT_WAITS.inc(reason="throttle")
+            RATE_LIMIT_WAIT_SECONDS.inc(delay, reason="throttle")
+            await asyncio.sleep(delay)
+
+
+class AsyncIGClient:
+    """asyncio IG REST client on a pooled aiohttp connector"""
+
+    def __init__(
+        self,
+        api_key,
+        username,
+        password,
+        max_connections: int = 100,
+        request_interval: Optional[float] = None,
+        rate_budget: Optional[RateBudget] = None,
+        headers_source: Optional[Callable[[str], Dict]] = None,
+    ):
+        self.api_key = api_key
+        self.username = username
+        self.password = password
+        self.base_url = os.getenv("IG_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+        self.account_id = None
+        self.access_token = None
+        self.refresh_token = None
+        self.token_expiry = None
+        self.max_connections = max_connections
+        self.max_retries = 3
+
+        if request_interval is None:
+            request_interval = float(_hedge_settings.get("api_request_interval", 1.0))
+        self.request_interval = request_interval
+        self._rate_limiter = AsyncRateLimiter(rate_budget or RateBudget(request_interval))
+        # When set, auth headers come from another client's session instead of our own login
+        self._headers_source = headers_source
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._auth_lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def from_client(cls, client: IGClient, **kwargs) -> "AsyncIGClient":
+        """Async client riding on a logged-in IGClient's session and rate budget"""
+        return cls(
+            client.api_key,
+            client.username,
+            client.password,
+            request_interval=client.request_interval,
+            rate_budget=client.rate_budget,
+            headers_source=lambda version: client.get_headers(version=version),
+            **kwargs,
+        )
+
+    async def __aenter__(self) -> "AsyncIGClient":
+        await self.login()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session binds to the loop that actually runs it
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=30)
+            )
+            self._auth_lock = asyncio.Lock()
+        return self._session
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def _base_headers(self, version: str) -> Dict:
+        return {
+            "X-IG-API-KEY": self.api_key,
+            "Content-Type": "application/json",
+            "Accept": "application/json; charset=UTF-8",
+            "Version": version,
+        }
+
+    async def login(self) -> bool:
+        """Authenticate with the IG API"""
+        if not (self.api_key and self.username and self.password):
+            raise IGAPIError("Missing IG API credentials")
+
+        session = await self._get_session()
+        try:
+            async with session.post(
+                f"{self.base_url}/session",
+                headers=self._base_headers("3"),
+                json={"identifier": self.username, "password": self.password},
+            ) as response:
+                if response.status == 401:
+                    raise IGAPIError("Invalid credentials provided", status_code=401)
+                if response.status != 200:
+                    raise IGAPIError(
+                        "Failed to authenticate with IG API",
+                        status_code=response.status,
+                        response_text=await response.text(),
+                    )
+                response_data = await response.json()
+        except aiohttp.ClientError as e:
+            logger.error(f"Network error during authentication: {str(e)}")
+            raise IGAPIError("Network error occurred while connecting to IG API")
+
+        self.account_id = response_data.get("accountId")
+        self._store_token(response_data.get("oauthToken", {}))
+        logger.info("Successfully authenticated with IG API (async)")
+        return True
+
+    def _store_token(self, token: Dict) -> None:
+        self.access_token = token.get("access_token")
+        self.refresh_token = token.get("refresh_token")
+        expires_in = int(token.get("expires_in", 0))
+        self.token_expiry = datetime.now() + timedelta(seconds=expires_in)
+
+    async def refresh_access_token(self) -> bool:
+        """Refresh the access token using the refresh token"""
+        if not self.refresh_token:
+            return False
+
+        session = await self._get_session()
+        try:
+            async with session.post(
+                f"{self.base_url}/session/refresh-token",
+                headers=self._base_headers("1"),
+                json={"refresh_token": self.refresh_token},
+            ) as response:
+                if response.status != 200:
+                    logger.error(f"Failed to refresh token: {response.status}")
+                    return False
+                self._store_token(await response.json())
+                return True
+        except aiohttp.ClientError as e:
+            logger.error(f"Error refreshing token: {str(e)}")
+            return False
+
+    async def ensure_token_valid(self) -> None:
+        """Ensure the access token is valid; only one coroutine refreshes at a time"""
+        await self._get_session()
+        if not self.token_expiry or not self.access_token:
+            raise IGAPIError("No valid session - needs new login")
+
+        if datetime.now() + timedelta(seconds=15) < self.token_expiry:
+            return
+
+        async with self._auth_lock:
+            # Another coroutine may have refreshed while we waited
+            if datetime.now() + timedelta(seconds=15) < self.token_expiry:
+                return
+            if not await self.refresh_access_token():
+                self.access_token = None
+                self.refresh_token = None
+                self.token_expiry = None
+                raise IGAPIError("Session expired - needs new login")
+
+    async def get_headers(self, version: str = "2", account_id: Optional[str] = None) -> Dict:
+        if self._headers_source is not None:
+            headers = dict(self._headers_source(version))
+            if account_id:
+                headers["IG-ACCOUNT-ID"] = account_id
+            return headers
+
+        await self.ensure_token_valid()
+        headers = self._base_headers(version)
+        headers["Authorization"] = f"Bearer {self.access_token}"
+        headers["IG-ACCOUNT-ID"] = account_id or self.account_id
+        return headers
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        version: str,
+        json: Optional[Dict] = None,
+        account_id: Optional[str] = None,
+    ):
+        """
+        Issue a rate-limited request, returning (status, parsed body, raw text).
+
+        Headers are built once the rate slot is granted, so a long wait cannot
+        leave a request holding a token that expired meanwhile. A 429 waits out
+        Retry-After and retries, up to max_retries times.
+        """
+        session = await self._get_session()
+        for attempt in range(self.max_retries + 1):
+            await self._rate_limiter.wait()
+            headers = await self.get_headers(version=version, account_id=account_id)
+            try:
+                async with session.request(
+                    method, f"{self.base_url}{path}", headers=headers, json=json
+                ) as response:
+                    text = await response.text()
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError:
+                        data = None
+                    status = response.status
+                    retry_after = int(response.headers.get("Retry-After", 60))
+            except aiohttp.ClientError as e:
+                logger.error(f"Network error on {method} {path}: {str(e)}")
+                raise IGAPIError(f"Network error occurred on {method} {path}: {str(e)}")
+
+            if status != 429 or attempt == self.max_retries:
+                return status, data, text
+            logger.warning(f"Rate limit exceeded on {method} {path}, retrying in {retry_after} seconds")
+            RATE_LIMIT_WAITS.inc(reason="http_429")
+            RATE_LIMIT_WAIT_SECONDS.inc(retry_after, reason="http_429")
+            await asyncio.sleep(retry_after)
+
+    async def get_positions(self) -> Dict:
+        """Fetch current positions"""
+        status, data, text = await self._request("GET", "/positions", version="1")
+        if status == 200:
+            return data
+        if status == 401:
+            self.access_token = None
+            raise IGAPIError("Session expired - needs new login", status, text)
+        raise IGAPIError("Failed to fetch positions from IG API", status, text)
+
+    async def get_market_data(self, epic: str) -> Dict:
+        """Fetch details for a specific market by its epic code"""
+        status, data, text = await self._request("GET", f"/markets/{epic}", version="3")
+        if status == 200:
+            return parse_market_data(data)
+        if status == 401:
+            raise IGAPIError("Session expired - please log in again", status, text)
+        raise IGAPIError(
+            f"Failed to fetch market details from IG API: HTTP {status}", status, text
+        )
+
+    async def get_market_data_many(self, epics: Iterable[str]) -> Dict[str, Dict]:
+        """Fetch several markets concurrently; failures map to {"error": ...}"""
+        unique = list(dict.fromkeys(epics))
+        results = await asyncio.gather(
+            *(self.get_market_data(epic) for epic in unique), return_exceptions=True
+        )
+        return {
+            epic: ({"error": str(result)} if isinstance(result, Exception) else result)
+            for epic, result in zip(unique, results)
+        }
+
+    async def create_position(
+        self,
+        epic: str,
+        direction: OrderDirection,
+        size: float,
+        order_type: OrderType = OrderType.MARKET,
+        limit_level: Optional[float] = None,
+        time_in_force: str = "EXECUTE_AND_ELIMINATE",
+        account_id: Optional[str] = None,
+    ) -> Dict:
+        try:
+            size = max(float(abs(size)), 0.01)
+        except (ValueError, TypeError) as size_error:
+            return {
+                "error": "Position size must be positive",
+                "details": {"original_size": size, "error": str(size_error)},
+            }
+
+        try:
+            market_data = await self.get_market_data(epic)
+            current_price = market_data.get("price", 0)
+            if current_price <= 0:
+                return {"error": "Invalid market price"}
+
+            order = {
+                "epic": epic,
+                "expiry": "-",
+                "direction": direction.value,
+                "size": f"{size:.2f}",
+                "orderType": order_type.value,
+                "currencyCode": "GBP",
+                "forceOpen": True,
+                "guaranteedStop": False,
+                "timeInForce": time_in_force,
+            }
+            if order_type == OrderType.LIMIT:
+                order["level"] = str(limit_level or current_price)
+
+            status, data, text = await self._request(
+                "POST", "/positions/otc", version="2", json=order, account_id=account_id
+            )
+            if status == 200 and data and "dealReference" in data:
+                return {
+                    "dealId": data["dealReference"],
+                    "dealReference": data["dealReference"],
+                    "quote": {"bid": market_data.get("bid"), "offer": market_data.get("offer")},
+                }
+
+            error_code = (data or {}).get("errorCode", "Unknown error")
+            logger.error(f"Order creation failed: HTTP {status} {error_code}")
+            return {
+                "error": f"Position creation failed: {error_code}",
+                "details": {"status_code": status, "raw_response": text, "order_details": order},
+            }
+
+        except Exception as e:
+            logger.error(f"Unexpected error creating position: {str(e)}", exc_info=True)
+            return {"error": "Position creation failed", "details": str(e)}
+
+    async def create_hedge_position(
+        self, epic: str, direction: OrderDirection, size: float
+    ) -> Dict:
+        """Create a CFD hedge position on the configured CFD account"""
+        cfd_account_id = os.getenv("IG_CFD_ACCOUNT")
+        if not cfd_account_id:
+            return {"error": "CFD account ID not configured"}
+
+        # The CFD account is addressed per request, so no re-login is needed
+        result = await self.create_position(
+            epic="IX.D.SPTRD.IFS.IP",
+            direction=direction,
+            size=size,
+            order_type=OrderType.MARKET,
+            account_id=cfd_account_id,
+        )
+        if "dealReference" in result:
+            logger.info(f"Hedge position created successfully: {result}")
+            return result
+        return {"error": "Failed to create hedge position", "details": result}
+
+
+class SyncIGClientFacade:
+    """Blocking facade over AsyncIGClient for use from Flask request threads"""
+
+    def __init__(self, client: AsyncIGClient):
+        self.client = client
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="async-ig-client", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, coro, timeout: Optional[float] = 60):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def login(self) -> bool:
+        return self._run(self.client.login())
+
+    def get_positions(self) -> Dict:
+        return self._run(self.client.get_positions())
+
+    def get_market_data(self, epic: str, use_cache: bool = True) -> Dict:  # noqa
+        return self._run(self.client.get_market_data(epic))
+
+    def get_market_data_many(self, epics: Iterable[str]) -> Dict[str, Dict]:
+        # No overall timeout: a large batch is paced by the rate budget, and
+        # every request is bounded by the session timeout
+        return self._run(self.client.get_market_data_many(epics), timeout=None)
+
+    def create_position(self, *args, **kwargs) -> Dict:
+        return self._run(self.client.create_position(*args, **kwargs))
+
+    def create_hedge_position(
+        self, epic: str, direction: OrderDirection, size: float
+    ) -> Dict:
+        return self._run(self.client.create_hedge_position(epic, direction, size))
+
+    def close(self) -> None:
+        self._run(self.client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -1,19 +1,38 @@
+import atexit
 import json
 import logging
 import os
+import re
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Union
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Union
 
 import requests
 from dotenv import load_dotenv
 
+from app.core.metrics import (
+    IG_REQUEST_SECONDS,
+    IG_REQUESTS,
+    ORDERS,
+    RATE_LIMIT_WAIT_SECONDS,
+    RATE_LIMIT_WAITS,
+)
+from app.core.tracing import TRACER
 from app.models.enums import OrderDirection, OrderType
+from app.services.market_data_cache import MarketDataCache
+from app.services.rate_budget import RateBudget
+from app.services.single_flight import SingleFlight
+from app.services.token_refresher import TokenRefresher
+from config.logging_config import log_payload
 from config.settings import HEDGE_SETTINGS as _hedge_settings
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Point IG_BASE_URL at a local simulator (python -m simulator) to run offline
+DEFAULT_BASE_URL = "https://demo-api.ig.com/gateway/deal"
+
 class IGAPIError(Exception):
     def __init__(self, message, status_code=None, response_text=None):
         self.message = message
@@ -29,6 +48,98 @@ class IGAPIError(Exception):
             error_msg += f" Response: {self.response_text}"
         return error_msg
 
+def parse_market_data(data: Dict) -> Dict:
+    """Flatten a /markets/{epic} response into the market data dict used internally"""
+    snapshot = data.get("snapshot", {})
+    instrument = data.get("instrument", {})
+
+    return {
+        "bid": float(snapshot.get("bid", 0)),
+        "offer": float(snapshot.get("offer", 0)),
+        "price": (float(snapshot.get("bid", 0)) + float(snapshot.get("offer", 0))) / 2,
+        "high": float(snapshot.get("high", 0)),
+        "low": float(snapshot.get("low", 0)),
+        "update_time": snapshot.get("updateTime"),
+        "volatility": max(0.001, abs(float(snapshot.get("percentageChange", 0.1)) / 100)),
+        "instrument_type": instrument.get("type", ""),
+        "market_status": snapshot.get("marketStatus", ""),
+        "strike_price": float(instrument.get("strikePrice", 0)),
+        "expiry": instrument.get("expiry", ""),
+    }
+
+def _mid(price: Optional[Dict]) -> float:
+    price = price or {}
+    bid, ask = price.get("bid"), price.get("ask")
+    if bid is not None and ask is not None:
+        return (float(bid) + float(ask)) / 2
+    value = bid if bid is not None else ask
+    if value is None:
+        value = price.get("lastTraded")
+    return float(value) if value is not None else float("nan")
+
+def parse_price_bar(bar: Dict) -> Dict:
+    """Flatten one /prices bar into epoch time and mid OHLC"""
+    snapshot_time = datetime.strptime(bar["snapshotTimeUTC"], "%Y-%m-%dT%H:%M:%S")
+    return {
+        "time": int(snapshot_time.replace(tzinfo=timezone.utc).timestamp()),
+        "open": _mid(bar.get("openPrice")),
+        "high": _mid(bar.get("highPrice")),
+        "low": _mid(bar.get("lowPrice")),
+        "close": _mid(bar.get("closePrice")),
+        "volume": float(bar.get("lastTradedVolume") or 0),
+    }
+
+# Path segments that identify an instrument or deal are collapsed so metric labels stay bounded
+_ENDPOINT_TEMPLATES = [
+    (re.compile(r"^/markets/[^/]+"), "/markets/{epic}"),
+    (re.compile(r"^/prices/[^/]+"), "/prices/{epic}"),
+    (re.compile(r"^/positions/(?!otc$)[^/]+"), "/positions/{deal_id}"),
+]
+
+
+def endpoint_label(base_url: str, url: str) -> str:
+    path = url[len(base_url):] if url.startswith(base_url) else url
+    path = path.split("?", 1)[0] or "/"
+    for pattern, template in _ENDPOINT_TEMPLATES:
+        path = pattern.sub(template, path)
+    return path
+
+
+def _epic_attributes(client, epic, *args, **kwargs) -> Dict:
+    return {"epic": epic}
+
+
+def _order_attributes(client, epic, direction, size, *args, **kwargs) -> Dict:
+    return {"epic": epic, "direction": getattr(direction, "value", direction), "size": size}
+
+
+class MeteredSession(requests.Session):
+    """requests.Session that records latency, status and a trace span for every IG call"""
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url
+
+    def request(self, method, url, *args, **kwargs):
+        endpoint = endpoint_label(self.base_url, str(url))
+        method = str(method).upper()
+        status = "error"
+        started = time.perf_counter()
+        try:
+            with TRACER.span("ig.http", endpoint=endpoint, method=method) as span:
+                response = super().request(method, url, *args, **kwargs)
+                status = str(response.status_code)
+                span.set_attribute("status", response.status_code)
+                if response.status_code >= 400:
+                    span.set_error(f"HTTP {response.status_code}")
+            return response
+        finally:
+            IG_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, endpoint=endpoint, method=method
+            )
+            IG_REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+
+
 class IGClient:
     def __init__(self, api_key, username, password):
         """Initialize IGClient with configuration"""
@@ -36,21 +147,33 @@ class IGClient:
         self.api_key = api_key
         self.username = username
         self.password = password
-        self.base_url = "https://demo-api.ig.com/gateway/deal"
-        self.session = requests.Session()
+        self.base_url = os.getenv("IG_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+        self.session = MeteredSession(self.base_url)
         self.account_id = None
         self.access_token = None
         self.refresh_token = None
         self.token_expiry = None
+        self.lightstreamer_endpoint = None
+
+        # Auth headers are rebuilt on login/refresh and swapped in one assignment,
+        # so request paths read a ready dict without taking the lock
+        self._auth_lock = threading.RLock()
+        self._auth_headers: Optional[Dict] = None
+        self.token_refresher = TokenRefresher(self)
 
         # Rate limiting
         self.request_delay = 1.0
-        self.last_request_time = 0
         self.max_retries = 3
         self.retry_delay = 2
         self.request_interval = float(_hedge_settings.get("api_request_interval", 1.0))
-        
-        self.login()
+        # Shared with the async client so batch reads spend the same allowance
+        self.rate_budget = RateBudget(self.request_interval)
+        self._async_client = None
+        self._async_lock = threading.Lock()
+
+        self.market_cache = MarketDataCache()
+        # Concurrent identical reads share one in-flight HTTP call
+        self.single_flight = SingleFlight()
 
     def _validate_credentials(self) -> None:
         """Validate API credentials"""
@@ -65,47 +188,74 @@ class IGClient:
         if missing:
             raise ValueError(f"Missing IG API credentials: {', '.join(missing)}")
 
-    def refresh_access_token(self) -> bool:
-        """Refresh the access token using the refresh token"""
-        if not self.refresh_token:
-            logger.error("No refresh token available")
-            return False
+    def _set_session(self, token: Dict, account_id: Optional[str] = None) -> None:
+        """Store OAuth tokens and atomically publish the matching request headers"""
+        self.access_token = token.get('access_token')
+        self.refresh_token = token.get('refresh_token')
+        expires_in = int(token.get('expires_in', 0))
+        self.token_expiry = datetime.now() + timedelta(seconds=expires_in)
+        if account_id:
+            self.account_id = account_id
 
-        headers = {
+        self._auth_headers = {
             "X-IG-API-KEY": self.api_key,
+            "Authorization": f"Bearer {self.access_token}",
+            "IG-ACCOUNT-ID": self.account_id,
             "Content-Type": "application/json",
             "Accept": "application/json; charset=UTF-8",
-            "Version": "1"
         }
 
-        try:
-            response = self.session.post(
-                f"{self.base_url}/session/refresh-token",
-                headers=headers,
-                json={"refresh_token": self.refresh_token}
-            )
+    def _clear_session(self) -> None:
+        self._auth_headers = None
+        self.access_token = None
+        self.refresh_token = None
+        self.token_expiry = None
 
-            if response.status_code == 200:
-                response_data = response.json()
-                self.access_token = response_data.get('access_token')
-                self.refresh_token = response_data.get('refresh_token')
-                expires_in = int(response_data.get('expires_in', 0))
-                self.token_expiry = datetime.now() + timedelta(seconds=expires_in)
-                logger.info("Successfully refreshed access token")
-                return True
-            else:
-                logger.error(f"Failed to refresh token: {response.status_code}")
+    def start_token_refresher(self) -> None:
+        """Renew tokens in the background so request paths never block on auth"""
+        self.token_refresher.start()
+
+    @TRACER.traced("ig.refresh_access_token")
+    def refresh_access_token(self) -> bool:
+        """Refresh the access token using the refresh token"""
+        with self._auth_lock:
+            if not self.refresh_token:
+                logger.error("No refresh token available")
                 return False
-        except Exception as e:
-            logger.error(f"Error refreshing token: {str(e)}")
-            return False
 
+            headers = {
+                "X-IG-API-KEY": self.api_key,
+                "Content-Type": "application/json",
+                "Accept": "application/json; charset=UTF-8",
+                "Version": "1"
+            }
+
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/session/refresh-token",
+                    headers=headers,
+                    json={"refresh_token": self.refresh_token},
+                    timeout=30,
+                )
+
+                if response.status_code == 200:
+                    self._set_session(response.json())
+                    logger.info("Successfully refreshed access token")
+                    return True
+                else:
+                    logger.error(f"Failed to refresh token: {response.status_code}")
+                    return False
+            except Exception as e:
+                logger.error(f"Error refreshing token: {str(e)}")
+                return False
 
     def _handle_rate_limit(self, response: requests.Response) -> bool:
         """Handle rate limiting errors"""
         if response.status_code == 429:
             retry_after = int(response.headers.get("Retry-After", 60))
             logger.warning(f"Rate limit exceeded, waiting {retry_after} seconds")
+            RATE_LIMIT_WAITS.inc(reason="http_429")
+            RATE_LIMIT_WAIT_SECONDS.inc(retry_after, reason="http_429")
             time.sleep(retry_after)
             return True
 
@@ -115,6 +265,8 @@ class IGClient:
             or "exceeded-account-allowance" in error_code
         ):
             logger.warning(f"API limit exceeded: {error_code}")
+            RATE_LIMIT_WAITS.inc(reason="allowance")
+            RATE_LIMIT_WAIT_SECONDS.inc(60, reason="allowance")
             time.sleep(60)  # Wait for 1 minute
             return True
 
@@ -139,22 +291,32 @@ class IGClient:
         
     def ensure_token_valid(self):
         """Ensure the access token is valid, refresh if needed"""
-        if not self.token_expiry or not self.access_token:
+        expiry = self.token_expiry
+        if not expiry or not self.access_token:
             raise IGAPIError("No valid session - needs new login")
 
-        # Refresh if token expires in less than 15 seconds
-        if datetime.now() + timedelta(seconds=15) >= self.token_expiry:
+        # Fast path: the background refresher renews well ahead of expiry
+        if datetime.now() + timedelta(seconds=15) < expiry:
+            return
+
+        with self._auth_lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self.token_expiry and datetime.now() + timedelta(seconds=15) < self.token_expiry:
+                return
+
             logger.info("Token expiring soon, attempting refresh...")
             success = self.refresh_access_token()
             if not success:
-                self.access_token = None
-                self.refresh_token = None
-                self.token_expiry = None
+                self._clear_session()
                 raise IGAPIError("Session expired - needs new login")
 
+    @TRACER.traced("ig.login")
     def login(self):
         """Authenticate with the IG API"""
-        
+        with self._auth_lock:
+            return self._login()
+
+    def _login(self):
         try:
             self._validate_credentials()
             
@@ -171,17 +333,16 @@ class IGClient:
                 json={"identifier": self.username, "password": self.password}
             )
 
-            logger.info(f"Login response status: {response.status_code}")
-            logger.info(f"Login response body: {response.text}")
+            logger.info("Login response status: %s", response.status_code)
+            log_payload(logger, "ig_client", "Login response body", response.text)
 
             if response.status_code == 200:
                 response_data = response.json()
-                self.account_id = response_data.get('accountId')
-                oauth_token = response_data.get('oauthToken', {})
-                self.access_token = oauth_token.get('access_token')
-                self.refresh_token = oauth_token.get('refresh_token')
-                expires_in = int(oauth_token.get('expires_in', 0))
-                self.token_expiry = datetime.now() + timedelta(seconds=expires_in)
+                self.lightstreamer_endpoint = response_data.get('lightstreamerEndpoint')
+                self._set_session(
+                    response_data.get('oauthToken', {}),
+                    account_id=response_data.get('accountId'),
+                )
                 logger.info("Successfully authenticated with IG API")
                 return True
 
@@ -202,42 +363,74 @@ class IGClient:
     def get_headers(self, version: str = "2") -> Dict:
         """Get headers for API requests"""
         self.ensure_token_valid()
-        
-        return {
-            "X-IG-API-KEY": self.api_key,
-            "Authorization": f"Bearer {self.access_token}",
-            "IG-ACCOUNT-ID": self.account_id,
-            "Content-Type": "application/json",
-            "Accept": "application/json; charset=UTF-8",
-            "Version": version
-        }
 
-    def get_positions(self) -> Dict:
-        """Fetch current positions"""
+        headers = dict(self._auth_headers or {})
+        headers["Version"] = version
+        return headers
+
+    def get_streaming_credentials(self) -> Dict:
+        """Fetch the CST/XST session tokens needed to log in to Lightstreamer"""
         try:
-            # First ensure token is valid
-            self.ensure_token_valid()
-            if not self.access_token:
-                raise IGAPIError("Not authenticated - please log in first")
+            response = self.session.get(
+                f"{self.base_url}/session",
+                headers=self.get_headers(version="1"),
+                params={"fetchSessionTokens": "true"},
+                timeout=30,
+            )
 
-            # Make the request
+            if response.status_code != 200:
+                raise IGAPIError(
+                    message="Failed to fetch streaming session tokens",
+                    status_code=response.status_code,
+                    response_text=response.text
+                )
+
+            cst = response.headers.get("CST")
+            security_token = response.headers.get("X-SECURITY-TOKEN")
+            if not cst or not security_token:
+                raise IGAPIError("Streaming session tokens missing from response")
+
+            response_data = response.json()
+            endpoint = (
+                response_data.get("lightstreamerEndpoint")
+                or self.lightstreamer_endpoint
+            )
+            if not endpoint:
+                raise IGAPIError("No Lightstreamer endpoint available")
+
+            return {
+                "endpoint": endpoint,
+                "user": response_data.get("accountId") or self.account_id,
+                "password": f"CST-{cst}|XST-{security_token}",
+            }
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Network error while fetching streaming tokens: {str(e)}")
+            raise IGAPIError(f"Network error occurred while fetching streaming tokens: {str(e)}")
+
+    @TRACER.traced("ig.get_positions")
+    def get_positions(self) -> Dict:
+        """Fetch current positions, sharing any identical in-flight request"""
+        return self.single_flight.do(("/positions", None), self._fetch_positions)
+
+    def _fetch_positions(self) -> Dict:
+        """Fetch current positions from the API"""
+        try:
             response = self.session.get(
                 f"{self.base_url}/positions",
                 headers=self.get_headers(version="1"),  # Note we're using version 1 here
                 timeout=30
             )
 
-            logger.debug(f"Position response status: {response.status_code}")
-            logger.debug(f"Position response text: {response.text}")
+            logger.debug("Position response status: %s", response.status_code)
+            log_payload(logger, "ig_client", "Position response text", response.text)
 
             if response.status_code == 200:
-                logger.info("Successfully fetched positions")
+                logger.debug("Successfully fetched positions")
                 return response.json()
             elif response.status_code == 401:
                 # Clear tokens and raise error
-                self.access_token = None
-                self.refresh_token = None
-                self.token_expiry = None
+                self._clear_session()
                 raise IGAPIError(
                     message="Session expired - needs new login",
                     status_code=response.status_code,
@@ -260,22 +453,66 @@ class IGClient:
             logger.error(f"Unexpected error while fetching positions: {str(e)}")
             raise IGAPIError(f"An unexpected error occurred while fetching positions: {str(e)}")
     
-    def get_market_data(self, epic: str) -> Dict:
+    @TRACER.traced("ig.get_market_data", _epic_attributes)
+    def get_market_data(self, epic: str, use_cache: bool = True) -> Dict:
         """
         Fetch details for a specific market by its epic code
 
         Args:
             epic: The epic identifier for the market
+            use_cache: Serve from the TTL cache; pass False on order-critical paths
 
         Returns:
             dict: Market details including price, volatility, etc.
         """
+        # Order-critical reads must not pick up a response already in flight
+        fetch = self._fetch_market_data if use_cache else self._request_market_data
+        return self.market_cache.get(epic, fetch, use_cache=use_cache)
+
+    @TRACER.traced("ig.get_market_data_many")
+    def get_market_data_many(self, epics: Iterable[str], use_cache: bool = True) -> Dict[str, Dict]:
+        """
+        Fetch several markets at once
+
+        Cached epics are served as in get_market_data; the rest are fetched
+        concurrently on the async client, under this client's rate budget and
+        session. Epics that fail map to {"error": ...}.
+        """
+        return self.market_cache.get_many(
+            epics, self._fetch_market_data, self._request_market_data_many, use_cache=use_cache
+        )
+
+    def _request_market_data_many(self, epics: List[str]) -> Dict[str, Dict]:
+        return self._async_facade().get_market_data_many(epics)
+
+    def _async_facade(self):
+        """Async client sharing this client's session and rate budget, built on first use"""
+        with self._async_lock:
+            if self._async_client is None:
+                # Imported here: the async client imports this module
+                from app.services.async_ig_client import AsyncIGClient, SyncIGClientFacade
+
+                self._async_client = SyncIGClientFacade(AsyncIGClient.from_client(self))
+                atexit.register(self._async_client.close)
+            return self._async_client
+
+    def get_cache_stats(self) -> Dict:
+        """Get market data cache hit rate and age metrics"""
+        stats = self.market_cache.stats()
+        stats["single_flight"] = self.single_flight.stats()
+        stats["rate_budget"] = self.rate_budget.stats()
+        return stats
+
+    def _fetch_market_data(self, epic: str) -> Dict:
+        """Fetch market details, bypassing the cache but sharing in-flight requests"""
+        return self.single_flight.do(
+            (f"/markets/{epic}", None), lambda: self._request_market_data(epic)
+        )
+
+    def _request_market_data(self, epic: str) -> Dict:
+        """Fetch market details from the API"""
         try:
             self._rate_limit()
-            self.ensure_token_valid()
-            
-            if not self.access_token:
-                raise IGAPIError("Not authenticated - please log in first")
 
             response = self.session.get(
                 f"{self.base_url}/markets/{epic}",
@@ -283,26 +520,8 @@ class IGClient:
             )
 
             if response.status_code == 200:
-                data = response.json()
-                snapshot = data.get("snapshot", {})
-                instrument = data.get("instrument", {})
-
-                # Process the data like in the original
-                market_data = {
-                    "bid": float(snapshot.get("bid", 0)),
-                    "offer": float(snapshot.get("offer", 0)),
-                    "price": (float(snapshot.get("bid", 0)) + float(snapshot.get("offer", 0))) / 2,
-                    "high": float(snapshot.get("high", 0)),
-                    "low": float(snapshot.get("low", 0)),
-                    "update_time": snapshot.get("updateTime"),
-                    "volatility": max(0.001, abs(float(snapshot.get("percentageChange", 0.1)) / 100)),
-                    "instrument_type": instrument.get("type", ""),
-                    "market_status": snapshot.get("marketStatus", ""),
-                    "strike_price": float(instrument.get("strikePrice", 0)),
-                    "expiry": instrument.get("expiry", ""),
-                }
-                
-                logger.info(f"Successfully fetched market data for {epic}")
+                market_data = parse_market_data(response.json())
+                logger.debug("Successfully fetched market data for %s", epic)
                 return market_data
                 
             elif response.status_code == 401:
@@ -319,6 +538,53 @@ class IGClient:
             logger.error(f"Unexpected error while fetching market details: {str(e)}")
             raise IGAPIError(f"An unexpected error occurred while fetching market details: {str(e)}")
 
+    @TRACER.traced("ig.get_historical_prices", _epic_attributes)
+    def get_historical_prices(
+        self, epic: str, resolution: str, start: datetime, end: datetime
+    ) -> List[Dict]:
+        """
+        Fetch historical bars from the /prices endpoint
+
+        Args:
+            epic: The epic identifier for the market
+            resolution: IG resolution name, e.g. MINUTE_5, HOUR, DAY
+            start: Range start (naive datetimes are UTC)
+            end: Range end (naive datetimes are UTC)
+
+        Returns:
+            list: Bars with epoch-second time and mid open/high/low/close/volume
+        """
+        try:
+            self._rate_limit()
+
+            response = self.session.get(
+                f"{self.base_url}/prices/{epic}",
+                headers=self.get_headers(version="3"),
+                params={
+                    "resolution": resolution,
+                    "from": start.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "to": end.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "pageSize": 0,
+                },
+                timeout=60,
+            )
+
+            if response.status_code != 200:
+                raise IGAPIError(
+                    message="Failed to fetch historical prices from IG API",
+                    status_code=response.status_code,
+                    response_text=response.text
+                )
+
+            bars = [parse_price_bar(bar) for bar in response.json().get("prices", [])]
+            logger.debug("Fetched %s %s bars for %s", len(bars), resolution, epic)
+            return bars
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Network error while fetching historical prices: {str(e)}")
+            raise IGAPIError(f"Network error occurred while fetching historical prices: {str(e)}")
+
+    @TRACER.traced("ig.create_position", _order_attributes)
     def create_position(
         self,
         epic: str,
@@ -327,12 +593,11 @@ class IGClient:
         order_type: OrderType = OrderType.MARKET,
         limit_level: Optional[float] = None,
         time_in_force: str = "EXECUTE_AND_ELIMINATE",
+        account_id: Optional[str] = None,
     ) -> Dict:
         try:
-            # Determine the CFD account ID
-            cfd_account_id = os.getenv("IG_CFD_ACCOUNT", self.account_id)
-
-            logger.info(f"Using account ID for position creation: {cfd_account_id}")
+            account_id = account_id or self.account_id
+            logger.info("Using account ID for position creation: %s", account_id)
 
             # Robust size validation and formatting
             try:
@@ -353,7 +618,7 @@ class IGClient:
                 }
 
             # Get market data for price validation
-            market_data = self.get_market_data(epic)
+            market_data = self.get_market_data(epic, use_cache=False)
             if not market_data:
                 return {"error": "Failed to get market data"}
 
@@ -385,10 +650,15 @@ class IGClient:
             elif order_type == OrderType.QUOTE:  # type: ignore
                 return {"error": "Quote orders not supported"}
 
-            logger.info(f"Sending order: {base_order}")
+            logger.info("Sending %s order for %s size %s", direction.value, epic, formatted_size)
+            log_payload(logger, "orders", "Order payload", base_order)
+            headers = self.get_headers()
+            if account_id:
+                # IG routes the order to the account named in the header
+                headers["IG-ACCOUNT-ID"] = account_id
             response = self.session.post(
                 f"{self.base_url}/positions/otc",
-                headers=self.get_headers(),
+                headers=headers,
                 json=base_order,
                 timeout=30,
             )
@@ -396,20 +666,26 @@ class IGClient:
             # Detailed response handling
             if response.status_code == 200:
                 result = response.json()
-                logger.info(f"Order created successfully: {result}")
+                logger.info("Order created successfully: %s", result.get("dealReference"))
+                log_payload(logger, "orders", "Order response", result)
 
                 if "dealReference" in result:
+                    ORDERS.inc(direction=direction.value, result="accepted")
                     return {
                         "dealId": result["dealReference"],
                         "dealReference": result["dealReference"],
+                        # Touch at submission, for slippage against mid
+                        "quote": {"bid": market_data.get("bid"), "offer": market_data.get("offer")},
                     }
 
+                ORDERS.inc(direction=direction.value, result="rejected")
                 logger.error(f"No dealReference found in successful response: {result}")
                 return {
                     "error": "Position creation succeeded but no deal reference found",
                     "raw_result": result,
                 }
 
+            ORDERS.inc(direction=direction.value, result="rejected")
             # Detailed error parsing
             try:
                 error_data = response.json()
@@ -453,24 +729,24 @@ class IGClient:
 
     def _rate_limit(self) -> None:
         """Implement rate limiting"""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
-
-        if elapsed < self.request_interval:
-            time.sleep(self.request_interval - elapsed)
-
-        self.last_request_time = time.time()
-
+        delay = self.rate_budget.reserve()
+        if delay > 0:
+            RATE_LIMIT_WAITS.inc(reason="throttle")
+            RATE_LIMIT_WAIT_SECONDS.inc(delay, reason="throttle")
+            with TRACER.span("ig.rate_limit", reason="throttle"):
+                time.sleep(delay)
+
+    @TRACER.traced("ig.create_hedge_position", _order_attributes)
     def create_hedge_position(
         self, epic: str, direction: OrderDirection, size: float
     ) -> Dict:
         """Create a CFD hedge position with robust account switching"""
         try:
             # Logging the original epic and input parameters for debugging
-            logger.info(f"Creating hedge position:")
-            logger.info(f"Original epic: {epic}")
-            logger.info(f"Direction: {direction}")
-            logger.info(f"Size: {size}")
+            logger.info(
+                "Creating hedge position: epic=%s direction=%s size=%s",
+                epic, direction, size,
+            )
 
             epic = "IX.D.SPTRD.IFS.IP"
             # Ensure we're using the CFD account
@@ -478,48 +754,25 @@ class IGClient:
             if not cfd_account_id:
                 return {"error": "CFD account ID not configured"}
 
-            # Temporarily switch to CFD account
-            try:
-                # Login with CFD account
-                if not self.login(account_type="cfd"):
-                    return {"error": "Failed to authenticate CFD account"}
-
-                # Create CFD position
-                result = self.create_position(
-                    epic=epic,
-                    direction=direction,
-                    size=size,
-                    order_type=OrderType.MARKET,
-                )
-
-                # Switch back to options account
-                self.login(account_type="options")
+            # The CFD account is addressed per request rather than by re-logging in,
+            # which would swap the session under concurrent hedges
+            result = self.create_position(
+                epic=epic,
+                direction=direction,
+                size=size,
+                order_type=OrderType.MARKET,
+                account_id=cfd_account_id,
+            )
 
-                # Log the result
-                if "dealId" in result or "dealReference" in result:
-                    logger.info(f"Hedge position created successfully: {result}")
-                    return result
-                else:
-                    logger.error(f"Failed to create hedge position: {result}")
-                    return {
-                        "error": "Failed to create hedge position",
-                        "details": result,
-                    }
+            if "dealId" in result or "dealReference" in result:
+                logger.info(f"Hedge position created successfully: {result}")
+                return result
 
-            except Exception as e:
-                # Ensure we switch back to options account even if an error occurs
-                try:
-                    self.login(account_type="options")
-                except Exception:
-                    logger.error(
-                        "Failed to switch back to options account after hedge error"
-                    )
-
-                logger.error(f"Comprehensive error creating hedge position: {str(e)}")
-                return {
-                    "error": "Comprehensive hedge position creation error",
-                    "details": str(e),
-                }
+            logger.error(f"Failed to create hedge position: {result}")
+            return {
+                "error": "Failed to create hedge position",
+                "details": result,
+            }
 
         except Exception as e:
             logger.error(
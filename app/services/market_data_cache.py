@@ -0,0 +1,170 @@
+# app/services/market_data_cache.py
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from app.core.metrics import MARKET_CACHE_LOOKUPS
+from config.settings import CACHE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataCache:
+    """TTL cache for market snapshots with stale-while-revalidate refreshes"""
+
+    def __init__(
+        self,
+        option_ttl: float = CACHE_SETTINGS["option_ttl"],
+        underlying_ttl: float = CACHE_SETTINGS["underlying_ttl"],
+        max_stale: float = CACHE_SETTINGS["max_stale"],
+    ):
+        self.option_ttl = float(option_ttl)
+        self.underlying_ttl = float(underlying_ttl)
+        self.max_stale = float(max_stale)
+        self.option_prefixes = tuple(CACHE_SETTINGS["option_epic_prefixes"])
+
+        self._entries: Dict[str, Dict] = {}
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.refresh_errors = 0
+
+    def ttl_for(self, epic: str) -> float:
+        """TTL for an epic based on its class (option vs underlying)"""
+        if epic.startswith(self.option_prefixes):
+            return self.option_ttl
+        return self.underlying_ttl
+
+    def get(self, epic: str, fetch: Callable[[str], Dict], use_cache: bool = True) -> Dict:
+        """
+        Return market data for an epic.
+
+        Fresh entries are served directly. Entries past their TTL but within
+        max_stale are served as-is while a background thread refetches them.
+        With use_cache=False the network is always hit and the entry replaced.
+        """
+        if not use_cache:
+            self._count_bypass()
+            return self._store(epic, fetch(epic))
+
+        data = self._lookup(epic, fetch)
+        if data is not None:
+            return data
+        return self._store(epic, fetch(epic))
+
+    def get_many(
+        self,
+        epics: Iterable[str],
+        fetch: Callable[[str], Dict],
+        fetch_many: Callable[[List[str]], Dict[str, Dict]],
+        use_cache: bool = True,
+    ) -> Dict[str, Dict]:
+        """
+        Return market data for several epics, fetching all misses in one call.
+
+        Lookups behave as in get(); fetch is only used for background refreshes
+        of stale entries. fetch_many maps each missing epic to its data or to
+        {"error": ...}; errors are returned but not cached.
+        """
+        results: Dict[str, Dict] = {}
+        missing: List[str] = []
+        for epic in dict.fromkeys(epics):
+            if not use_cache:
+                self._count_bypass()
+                missing.append(epic)
+                continue
+            data = self._lookup(epic, fetch)
+            if data is None:
+                missing.append(epic)
+            else:
+                results[epic] = data
+
+        if missing:
+            fetched = fetch_many(missing)
+            for epic in missing:
+                data = fetched.get(epic) or {"error": "No market data returned"}
+                results[epic] = data if "error" in data else self._store(epic, data)
+        return results
+
+    def _count_bypass(self) -> None:
+        with self._lock:
+            self.bypasses += 1
+        MARKET_CACHE_LOOKUPS.inc(result="bypass")
+
+    def _lookup(self, epic: str, fetch: Callable[[str], Dict]) -> Optional[Dict]:
+        """Cached data for an epic (refreshing it in the background when stale), or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(epic)
+            if entry:
+                age = now - entry["fetched_at"]
+                if age <= self.ttl_for(epic):
+                    self.hits += 1
+                    MARKET_CACHE_LOOKUPS.inc(result="hit")
+                    return dict(entry["data"])
+                if age <= self.max_stale:
+                    self.stale_hits += 1
+                    MARKET_CACHE_LOOKUPS.inc(result="stale")
+                    if epic not in self._refreshing:
+                        self._refreshing.add(epic)
+                        threading.Thread(
+                            target=self._refresh,
+                            args=(epic, fetch),
+                            name=f"market-refresh-{epic}",
+                            daemon=True,
+                        ).start()
+                    return dict(entry["data"])
+            self.misses += 1
+        MARKET_CACHE_LOOKUPS.inc(result="miss")
+        return None
+
+    def invalidate(self, epic: Optional[str] = None) -> None:
+        with self._lock:
+            if epic is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(epic, None)
+
+    def _store(self, epic: str, data: Dict) -> Dict:
+        with self._lock:
+            self._entries[epic] = {"data": data, "fetched_at": time.monotonic()}
+        return dict(data)
+
+    def _refresh(self, epic: str, fetch: Callable[[str], Dict]) -> None:
+        try:
+            self._store(epic, fetch(epic))
+        except Exception as e:
+            with self._lock:
+                self.refresh_errors += 1
+            logger.warning(f"Background refresh failed for {epic}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(epic)
+
+    def stats(self) -> Dict:
+        """Hit rate and entry age metrics"""
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - entry["fetched_at"] for entry in self._entries.values()]
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "refresh_errors": self.refresh_errors,
+                "refreshing": len(self._refreshing),
+                "hit_rate": (
+                    round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+                ),
+                "avg_age": round(sum(ages) / len(ages), 3) if ages else 0.0,
+                "max_age": round(max(ages), 3) if ages else 0.0,
+                "ttl": {"option": self.option_ttl, "underlying": self.underlying_ttl},
+            }
@@ -0,0 +1,274 @@
+# app/services/price_history.py
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import HISTORY_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    "time": np.int64,  # bar open, epoch seconds UTC
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+}
+
+RESOLUTION_SECONDS = {
+    "SECOND": 1,
+    "MINUTE": 60,
+    "MINUTE_2": 120,
+    "MINUTE_3": 180,
+    "MINUTE_5": 300,
+    "MINUTE_10": 600,
+    "MINUTE_15": 900,
+    "MINUTE_30": 1800,
+    "HOUR": 3600,
+    "HOUR_2": 7200,
+    "HOUR_3": 10800,
+    "HOUR_4": 14400,
+    "DAY": 86400,
+    "WEEK": 604800,
+    "MONTH": 2592000,
+}
+
+Range = Tuple[int, int]
+
+
+def to_epoch(value: datetime) -> int:
+    """Epoch seconds for a datetime; naive values are taken as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def from_epoch(value: int) -> datetime:
+    """Naive UTC datetime for epoch seconds"""
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+def _merge_ranges(ranges: List[Range]) -> List[Range]:
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(covered: List[Range], start: int, end: int) -> List[Range]:
+    """Sub-ranges of [start, end] not covered by any of the (merged) ranges"""
+    gaps: List[Range] = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end < cursor:
+            continue
+        if c_start > end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, c_start - 1))
+        cursor = max(cursor, c_end + 1)
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class _Series:
+    """
+    Columnar files for one (epic, resolution), kept sorted by bar time.
+
+    Bars newer than everything stored are appended in place. A backfill that
+    lands before the last stored bar is merged into a new generation of the
+    column files, which the meta file switches to atomically, so reads can
+    always binary-search the time column.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.meta_path = directory / "meta.json"
+        self.lock = threading.Lock()
+        if self.meta_path.exists():
+            self.meta = json.loads(self.meta_path.read_text())
+            self.meta["ranges"] = [tuple(r) for r in self.meta["ranges"]]
+            self.meta.setdefault("generation", 0)
+            # Series written before backfills were merged may be out of order
+            if not self.meta.pop("sorted", True):
+                self._rewrite(_sorted(self._load(self.meta["rows"])))
+        else:
+            self.meta = {"rows": 0, "ranges": [], "last_time": None, "generation": 0}
+
+    def _column_path(self, name: str, generation: Optional[int] = None) -> Path:
+        generation = self.meta["generation"] if generation is None else generation
+        suffix = f".{generation}" if generation else ""
+        return self.directory / f"{name}{suffix}.bin"
+
+    def _load(self, rows: int) -> Dict[str, np.ndarray]:
+        if rows == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        return {
+            name: np.memmap(self._column_path(name), dtype=dtype, mode="r", shape=(rows,))
+            for name, dtype in COLUMNS.items()
+        }
+
+    def append(self, columns: Dict[str, np.ndarray], fetched: Range) -> None:
+        rows = len(columns["time"])
+        if rows:
+            columns = _sorted(columns)
+            previous_last = self.meta["last_time"]
+            if previous_last is None or int(columns["time"][0]) > previous_last:
+                self._append_in_place(columns)
+            else:
+                self._merge(columns)
+            self.meta["last_time"] = max(int(columns["time"][-1]), previous_last or 0)
+
+        self.meta["ranges"] = _merge_ranges(self.meta["ranges"] + [fetched])
+        self._write_meta()
+
+    def _append_in_place(self, columns: Dict[str, np.ndarray]) -> None:
+        # Truncate any bytes past the committed row count left by a crash
+        for name, dtype in COLUMNS.items():
+            path = self._column_path(name)
+            committed = self.meta["rows"] * np.dtype(dtype).itemsize
+            with open(path, "ab") as f:
+                if f.tell() != committed:
+                    f.truncate(committed)
+                    f.seek(committed)
+                f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+        self.meta["rows"] += len(columns["time"])
+
+    def _merge(self, columns: Dict[str, np.ndarray]) -> None:
+        stored = self._load(self.meta["rows"])
+        positions = np.searchsorted(stored["time"], columns["time"], side="right")
+        self._rewrite(
+            {name: np.insert(np.asarray(stored[name]), positions, columns[name]) for name in COLUMNS}
+        )
+
+    def _rewrite(self, columns: Dict[str, np.ndarray]) -> None:
+        """Write columns as the next generation and switch the meta file to it"""
+        old_generation = self.meta["generation"]
+        generation = old_generation + 1
+        for name, dtype in COLUMNS.items():
+            with open(self._column_path(name, generation), "wb") as f:
+                f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+        self.meta["generation"] = generation
+        self.meta["rows"] = len(columns["time"])
+        self._write_meta()
+        for name in COLUMNS:
+            try:
+                os.remove(self._column_path(name, old_generation))
+            except FileNotFoundError:
+                pass
+
+    def _write_meta(self) -> None:
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.meta))
+        os.replace(tmp_path, self.meta_path)
+
+    def read(self, start: int, end: int) -> Dict[str, np.ndarray]:
+        maps = self._load(self.meta["rows"])
+        lo, hi = np.searchsorted(maps["time"], [start, end + 1])
+        return {name: np.asarray(column[lo:hi]) for name, column in maps.items()}
+
+
+def _sorted(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    times = np.asarray(columns["time"])
+    if np.all(times[1:] >= times[:-1]):
+        return columns
+    order = np.argsort(times, kind="stable")
+    return {name: np.asarray(column)[order] for name, column in columns.items()}
+
+
+class PriceHistoryStore:
+    """
+    On-disk cache of historical bars per epic and resolution.
+
+    Bars live in one binary file per column, sorted by time, and are read
+    back through np.memmap, so a query only touches the pages it slices. The
+    meta file records which time ranges have already been fetched; a query
+    fetches only the gaps and appends them.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, str, datetime, datetime], List[Dict]],
+        root: Optional[str] = None,
+    ):
+        self.fetch = fetch
+        self.root = Path(root or os.getenv("PRICE_CACHE_DIR", HISTORY_SETTINGS["cache_dir"]))
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+
+    def _get_series(self, epic: str, resolution: str) -> _Series:
+        key = (epic, resolution)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                safe_epic = re.sub(r"[^A-Za-z0-9._-]", "_", epic)
+                series = _Series(self.root / safe_epic / resolution)
+                self._series[key] = series
+            return series
+
+    def get_bars(
+        self, epic: str, resolution: str, start: datetime, end: datetime
+    ) -> Dict[str, np.ndarray]:
+        """Return bars in [start, end] as column arrays, fetching only missing ranges"""
+        if resolution not in RESOLUTION_SECONDS:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+
+        step = RESOLUTION_SECONDS[resolution]
+        # The most recent bar may still be forming, so never mark it as fetched
+        settled_ts = to_epoch(datetime.now(timezone.utc)) - step
+        start_ts = to_epoch(start)
+        end_ts = to_epoch(end)
+
+        series = self._get_series(epic, resolution)
+        with series.lock:
+            for gap_start, gap_end in missing_ranges(series.meta["ranges"], start_ts, end_ts):
+                self._fill(series, epic, resolution, gap_start, gap_end, settled_ts)
+            return series.read(start_ts, end_ts)
+
+    def _fill(
+        self,
+        series: _Series,
+        epic: str,
+        resolution: str,
+        gap_start: int,
+        gap_end: int,
+        settled_ts: int,
+    ) -> None:
+        logger.info(
+            "Fetching %s %s history %s..%s", epic, resolution, gap_start, gap_end
+        )
+        bars = self.fetch(
+            epic,
+            resolution,
+            from_epoch(gap_start),
+            from_epoch(gap_end),
+        )
+        columns = bars_to_columns(bars)
+        keep = (columns["time"] >= gap_start) & (columns["time"] <= min(gap_end, settled_ts))
+        columns = {name: column[keep] for name, column in columns.items()}
+
+        covered_end = min(gap_end, settled_ts)
+        if covered_end >= gap_start:
+            series.append(columns, (gap_start, covered_end))
+
+
+def bars_to_columns(bars: List[Dict]) -> Dict[str, np.ndarray]:
+    """Convert IGClient.get_historical_prices bars into column arrays"""
+    columns = {name: np.empty(len(bars), dtype=dtype) for name, dtype in COLUMNS.items()}
+    for i, bar in enumerate(bars):
+        for name in COLUMNS:
+            columns[name][i] = bar[name]
+    return columns
@@ -0,0 +1,256 @@
+# app/services/price_stream.py
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import unquote
+
+import requests
+
+from config.settings import STREAM_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Lightstreamer text protocol (TLCP) revision spoken by the IG streaming gateway
+TLCP_VERSION = "TLCP-2.0.0"
+PRICE_FIELDS = ["BID", "OFFER", "UPDATE_TIME", "MARKET_STATE"]
+
+
+class PriceBoard:
+    """Thread-safe board of the latest quote per epic"""
+
+    def __init__(self, max_age: float = STREAM_SETTINGS["max_quote_age"]):
+        self.max_age = float(max_age)
+        self._quotes: Dict[str, Dict] = {}
+        self._updated_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def update(self, epic: str, fields: Dict) -> None:
+        """Merge new fields into the quote for an epic and stamp it"""
+        with self._lock:
+            quote = dict(self._quotes.get(epic, {}))
+            quote.update(fields)
+            bid = float(quote.get("bid") or 0)
+            offer = float(quote.get("offer") or 0)
+            if bid > 0 and offer > 0:
+                quote["price"] = (bid + offer) / 2
+            self._quotes[epic] = quote
+            self._updated_at[epic] = time.monotonic()
+
+    def get(self, epic: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Return a copy of the quote, or None if it is missing or stale"""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            updated_at = self._updated_at.get(epic)
+            if updated_at is None or time.monotonic() - updated_at > max_age:
+                return None
+            return dict(self._quotes[epic])
+
+    def age(self, epic: str) -> Optional[float]:
+        """Seconds since the last update for an epic"""
+        with self._lock:
+            updated_at = self._updated_at.get(epic)
+        return None if updated_at is None else time.monotonic() - updated_at
+
+    def is_stale(self, epic: str, max_age: Optional[float] = None) -> bool:
+        age = self.age(epic)
+        return age is None or age > (self.max_age if max_age is None else max_age)
+
+    def epics(self) -> List[str]:
+        with self._lock:
+            return list(self._quotes)
+
+    def status(self) -> Dict:
+        """Summary of board contents for diagnostics"""
+        now = time.monotonic()
+        with self._lock:
+            ages = {epic: now - ts for epic, ts in self._updated_at.items()}
+        return {
+            "epics": len(ages),
+            "stale": sum(1 for age in ages.values() if age > self.max_age),
+            "max_age": self.max_age,
+            "ages": {epic: round(age, 3) for epic, age in ages.items()},
+        }
+
+
+class PriceStreamClient:
+    """Minimal Lightstreamer (TLCP) client feeding bid/offer into a PriceBoard"""
+
+    def __init__(self, ig_client, board: Optional[PriceBoard] = None):
+        self.ig_client = ig_client
+        self.board = board or PriceBoard()
+        self.http = requests.Session()
+        self.reconnect_delay = float(STREAM_SETTINGS["reconnect_delay"])
+        self.connected = False
+
+        self._epics: List[str] = []
+        self._sub_ids: Dict[int, str] = {}
+        self._session_id: Optional[str] = None
+        self._control_url: Optional[str] = None
+        self._request_id = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, epics: Iterable[str] = ()) -> None:
+        """Start the streaming thread and subscribe to the given epics"""
+        for epic in epics:
+            if epic not in self._epics:
+                self._epics.append(epic)
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="price-stream", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.connected = False
+        self.http.close()
+
+    def subscribe(self, epics: Iterable[str]) -> None:
+        """Subscribe to additional epics; already subscribed ones are ignored"""
+        with self._lock:
+            new_epics = [e for e in epics if e and e not in self._epics]
+            self._epics.extend(new_epics)
+        if self.connected:
+            for epic in new_epics:
+                self._add_subscription(epic)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._stream_session()
+            except Exception as e:
+                logger.warning(f"Price stream disconnected: {str(e)}")
+            self.connected = False
+            if not self._stop.is_set():
+                self._stop.wait(self.reconnect_delay)
+
+    def _stream_session(self) -> None:
+        """Open a streaming session and process it until it ends"""
+        credentials = self.ig_client.get_streaming_credentials()
+        endpoint = credentials["endpoint"].rstrip("/")
+        self._control_url = f"{endpoint}/lightstreamer/control.txt"
+        self._sub_ids = {}
+
+        response = self.http.post(
+            f"{endpoint}/lightstreamer/create_session.txt",
+            params={"LS_protocol": TLCP_VERSION},
+            data={
+                "LS_user": credentials["user"],
+                "LS_password": credentials["password"],
+                "LS_adapter_set": "DEFAULT",
+                "LS_cid": STREAM_SETTINGS["client_id"],
+                "LS_keepalive_millis": int(STREAM_SETTINGS["keepalive"] * 1000),
+            },
+            stream=True,
+            timeout=(10, STREAM_SETTINGS["keepalive"] * 3),
+        )
+        if response.status_code != 200:
+            raise ConnectionError(f"Stream session rejected: HTTP {response.status_code}")
+
+        for raw_line in response.iter_lines(decode_unicode=True):
+            if self._stop.is_set():
+                break
+            if raw_line:
+                if not self._handle_line(raw_line):
+                    break
+        response.close()
+
+    def _handle_line(self, line: str) -> bool:
+        """Process one TLCP message, returning False when the session is over"""
+        kind, _, rest = line.partition(",")
+        if kind == "U":
+            self._handle_update(rest)
+        elif kind == "CONOK":
+            self._session_id = rest.split(",")[0]
+            self.connected = True
+            logger.info(f"Price stream connected (session {self._session_id})")
+            for epic in list(self._epics):
+                self._add_subscription(epic)
+        elif kind in ("CONERR", "REQERR", "ERROR"):
+            logger.error(f"Price stream error: {line}")
+            return kind == "REQERR"
+        elif kind in ("LOOP", "END"):
+            # The server wants a fresh session; reconnect and resubscribe
+            return False
+        return True
+
+    def _handle_update(self, payload: str) -> None:
+        parts = payload.split(",", 2)
+        if len(parts) < 3:
+            return
+        epic = self._sub_ids.get(int(parts[0]))
+        if not epic:
+            return
+
+        fields: Dict = {}
+        values = decode_tlcp_values(parts[2], len(PRICE_FIELDS))
+        for name, value in zip(PRICE_FIELDS, values):
+            if value is None:
+                continue
+            if name in ("BID", "OFFER"):
+                try:
+                    fields[name.lower()] = float(value)
+                except ValueError:
+                    continue
+            elif name == "UPDATE_TIME":
+                fields["update_time"] = value
+            else:
+                fields["market_status"] = value
+
+        if fields:
+            self.board.update(epic, fields)
+
+    def _add_subscription(self, epic: str) -> None:
+        with self._lock:
+            if epic in self._sub_ids.values():
+                return
+            self._request_id += 1
+            sub_id = self._request_id
+            self._sub_ids[sub_id] = epic
+
+        try:
+            response = self.http.post(
+                self._control_url,
+                params={"LS_protocol": TLCP_VERSION, "LS_session": self._session_id},
+                data={
+                    "LS_reqId": sub_id,
+                    "LS_op": "add",
+                    "LS_subId": sub_id,
+                    "LS_group": f"MARKET:{epic}",
+                    "LS_schema": " ".join(PRICE_FIELDS),
+                    "LS_mode": "MERGE",
+                    "LS_snapshot": "true",
+                },
+                timeout=10,
+            )
+            if response.status_code != 200 or response.text.startswith("REQERR"):
+                logger.error(f"Subscription to {epic} failed: {response.text}")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Subscription to {epic} failed: {str(e)}")
+
+
+def decode_tlcp_values(payload: str, field_count: int) -> List[Optional[str]]:
+    """
+    Decode a TLCP update value list.
+
+    Returns one entry per field; None means "unchanged" and is left to the
+    previous value on the board. Null values ("#") are also reported as None.
+    """
+    values: List[Optional[str]] = []
+    for token in payload.split("|"):
+        if token == "":
+            values.append(None)
+        elif token.startswith("^") and token[1:].isdigit():
+            values.extend([None] * int(token[1:]))
+        elif token == "#":
+            values.append(None)
+        elif token == "$":
+            values.append("")
+        else:
+            values.append(unquote(token))
+    return (values + [None] * field_count)[:field_count]
@@ -0,0 +1,38 @@
+# app/services/rate_budget.py
+import threading
+import time
+from typing import Dict
+
+
+class RateBudget:
+    """
+    Request start slots spaced by a minimum interval.
+
+    One budget is shared by every client talking to the same IG account, so
+    blocking and asyncio callers draw from the same allowance. reserve() books
+    the next free slot and returns how long the caller must wait for it; the
+    caller does the sleeping, which keeps the budget usable from both worlds.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = float(interval)
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+        self.reserved = 0
+
+    def reserve(self) -> float:
+        """Book the next slot; returns the delay in seconds until it starts"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+            self.reserved += 1
+        return max(delay, 0.0)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "reserved": self.reserved,
+                "backlog": round(max(self._next_slot - time.monotonic(), 0.0), 3),
+            }
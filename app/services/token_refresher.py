@@ -0,0 +1,70 @@
+# app/services/token_refresher.py
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+from config.settings import AUTH_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRefresher:
+    """Renew an IGClient's OAuth token in the background ahead of expiry"""
+
+    def __init__(
+        self,
+        ig_client,
+        lead_time: float = AUTH_SETTINGS["refresh_lead_time"],
+        retry_delay: float = AUTH_SETTINGS["refresh_retry_delay"],
+        min_interval: float = AUTH_SETTINGS["refresh_min_interval"],
+    ):
+        self.ig_client = ig_client
+        self.lead_time = float(lead_time)
+        self.retry_delay = float(retry_delay)
+        self.min_interval = float(min_interval)
+        self.refreshes = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ig-token-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def seconds_until_refresh(self) -> float:
+        """
+        Wait before the next refresh: lead_time ahead of expiry, or halfway to
+        expiry for tokens that live less than lead_time, never below min_interval
+        """
+        expiry = self.ig_client.token_expiry
+        if not expiry:
+            return self.min_interval
+        remaining = (expiry - datetime.now()).total_seconds()
+        wait = remaining - self.lead_time if remaining > self.lead_time else remaining / 2
+        return max(wait, self.min_interval)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._stop.wait(self.seconds_until_refresh()):
+                break
+            try:
+                if self.ig_client.refresh_access_token() or self.ig_client.login():
+                    self.refreshes += 1
+                    continue
+            except Exception as e:
+                logger.error(f"Background token refresh failed: {str(e)}")
+            self.failures += 1
+            self._stop.wait(self.retry_delay)
@@ -0,0 +1,76 @@
+# benchmarks/__main__.py
+import argparse
+import logging
+import sys
+
+from benchmarks.suite import CASES, DEFAULT_SIZES, compare, load, run_suite, save
+
+
+def _sizes(value: str):
+    return tuple(int(v) for v in value.split(",") if v)
+
+
+def _print_result(result):
+    print(
+        f"{result['case']:<42} {result['size']:>7}  "
+        f"{result['best_seconds'] * 1000:>10.3f} ms  {result['per_op_us']:>10.2f} us/op",
+        flush=True,
+    )
+
+
+def _print_comparison(rows, threshold):
+    print(f"\n{'case':<52} {'baseline us/op':>15} {'current us/op':>15} {'ratio':>7}  status")
+    for row in sorted(rows, key=lambda r: r["key"]):
+        baseline = f"{row['baseline']:.2f}" if "baseline" in row else "-"
+        current = f"{row['current']:.2f}" if "current" in row else "-"
+        ratio = f"{row['ratio']:.2f}" if "ratio" in row else "-"
+        print(f"{row['key']:<52} {baseline:>15} {current:>15} {ratio:>7}  {row['status']}")
+    print(f"(threshold: {threshold:.0%} slower than baseline)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Calculator, model and hedger benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the suite and write a JSON result file")
+    run.add_argument("--sizes", type=_sizes, default=DEFAULT_SIZES, help="comma-separated book sizes")
+    run.add_argument("--case", action="append", choices=sorted(CASES), help="repeatable; default all")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--min-time", type=float, default=0.2, help="seconds per timing round")
+    run.add_argument("--output", default="benchmarks/baselines/latest.json")
+    run.add_argument("--compare", metavar="BASELINE", help="compare against a baseline afterwards")
+    run.add_argument("--threshold", type=float, default=0.2)
+
+    cmp = sub.add_parser("compare", help="compare two result files; exit 1 on regression")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, e.g. 0.2 = 20%%")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    # The hedger logs per position and the IV solver logs every miss; keep output readable
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    if args.command == "run":
+        results = run_suite(
+            sizes=args.sizes,
+            cases=args.case,
+            repeat=args.repeat,
+            min_time=args.min_time,
+            progress=_print_result,
+        )
+        save(results, args.output)
+        print(f"Wrote {args.output}")
+        if not args.compare:
+            return 0
+        baseline, current = load(args.compare), results
+    else:
+        baseline, current = load(args.baseline), load(args.current)
+
+    rows, regressed = compare(baseline, current, args.threshold)
+    _print_comparison(rows, args.threshold)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# benchmarks/fake_ig.py
+import itertools
+import threading
+from datetime import datetime
+from typing import Dict, List
+
+from app.models.enums import OrderDirection
+from app.services.ig_client import parse_market_data, parse_price_bar
+from simulator.market import RESOLUTION_SECONDS, SyntheticBook
+
+
+class FakeIGClient:
+    """
+    In-process stand-in for IGClient backed by the simulator's SyntheticBook.
+
+    Implements the IGClient methods DeltaHedger and the API routes call,
+    with no HTTP, rate limiting or auth in the way, so benchmarks and load
+    tests measure this codebase rather than the gateway. time_scale=0
+    freezes the underlying so repeated runs price the same book.
+    """
+
+    def __init__(self, positions: int = 100, seed: int = 1, time_scale: float = 0.0):
+        self.book = SyntheticBook(size=positions, seed=seed, time_scale=time_scale)
+        self.account_id = "FAKE"
+        self.orders = 0
+        self._deal_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def login(self) -> bool:
+        return True
+
+    def start_token_refresher(self) -> None:
+        pass
+
+    def get_positions(self) -> Dict:
+        return self.book.positions_payload()
+
+    def get_market_data(self, epic: str, use_cache: bool = True) -> Dict:
+        details = self.book.market_details(epic)
+        return parse_market_data(details) if details else {}
+
+    def get_historical_prices(
+        self, epic: str, resolution: str, start: datetime, end: datetime
+    ) -> List[Dict]:
+        step = RESOLUTION_SECONDS.get(resolution, 60)
+        return [parse_price_bar(bar) for bar in self.book.price_history(epic, step, start, end)]
+
+    def create_hedge_position(
+        self, epic: str, direction: OrderDirection, size: float
+    ) -> Dict:
+        with self._lock:
+            self.orders += 1
+            reference = f"FAKEREF{next(self._deal_ids):08d}"
+        return {"dealId": reference, "dealReference": reference}
+
+    def get_cache_stats(self) -> Dict:
+        return {"hits": 0, "misses": 0, "fake": True}
+
+    def position_payloads(self) -> List[Dict]:
+        """Raw /positions items, for benchmarking model parsing"""
+        return self.get_positions()["positions"]
+
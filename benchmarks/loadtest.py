@@ -0,0 +1,287 @@
+# benchmarks/loadtest.py
+import argparse
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Operation name -> (method, path); {id} is filled with a random position id
+OPERATIONS: Dict[str, Tuple[str, str]] = {
+    "positions": ("GET", "/api/positions"),
+    "status": ("GET", "/api/hedge/status"),
+    "hedge": ("POST", "/api/hedge/{id}"),
+    "settings": ("GET", "/api/settings"),
+    "settings_update": ("PUT", "/api/settings"),
+}
+
+DEFAULT_MIX = "positions=4,status=4,hedge=1,settings=1"
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'positions=4,status=4,hedge=1' -> weights per operation"""
+    mix = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name}; choose from {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+        if mix[name] < 0:
+            raise ValueError(f"Weight for {name} must not be negative")
+    if not any(mix.values()):
+        raise ValueError("Request mix is empty")
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _serve(backend: str, positions: int, latency_ms: float, port: int, ready) -> None:
+    """Child process: the app under test on the chosen IG backend"""
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # one access line per request
+    os.environ["IG_STREAMING"] = "false"
+    os.environ.setdefault("IG_CFD_ACCOUNT", "CFD1")
+    # Hedges against the synthetic book must not land in the real hedge state database
+    os.environ["HEDGE_STATE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "hedge_state.db")
+
+    from werkzeug.serving import make_server
+
+    from app import create_app
+
+    factory = None
+    if backend == "fake":
+        from benchmarks.fake_ig import FakeIGClient
+
+        factory = lambda: FakeIGClient(positions=positions)  # noqa: E731
+    else:
+        from simulator.gateway import GatewayConfig, GatewaySimulator
+
+        gateway = GatewaySimulator(
+            GatewayConfig(positions=positions, latency_ms=latency_ms, seed=1)
+        ).start()
+        os.environ.update(
+            {"IG_BASE_URL": gateway.url, "IG_API_KEY": "load", "IG_USERNAME": "load", "IG_PASSWORD": "load"}
+        )
+
+    app = create_app(mode="local", warm_up=True, ig_client_factory=factory)
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    ready.put(server.port)
+    server.serve_forever()
+
+
+def start_server(backend: str, positions: int, latency_ms: float) -> Tuple[str, multiprocessing.Process]:
+    """Run the app in its own process so the load generator does not share its GIL"""
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    process = ctx.Process(
+        target=_serve, args=(backend, positions, latency_ms, 0, ready), name="loadtest-app", daemon=True
+    )
+    process.start()
+    port = ready.get(timeout=60)
+    return f"http://127.0.0.1:{port}", process
+
+
+def wait_ready(base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status = requests.get(f"{base_url}/api/ready", timeout=5).json()
+            if status.get("ready"):
+                return
+            if status.get("state") == "failed":
+                raise RuntimeError(f"App failed to start: {status.get('error')}")
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"App at {base_url} not ready after {timeout}s")
+
+
+class LoadTest:
+    """
+    Closed-loop load: `concurrency` clients each send their next request as
+    soon as the previous one returns, picking operations by weight.
+
+    Every response is timed; anything other than 2xx/304, and any transport
+    error, counts as an error for its operation.
+    """
+
+    def __init__(self, base_url: str, mix: Dict[str, float], concurrency: int, seed: int = 1):
+        self.base_url = base_url.rstrip("/")
+        self.mix = mix
+        self.concurrency = concurrency
+        self.seed = seed
+        self.position_ids: List[str] = []
+        self.settings: Dict = {}
+        self._samples: Dict[str, List[float]] = {name: [] for name in mix}
+        self._statuses: Dict[str, Counter] = {name: Counter() for name in mix}
+        self._lock = threading.Lock()
+
+    def prepare(self) -> None:
+        """Load position ids and current settings; also warms the first snapshot"""
+        response = requests.get(f"{self.base_url}/api/positions", timeout=300)
+        response.raise_for_status()
+        self.position_ids = [p["deal_id"] for p in response.json().get("positions", [])]
+        if self.mix.get("hedge") and not self.position_ids:
+            raise RuntimeError("No positions to hedge; is the book empty?")
+        self.settings = requests.get(f"{self.base_url}/api/settings", timeout=30).json()["settings"]
+
+    def _request(self, session: requests.Session, rng: random.Random, name: str) -> str:
+        method, path = OPERATIONS[name]
+        body = None
+        if name == "hedge":
+            path = path.format(id=rng.choice(self.position_ids))
+            body = {}
+        elif name == "settings_update":
+            body = self.settings
+        try:
+            response = session.request(method, self.base_url + path, json=body, timeout=60)
+            return str(response.status_code)
+        except requests.RequestException as e:
+            return type(e).__name__
+
+    def _client(self, index: int, deadline: float, max_requests: Optional[int], counter) -> None:
+        rng = random.Random(self.seed + index)
+        names, weights = zip(*self.mix.items())
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            if max_requests is not None and next(counter) >= max_requests:
+                break
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            status = self._request(session, rng, name)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._samples[name].append(elapsed)
+                self._statuses[name][status] += 1
+
+    def run(self, duration: float, max_requests: Optional[int] = None) -> Dict:
+        counter = itertools.count()
+        started = time.monotonic()
+        deadline = started + duration
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="load") as pool:
+            for i in range(self.concurrency):
+                pool.submit(self._client, i, deadline, max_requests, counter)
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed: float) -> Dict:
+        operations = {}
+        all_samples: List[float] = []
+        all_statuses: Counter = Counter()
+        for name in self.mix:
+            samples = sorted(self._samples[name])
+            all_samples.extend(samples)
+            all_statuses.update(self._statuses[name])
+            operations[name] = _summary(samples, self._statuses[name], elapsed)
+        return {
+            "base_url": self.base_url,
+            "concurrency": self.concurrency,
+            "mix": self.mix,
+            "elapsed_seconds": round(elapsed, 3),
+            "positions": len(self.position_ids),
+            "total": _summary(sorted(all_samples), all_statuses, elapsed),
+            "operations": operations,
+        }
+
+
+def _summary(samples: List[float], statuses: Counter, elapsed: float) -> Dict:
+    count = len(samples)
+    errors = sum(n for status, n in statuses.items() if not (status.startswith("2") or status == "304"))
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2) if samples else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(
+        f"\n{report['positions']} positions, {report['concurrency']} clients, "
+        f"{report['elapsed_seconds']}s against {report['base_url']}"
+    )
+    print(f"{'operation':<16} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}  statuses")
+    rows = list(report["operations"].items()) + [("total", report["total"])]
+    for name, s in rows:
+        statuses = " ".join(f"{k}:{v}" for k, v in s["statuses"].items())
+        print(
+            f"{name:<16} {s['requests']:>9} {s['throughput_rps']:>9.1f} {s['p50_ms']:>9.2f} "
+            f"{s['p99_ms']:>9.2f} {s['max_ms']:>9.2f} {s['error_rate']:>7.1%}  {statuses}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the dashboard API end to end")
+    parser.add_argument("--backend", choices=("fake", "simulator"), default="fake",
+                        help="in-process fake IG client, or the HTTP gateway simulator")
+    parser.add_argument("--url", help="test an already running instance instead of starting one")
+    parser.add_argument("--positions", type=int, default=1000, help="synthetic book size")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulator latency per IG call")
+    parser.add_argument("--concurrency", type=int, default=10, help="simultaneous clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--monitor", action="store_true", help="start the hedge monitor during the run")
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        print(f"Starting app on the {args.backend} backend with {args.positions} positions...", flush=True)
+        base_url, process = start_server(args.backend, args.positions, args.latency_ms)
+
+    try:
+        wait_ready(base_url, timeout=120)
+        if args.monitor:
+            requests.post(f"{base_url}/api/monitor/start", json={"auto_hedge": False}, timeout=30).raise_for_status()
+        test = LoadTest(base_url, mix, args.concurrency)
+        test.prepare()
+        print(f"Running {args.concurrency} clients for {args.duration}s...", flush=True)
+        report = test.run(args.duration, args.requests)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join(timeout=10)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 1 if report["total"]["requests"] == 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
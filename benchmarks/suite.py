@@ -0,0 +1,253 @@
+# benchmarks/suite.py
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import scipy
+
+from app.core.delta_hedger import DeltaHedger
+from app.core.option_calculator import OptionCalculator
+from app.models.enums import OptionType
+from app.models.position import Position
+from benchmarks.fake_ig import FakeIGClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (10, 1000, 50000)
+
+# A case builds its inputs for a size (untimed) and returns the callable to time
+Case = Callable[[int], Callable[[], int]]
+
+
+def _option_inputs(size: int, seed: int = 7) -> List[Tuple[float, float, float, float, OptionType]]:
+    rng = random.Random(seed)
+    return [
+        (
+            5000.0,
+            round(5000 * rng.uniform(0.8, 1.2) / 25) * 25,
+            rng.uniform(0.02, 1.0),
+            rng.uniform(0.1, 0.4),
+            OptionType.CALL if rng.random() < 0.5 else OptionType.PUT,
+        )
+        for _ in range(size)
+    ]
+
+
+def calculator_greeks(size: int) -> Callable[[], int]:
+    calculator = OptionCalculator()
+    inputs = _option_inputs(size)
+
+    def run() -> int:
+        for S, K, T, sigma, option_type in inputs:
+            calculator.calculate_greeks(S, K, T, sigma, option_type)
+        return size
+
+    return run
+
+
+def calculator_greeks_vectorized(size: int) -> Callable[[], int]:
+    calculator = OptionCalculator()
+    inputs = _option_inputs(size)
+    S, K, T, sigma = (np.array([row[i] for row in inputs]) for i in range(4))
+    is_call = np.array([row[4] == OptionType.CALL for row in inputs])
+
+    def run() -> int:
+        calculator.calculate_greeks_vectorized(S, K, T, sigma, is_call)
+        return size
+
+    return run
+
+
+def calculator_implied_volatility(size: int) -> Callable[[], int]:
+    calculator = OptionCalculator()
+    # Prices from known vols, so every solve has an answer to converge to
+    inputs = [
+        (S, K, T, calculator.calculate_greeks(S, K, T, sigma, option_type)["time_value"], option_type)
+        for S, K, T, sigma, option_type in _option_inputs(size)
+    ]
+
+    def run() -> int:
+        for S, K, T, price, option_type in inputs:
+            try:
+                calculator.calculate_implied_volatility(S, K, T, price, option_type)
+            except ValueError:
+                pass  # non-convergence still costs a full solve, which is what we time
+        return size
+
+    return run
+
+
+def position_from_dict(size: int) -> Callable[[], int]:
+    payloads = FakeIGClient(positions=size).position_payloads()
+
+    def run() -> int:
+        for payload in payloads:
+            Position.from_dict(payload)
+        return size
+
+    return run
+
+
+def position_to_dict(size: int) -> Callable[[], int]:
+    positions = [Position.from_dict(p) for p in FakeIGClient(positions=size).position_payloads()]
+
+    def run() -> int:
+        for position in positions:
+            position.to_dict()
+        return size
+
+    return run
+
+
+def hedger_positions_status(size: int) -> Callable[[], int]:
+    hedger = DeltaHedger(FakeIGClient(positions=size))
+    hedger.get_all_positions_status()  # warm the position cache as a running hedger would
+
+    def run() -> int:
+        status = hedger.get_all_positions_status()
+        if "error" in status:
+            raise RuntimeError(status["error"])
+        return size
+
+    return run
+
+
+CASES: Dict[str, Case] = {
+    "calculator.calculate_greeks": calculator_greeks,
+    "calculator.calculate_greeks_vectorized": calculator_greeks_vectorized,
+    "calculator.calculate_implied_volatility": calculator_implied_volatility,
+    "position.from_dict": position_from_dict,
+    "position.to_dict": position_to_dict,
+    "hedger.get_all_positions_status": hedger_positions_status,
+}
+
+# Largest book a case runs at. The IV solver rarely converges inside its 100
+# Newton steps today (~25ms per solve), so 50,000 solves would take 20 minutes.
+MAX_SIZES: Dict[str, int] = {
+    "calculator.calculate_implied_volatility": 1000,
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL)
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return None
+
+
+def run_case(name: str, size: int, repeat: int, min_time: float) -> Dict:
+    """Time one case: best and median of `repeat` rounds, each at least min_time long"""
+    fn = CASES[name](size)
+    fn()  # warm-up, also triggers lazy imports such as scipy
+
+    rounds: List[float] = []
+    ops = 0
+    for _ in range(repeat):
+        loops = 0
+        started = time.perf_counter()
+        while True:
+            ops = fn()
+            loops += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+        rounds.append(elapsed / loops)
+
+    best = min(rounds)
+    return {
+        "case": name,
+        "size": size,
+        "ops": ops,
+        "repeat": repeat,
+        "best_seconds": best,
+        "median_seconds": statistics.median(rounds),
+        "per_op_us": best / ops * 1e6,
+    }
+
+
+def run_suite(
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    cases: Optional[Iterable[str]] = None,
+    repeat: int = 3,
+    min_time: float = 0.2,
+    progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    results = {}
+    for name in cases or CASES:
+        if name not in CASES:
+            raise ValueError(f"Unknown case {name}; choose from {', '.join(CASES)}")
+        for size in sizes:
+            if size > MAX_SIZES.get(name, size):
+                continue
+            # Large books are slow enough that one round per repeat is plenty
+            result = run_case(name, size, repeat, min_time if size <= 1000 else 0.0)
+            results[f"{name}[{size}]"] = result
+            if progress:
+                progress(result)
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> Tuple[List[Dict], bool]:
+    """Per-case ratios of current to baseline time; regressed if any exceed 1 + threshold"""
+    rows = []
+    regressed = False
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            rows.append({"key": key, "status": "new", "current": result["per_op_us"]})
+            continue
+        ratio = result["best_seconds"] / base["best_seconds"] if base["best_seconds"] else float("inf")
+        status = "ok"
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+            regressed = True
+        elif ratio < 1 - threshold:
+            status = "faster"
+        rows.append(
+            {
+                "key": key,
+                "status": status,
+                "baseline": base["per_op_us"],
+                "current": result["per_op_us"],
+                "ratio": ratio,
+            }
+        )
+    for key in baseline["results"].keys() - current["results"].keys():
+        rows.append({"key": key, "status": "missing", "baseline": baseline["results"][key]["per_op_us"]})
+    return rows, regressed
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(results: Dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,138 @@
+# config/logging_config.py
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+LOG_SETTINGS = {
+    "level": "INFO",
+    "log_dir": "logs",
+    "log_file": "delta_hedger.log",
+    "max_bytes": 50 * 1024 * 1024,
+    "backup_count": 5,
+    # Loggers on the request/Greek hot path whose repeated messages are sampled
+    "sampled_loggers": [
+        "app.services.ig_client",
+        "app.services.price_stream",
+        "app.services.market_data_cache",
+        "app.core.option_calculator",
+        "app.core.delta_hedger",
+    ],
+    "sample_burst": 20,  # records per message template let through per window
+    "sample_window": 60.0,  # seconds
+}
+
+_payload_subsystems = frozenset(
+    s.strip() for s in os.getenv("LOG_PAYLOADS", "").split(",") if s.strip()
+)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def payload_logging_enabled(subsystem: str) -> bool:
+    """Whether full request/response bodies should be logged for a subsystem"""
+    return "all" in _payload_subsystems or subsystem in _payload_subsystems
+
+
+def log_payload(logger: logging.Logger, subsystem: str, label: str, payload) -> None:
+    """Log a payload dump at DEBUG, only when opted in via LOG_PAYLOADS"""
+    if payload_logging_enabled(subsystem) and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s: %s", label, payload)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limit repeated messages from hot-path loggers.
+
+    Records are keyed by logger name and unformatted message template, so it
+    relies on lazy %-style arguments. Warnings and above always pass.
+    """
+
+    def __init__(self, loggers, burst: int, window: float):
+        super().__init__()
+        self.prefixes = tuple(loggers)
+        self.burst = burst
+        self.window = window
+        self._counts: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not record.name.startswith(self.prefixes):
+            return True
+
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window_start, count, suppressed = self._counts.get(key, (now, 0, 0))
+            if now - window_start > self.window:
+                if suppressed:
+                    record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+                window_start, count, suppressed = now, 0, 0
+            if count < self.burst:
+                self._counts[key] = [window_start, count + 1, suppressed]
+                return True
+            self._counts[key] = [window_start, count, suppressed + 1]
+            return False
+
+
+def configure_logging(level: Optional[str] = None, log_to_file: bool = True) -> None:
+    """
+    Route all logging through a queue so handler I/O runs on a listener thread.
+
+    Request threads only enqueue records; console and rotating-file handlers
+    are driven by a QueueListener that is flushed at exit.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level_name = (level or os.getenv("LOG_LEVEL", LOG_SETTINGS["level"])).upper()
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    handlers = [logging.StreamHandler()]
+    if log_to_file:
+        logs_dir = Path(os.getenv("LOG_DIR", LOG_SETTINGS["log_dir"]))
+        logs_dir.mkdir(exist_ok=True)
+        handlers.append(
+            logging.handlers.RotatingFileHandler(
+                logs_dir / LOG_SETTINGS["log_file"],
+                maxBytes=LOG_SETTINGS["max_bytes"],
+                backupCount=LOG_SETTINGS["backup_count"],
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(
+        SamplingFilter(
+            LOG_SETTINGS["sampled_loggers"],
+            burst=LOG_SETTINGS["sample_burst"],
+            window=LOG_SETTINGS["sample_window"],
+        )
+    )
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level_name)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Stop the listener thread, flushing any queued records"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -10,4 +10,119 @@ HEDGE_SETTINGS = {
     "delta_threshold": 0.05,
     "api_request_interval": 0.1,  # seconds
     "pnl_threshold": 0.01,
+    "volatility_source": "market",  # market | ewma | rolling | parkinson | garman_klass
+}
+
+STREAM_SETTINGS = {
+    "enabled": False,
+    "max_quote_age": 5.0,  # seconds before a streamed quote is considered stale
+    "reconnect_delay": 5.0,  # seconds
+    "keepalive": 10.0,  # seconds
+    "client_id": "mgQkwtwdysogQz2BJ4Ji kOj2Bg",
+}
+
+CACHE_SETTINGS = {
+    "option_ttl": 2.0,  # seconds a cached option snapshot is served as fresh
+    "underlying_ttl": 0.5,  # seconds a cached underlying snapshot is served as fresh
+    "max_stale": 30.0,  # seconds a stale snapshot may be served while refreshing
+    "option_epic_prefixes": ["OP."],
+}
+
+AUTH_SETTINGS = {
+    "refresh_lead_time": 20.0,  # seconds before expiry the background refresher renews
+    "refresh_retry_delay": 5.0,  # seconds between failed refresh attempts
+    "refresh_min_interval": 1.0,  # floor on the wait between refreshes, for tokens shorter-lived than the lead time
+}
+
+HISTORY_SETTINGS = {
+    "cache_dir": "data/prices",  # columnar bar cache, one directory per epic/resolution
+}
+
+VOLATILITY_SETTINGS = {
+    "ewma_halflife": 3600.0,  # seconds
+    "rolling_window": 500,  # returns
+    "bar_seconds": 60.0,  # tick aggregation for range estimators
+    "range_window": 120,  # bars
+    "min_samples": 20,  # returns before ewma/rolling estimates are used
+}
+
+SNAPSHOT_SETTINGS = {
+    "max_age": 5.0,  # seconds a snapshot is served without monitoring before recomputing
+    "max_tombstones": 1000,  # removed positions remembered for ?since= responses
+    "max_change_log": 100000,  # changed deal ids kept across recent versions for ?since= responses
+    "max_page_size": 1000,  # largest limit= accepted by position listings
+}
+
+EVENT_SETTINGS = {
+    "queue_size": 100,  # frames buffered per SSE subscriber before it is resynced
+    "keepalive": 15.0,  # seconds between SSE keepalive comments
+}
+
+ENGINE_SETTINGS = {
+    "address": "127.0.0.1:6100",  # engine command socket, host:port or a unix socket path
+    "shm_name": "delta_hedger_state",
+    "shm_size": 64 * 1024 * 1024,  # bytes, split across two snapshot buffers
+    "poll_interval": 0.1,  # seconds between shared-memory checks for SSE relays
+    "connect_timeout": 10.0,  # seconds a worker waits for the engine to come up
+}
+
+SUPERVISOR_SETTINGS = {
+    "workers": 1,  # hedger processes the book is partitioned across (ENGINE_WORKERS); 1 = no partitioning
+    "partition_by": "epic",  # epic | underlying (ENGINE_PARTITION_BY)
+    "start_timeout": 60.0,  # seconds for a partition worker to log in and start listening
+    "restart_delay": 5.0,  # seconds between checks for exited partition workers
+}
+
+STATE_SETTINGS = {
+    "enabled": True,  # HEDGE_STATE_ENABLED overrides
+    "path": "data/hedge_state.db",  # SQLite (WAL) hedge state and history (HEDGE_STATE_PATH overrides)
+    "batch_size": 500,  # queued writes committed per transaction
+    "busy_timeout": 5.0,  # seconds to wait on another process's write lock
+    "max_history": 1000,  # largest limit= accepted by /api/hedge/history
+}
+
+PNL_SETTINGS = {
+    "max_days": 30,  # days of book-level attribution kept for /api/pnl/attribution
+    "initial_capacity": 1024,  # positions tracked before the state arrays grow
+    "max_positions": 1000,  # largest limit= accepted by /api/pnl/attribution
+}
+
+JOB_SETTINGS = {
+    "max_workers": 4,  # concurrent hedge orders across all bulk jobs
+    "max_finished": 100,  # finished jobs kept for /api/jobs lookups
+    "stream_timeout": 15.0,  # seconds between job progress keepalives
+}
+
+RISK_SETTINGS = {
+    "strike_band_width": 100.0,  # points per strike bucket in /api/risk/greeks
+    "default_volatility": 0.2,  # used when a position was priced without a vol estimate
+}
+
+PRICING_SETTINGS = {
+    "max_contracts": 50000,  # hypothetical contracts accepted by /api/price/batch
+    "chunk_size": 1000,  # contracts priced and streamed per chunk
+}
+
+METRICS_SETTINGS = {
+    # seconds; IG calls and hedge cycles
+    "latency_buckets": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    # seconds; Greeks calculations
+    "compute_buckets": (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1),
+}
+
+PROFILER_SETTINGS = {
+    "output_dir": "data/profiles",  # collapsed-stack files, one per session
+    "interval": 0.005,  # seconds between stack samples
+    "min_interval": 0.001,
+    "max_seconds": 300,  # cap for any session, including request/cycle ones waiting for traffic
+    "max_requests": 1000,
+    "max_depth": 128,  # frames kept per sampled stack
+    "max_history": 50,  # sessions listed by /api/admin/profiles
+}
+
+TRACING_SETTINGS = {
+    "enabled": True,  # TRACING_ENABLED overrides
+    "max_traces": 20,  # finished traces kept per root span name for /api/traces
+    "max_spans": 10000,  # per trace; later spans are counted as dropped
+    "export_path": None,  # JSON lines file, one span per line (TRACE_EXPORT_PATH overrides)
 }
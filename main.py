@@ -1,32 +1,25 @@
 import logging
 import os
-from pathlib import Path
 
-# Create logs directory if it doesn't exist
-logs_dir = Path("logs")
-logs_dir.mkdir(exist_ok=True)
+from config.logging_config import configure_logging
 
 # Configure logging before importing app
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        # Console handler
-        logging.StreamHandler(),
-        # File handler
-        logging.FileHandler(logs_dir / "delta_hedger.log")
-    ]
-)
+configure_logging()
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
-from app import app
+from app import create_app
+
+debug = os.getenv("FLASK_DEBUG", "True").lower() == "true"
+# The debug reloader also runs this module in its file-watching parent, which must not log in
+reloader_parent = __name__ == "__main__" and debug and not os.getenv("WERKZEUG_RUN_MAIN")
+app = create_app(warm_up=False if reloader_parent else None)
 
 if __name__ == "__main__":
     logger.info("Starting Delta Hedging Platform")
     app.run(
         host=os.getenv("FLASK_HOST", "0.0.0.0"),
         port=int(os.getenv("FLASK_PORT", 8000)),
-        debug=os.getenv("FLASK_DEBUG", "True").lower() == "true"
+        debug=debug
     )
\ No newline at end of file
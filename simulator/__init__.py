@@ -0,0 +1,3 @@
+# simulator/__init__.py
+from simulator.gateway import GatewayConfig, GatewaySimulator, create_gateway
+from simulator.market import SyntheticBook, generate_positions
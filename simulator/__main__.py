@@ -0,0 +1,42 @@
+# simulator/__main__.py
+import argparse
+import logging
+
+from simulator.gateway import GatewayConfig, create_gateway
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local IG REST gateway simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--positions", type=int, default=100, help="synthetic book size")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean injected latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 429")
+    parser.add_argument(
+        "--allowance-error-rate",
+        type=float,
+        default=0.0,
+        help="probability of a 403 exceeded-api-key-allowance",
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="requests/second per API key (0 = off)"
+    )
+    parser.add_argument("--token-ttl", type=int, default=60, help="access token lifetime")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = GatewayConfig(
+        positions=args.positions,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        allowance_error_rate=args.allowance_error_rate,
+        rate_limit=args.rate_limit,
+        token_ttl=args.token_ttl,
+        seed=args.seed,
+    )
+    create_gateway(config).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+# simulator/gateway.py
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+from werkzeug.serving import make_server
+
+from simulator.market import RESOLUTION_SECONDS, UNDERLYING_EPIC, SyntheticBook
+
+logger = logging.getLogger(__name__)
+
+STREAM_FIELDS = ("bid", "offer", "updateTime", "marketStatus")
+
+
+class GatewayConfig:
+    """Tunables for the simulated IG gateway"""
+
+    def __init__(
+        self,
+        positions: int = 100,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        allowance_error_rate: float = 0.0,
+        rate_limit: float = 0.0,
+        token_ttl: int = 60,
+        stream_interval: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        self.positions = positions
+        self.latency_ms = latency_ms  # mean latency, jittered +/-50%
+        self.error_rate = error_rate  # probability of a 429 response
+        self.allowance_error_rate = allowance_error_rate  # probability of a 403 allowance error
+        self.rate_limit = rate_limit  # requests/second per API key, 0 disables
+        self.token_ttl = token_ttl
+        self.stream_interval = stream_interval
+        self.seed = seed
+
+
+class GatewayState:
+    def __init__(self, config: GatewayConfig):
+        self.config = config
+        self.book = SyntheticBook(size=config.positions, seed=config.seed)
+        self.tokens: Dict[str, float] = {}
+        self.refresh_tokens: Dict[str, str] = {}
+        self.confirms: Dict[str, Dict] = {}
+        self.stream_sessions: Dict[str, Dict] = {}
+        self.buckets: Dict[str, Dict] = {}
+        self.stats = {"requests": 0, "throttled": 0, "orders": 0}
+        self.lock = threading.Lock()
+
+    def issue_token(self) -> Dict:
+        access_token = uuid.uuid4().hex
+        refresh_token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[access_token] = time.time() + self.config.token_ttl
+            self.refresh_tokens[refresh_token] = access_token
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "scope": "profile",
+            "token_type": "Bearer",
+            "expires_in": str(self.config.token_ttl),
+        }
+
+    def token_valid(self, header: Optional[str]) -> bool:
+        if not header or not header.startswith("Bearer "):
+            return False
+        with self.lock:
+            expiry = self.tokens.get(header[len("Bearer "):])
+        return expiry is not None and expiry > time.time()
+
+    def take_rate_token(self, api_key: str) -> bool:
+        """Token bucket per API key; False when the allowance is exhausted"""
+        rate = self.config.rate_limit
+        if rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            bucket = self.buckets.setdefault(api_key, {"tokens": rate, "at": now})
+            bucket["tokens"] = min(rate, bucket["tokens"] + (now - bucket["at"]) * rate)
+            bucket["at"] = now
+            if bucket["tokens"] < 1:
+                return False
+            bucket["tokens"] -= 1
+            return True
+
+
+def create_gateway(config: Optional[GatewayConfig] = None) -> Flask:
+    """Create a Flask app implementing the subset of the IG REST API IGClient uses"""
+    config = config or GatewayConfig()
+    state = GatewayState(config)
+    gateway = Flask(__name__)
+    gateway.config["SIMULATOR_STATE"] = state
+
+    @gateway.before_request
+    def simulate_network():
+        with state.lock:
+            state.stats["requests"] += 1
+
+        if config.latency_ms > 0:
+            time.sleep(config.latency_ms * random.uniform(0.5, 1.5) / 1000)
+
+        if request.path.startswith("/lightstreamer"):
+            return None
+
+        api_key = request.headers.get("X-IG-API-KEY", "")
+        if random.random() < config.error_rate or not state.take_rate_token(api_key):
+            with state.lock:
+                state.stats["throttled"] += 1
+            response = jsonify({"errorCode": "error.public-api.too-many-requests"})
+            response.status_code = 429
+            response.headers["Retry-After"] = "1"
+            return response
+        if random.random() < config.allowance_error_rate:
+            with state.lock:
+                state.stats["throttled"] += 1
+            return (
+                jsonify({"errorCode": "error.public-api.exceeded-api-key-allowance"}),
+                403,
+            )
+
+        if request.path in ("/session/refresh-token",) or (
+            request.path == "/session" and request.method == "POST"
+        ):
+            return None
+        if not state.token_valid(request.headers.get("Authorization")):
+            return jsonify({"errorCode": "error.security.oauth-token-invalid"}), 401
+        return None
+
+    @gateway.route("/session", methods=["POST"])
+    def create_session():
+        data = request.get_json(silent=True) or {}
+        if not data.get("identifier") or not data.get("password"):
+            return jsonify({"errorCode": "error.security.invalid-details"}), 401
+        return jsonify(
+            {
+                "clientId": "SIMCLIENT",
+                "accountId": "SIMOPTIONS",
+                "timezoneOffset": 0,
+                "lightstreamerEndpoint": request.host_url.rstrip("/"),
+                "oauthToken": state.issue_token(),
+            }
+        )
+
+    @gateway.route("/session", methods=["GET"])
+    def read_session():
+        response = jsonify(
+            {
+                "clientId": "SIMCLIENT",
+                "accountId": request.headers.get("IG-ACCOUNT-ID") or "SIMOPTIONS",
+                "timezoneOffset": 0,
+                "locale": "en_GB",
+                "currency": "GBP",
+                "lightstreamerEndpoint": request.host_url.rstrip("/"),
+            }
+        )
+        if request.args.get("fetchSessionTokens") == "true":
+            response.headers["CST"] = uuid.uuid4().hex
+            response.headers["X-SECURITY-TOKEN"] = uuid.uuid4().hex
+        return response
+
+    @gateway.route("/session/refresh-token", methods=["POST"])
+    def refresh_session():
+        data = request.get_json(silent=True) or {}
+        with state.lock:
+            old_access = state.refresh_tokens.pop(data.get("refresh_token"), None)
+            if old_access:
+                state.tokens.pop(old_access, None)
+        if not old_access:
+            return jsonify({"errorCode": "error.security.invalid-refresh-token"}), 401
+        return jsonify(state.issue_token())
+
+    @gateway.route("/positions", methods=["GET"])
+    def positions():
+        return jsonify(state.book.positions_payload())
+
+    @gateway.route("/markets/<epic>", methods=["GET"])
+    def market(epic: str):
+        details = state.book.market_details(epic)
+        if details is None:
+            return jsonify({"errorCode": "error.service.marketdata.instrument.epic.unavailable"}), 404
+        return jsonify(details)
+
+    @gateway.route("/prices/<epic>", methods=["GET"])
+    def prices(epic: str):
+        step = RESOLUTION_SECONDS.get(request.args.get("resolution", "MINUTE"))
+        if step is None:
+            return jsonify({"errorCode": "error.malformed.resolution"}), 400
+        try:
+            start = datetime.strptime(request.args["from"], "%Y-%m-%dT%H:%M:%S")
+            end = datetime.strptime(request.args["to"], "%Y-%m-%dT%H:%M:%S")
+        except (KeyError, ValueError):
+            return jsonify({"errorCode": "error.malformed.date"}), 400
+
+        bars = state.book.price_history(epic, step, start, end)
+        with state.lock:
+            state.stats["history_points"] = state.stats.get("history_points", 0) + len(bars)
+        return jsonify(
+            {
+                "prices": bars,
+                "instrumentType": "INDICES",
+                "metadata": {
+                    "allowance": {"remainingAllowance": 10000, "totalAllowance": 10000},
+                    "size": len(bars),
+                    "pageData": {"pageSize": 0, "pageNumber": 1, "totalPages": 1},
+                },
+            }
+        )
+
+    @gateway.route("/positions/otc", methods=["POST"])
+    def create_otc_position():
+        order = request.get_json(silent=True) or {}
+        quote = state.book.quote(order.get("epic", ""))
+        if quote is None:
+            return jsonify({"errorCode": "error.service.create.otc.epic.unavailable"}), 400
+        deal_reference = uuid.uuid4().hex[:15].upper()
+        level = quote["offer"] if order.get("direction") == "BUY" else quote["bid"]
+        with state.lock:
+            state.stats["orders"] += 1
+            state.confirms[deal_reference] = {
+                "dealReference": deal_reference,
+                "dealId": f"DIAAAA{deal_reference[:10]}",
+                "dealStatus": "ACCEPTED",
+                "status": "OPEN",
+                "reason": "SUCCESS",
+                "epic": order.get("epic"),
+                "direction": order.get("direction"),
+                "size": float(order.get("size", 0)),
+                "level": level,
+                "expiry": order.get("expiry", "-"),
+                "affectedDeals": [],
+            }
+        return jsonify({"dealReference": deal_reference})
+
+    @gateway.route("/confirms/<deal_reference>", methods=["GET"])
+    def confirm(deal_reference: str):
+        with state.lock:
+            confirmation = state.confirms.get(deal_reference)
+        if confirmation is None:
+            return jsonify({"errorCode": "error.confirms.deal-not-found"}), 404
+        return jsonify(confirmation)
+
+    @gateway.route("/lightstreamer/create_session.txt", methods=["POST"])
+    def lightstreamer_create_session():
+        session_id = uuid.uuid4().hex[:16]
+        with state.lock:
+            state.stream_sessions[session_id] = {"subscriptions": {}}
+
+        def stream():
+            yield f"CONOK,{session_id},50000,5000,*\r\n"
+            try:
+                while True:
+                    with state.lock:
+                        session = state.stream_sessions.get(session_id)
+                        subscriptions = dict(session["subscriptions"]) if session else None
+                    if subscriptions is None:
+                        break
+                    if not subscriptions:
+                        yield "PROBE\r\n"
+                    for sub_id, epic in subscriptions.items():
+                        quote = state.book.quote(epic)
+                        if quote:
+                            values = "|".join(str(quote[f]) for f in STREAM_FIELDS)
+                            yield f"U,{sub_id},1,{values}\r\n"
+                    time.sleep(config.stream_interval)
+            finally:
+                with state.lock:
+                    state.stream_sessions.pop(session_id, None)
+
+        return Response(stream_with_context(stream()), mimetype="text/plain")
+
+    @gateway.route("/lightstreamer/control.txt", methods=["POST"])
+    def lightstreamer_control():
+        session_id = request.args.get("LS_session")
+        with state.lock:
+            session = state.stream_sessions.get(session_id)
+            if session is None:
+                return "REQERR,1,20,Session not found\r\n"
+            group = request.form.get("LS_group", "")
+            sub_id = request.form.get("LS_subId", "0")
+            if request.form.get("LS_op") == "delete":
+                session["subscriptions"].pop(sub_id, None)
+            else:
+                session["subscriptions"][sub_id] = group.split(":", 1)[-1]
+        return f"REQOK,{request.form.get('LS_reqId', sub_id)}\r\n"
+
+    @gateway.route("/simulator/stats", methods=["GET"])
+    def simulator_stats():
+        with state.lock:
+            stats = dict(state.stats)
+            stats["stream_sessions"] = len(state.stream_sessions)
+        stats["positions"] = len(state.book.positions)
+        stats["underlying"] = {"epic": UNDERLYING_EPIC, "price": state.book.process.price()}
+        return jsonify(stats)
+
+    return gateway
+
+
+class GatewaySimulator:
+    """Run the simulated gateway on a background thread"""
+
+    def __init__(
+        self, config: Optional[GatewayConfig] = None, host: str = "127.0.0.1", port: int = 0
+    ):
+        self.app = create_gateway(config)
+        self.server = make_server(host, port, self.app, threaded=True)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server.host}:{self.server.port}"
+
+    def start(self) -> "GatewaySimulator":
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="ig-gateway-simulator", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+
+    def __enter__(self) -> "GatewaySimulator":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,240 @@
+# simulator/market.py
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+UNDERLYING_EPIC = "IX.D.SPTRD.IFS.IP"
+SECONDS_PER_YEAR = 365 * 24 * 3600
+RESOLUTION_SECONDS = {
+    "SECOND": 1, "MINUTE": 60, "MINUTE_2": 120, "MINUTE_3": 180, "MINUTE_5": 300,
+    "MINUTE_10": 600, "MINUTE_15": 900, "MINUTE_30": 1800, "HOUR": 3600,
+    "HOUR_2": 7200, "HOUR_3": 10800, "HOUR_4": 14400, "DAY": 86400,
+    "WEEK": 604800, "MONTH": 2592000,
+}
+
+
+def _norm_cdf(x: float) -> float:
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def black_scholes_price(
+    S: float, K: float, T: float, sigma: float, rate: float, is_call: bool
+) -> float:
+    """Black-Scholes price; kept local so the simulator has no app imports"""
+    T = max(T, 1e-4)
+    sqrt_t = math.sqrt(T)
+    d1 = (math.log(S / K) + (rate + sigma**2 / 2) * T) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    if is_call:
+        return S * _norm_cdf(d1) - K * math.exp(-rate * T) * _norm_cdf(d2)
+    return K * math.exp(-rate * T) * _norm_cdf(-d2) - S * _norm_cdf(-d1)
+
+
+class PriceProcess:
+    """Geometric Brownian motion advanced lazily on wall-clock time"""
+
+    def __init__(
+        self,
+        spot: float = 5000.0,
+        volatility: float = 0.2,
+        drift: float = 0.0,
+        time_scale: float = 60.0,
+        seed: Optional[int] = None,
+    ):
+        # time_scale: simulated seconds per real second, so prices visibly move
+        self.spot = spot
+        self.open = spot
+        self.high = spot
+        self.low = spot
+        self.volatility = volatility
+        self.drift = drift
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def price(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            dt = (now - self._last) * self.time_scale / SECONDS_PER_YEAR
+            if dt > 0:
+                shock = self._rng.gauss(0, 1)
+                self.spot *= math.exp(
+                    (self.drift - self.volatility**2 / 2) * dt
+                    + self.volatility * math.sqrt(dt) * shock
+                )
+                self.high = max(self.high, self.spot)
+                self.low = min(self.low, self.spot)
+                self._last = now
+            return self.spot
+
+
+class SyntheticBook:
+    """Synthetic option book plus the underlying it is written on"""
+
+    def __init__(
+        self,
+        size: int = 100,
+        spot: float = 5000.0,
+        volatility: float = 0.2,
+        rate: float = 0.05,
+        spread: float = 0.5,
+        seed: Optional[int] = None,
+        time_scale: float = 60.0,
+    ):
+        self.rate = rate
+        self.spread = spread
+        self.process = PriceProcess(
+            spot=spot, volatility=volatility, time_scale=time_scale, seed=seed
+        )
+        self.markets: Dict[str, Dict] = {}
+        self.positions: List[Dict] = generate_positions(size, spot, seed=seed)
+        for pos in self.positions:
+            market = pos["market"]
+            self.markets[market["epic"]] = {
+                "strike": pos["strike"],
+                "is_call": market["instrumentType"] == "OPT_CALL",
+                "expiry": market["expiry"],
+                "name": market["instrumentName"],
+            }
+
+    def quote(self, epic: str) -> Optional[Dict]:
+        """Current bid/offer snapshot for an epic, or None if unknown"""
+        spot = self.process.price()
+        if epic == UNDERLYING_EPIC:
+            mid, high, low, open_ = spot, self.process.high, self.process.low, self.process.open
+        else:
+            market = self.markets.get(epic)
+            if not market:
+                return None
+            expiry = datetime.strptime(market["expiry"], "%d-%b-%y")
+            T = max((expiry - datetime.now()).days / 365.0, 0.001)
+            mid = black_scholes_price(
+                spot, market["strike"], T, self.process.volatility, self.rate, market["is_call"]
+            )
+            high, low, open_ = mid * 1.05, mid * 0.95, mid
+
+        half_spread = max(self.spread / 2, mid * 0.002)
+        bid = round(max(mid - half_spread, 0.01), 2)
+        offer = round(mid + half_spread, 2)
+        change = (mid - open_) / open_ * 100 if open_ else 0.0
+        return {
+            "bid": bid,
+            "offer": offer,
+            "high": round(high, 2),
+            "low": round(low, 2),
+            "percentageChange": round(change, 4),
+            "netChange": round(mid - open_, 4),
+            "updateTime": datetime.now().strftime("%H:%M:%S"),
+            "marketStatus": "TRADEABLE",
+        }
+
+    def market_details(self, epic: str) -> Optional[Dict]:
+        """Payload shaped like GET /markets/{epic}"""
+        snapshot = self.quote(epic)
+        if snapshot is None:
+            return None
+        market = self.markets.get(epic)
+        instrument = {
+            "epic": epic,
+            "name": market["name"] if market else "US 500 Cash",
+            "type": ("OPT_CALL" if market["is_call"] else "OPT_PUT") if market else "INDICES",
+            "expiry": market["expiry"] if market else "-",
+        }
+        if market:
+            instrument["strikePrice"] = market["strike"]
+        return {"instrument": instrument, "snapshot": snapshot, "dealingRules": {}}
+
+    def price_history(self, epic: str, step: int, start: datetime, end: datetime) -> List[Dict]:
+        """
+        Deterministic synthetic bars for GET /prices/{epic}.
+
+        Each bar is derived from its own timestamp, so repeated or overlapping
+        queries return identical values without keeping any history.
+        """
+        base = self.process.open
+        if epic != UNDERLYING_EPIC:
+            market = self.markets.get(epic)
+            if not market:
+                return []
+            base = max(market["strike"] * 0.02, 1.0)
+
+        bars = []
+        first = int(start.replace(tzinfo=timezone.utc).timestamp()) // step * step
+        last = int(end.replace(tzinfo=timezone.utc).timestamp())
+        for ts in range(first, last + 1, step):
+            rng = random.Random(f"{epic}:{ts}")
+            level = base * math.exp(0.05 * math.sin(ts / 86400 / 20) + rng.gauss(0, 0.002))
+            high = level * (1 + abs(rng.gauss(0, 0.002)))
+            low = level * (1 - abs(rng.gauss(0, 0.002)))
+            close = rng.uniform(low, high)
+
+            def price(value: float) -> Dict:
+                half_spread = max(self.spread / 2, value * 0.0002)
+                return {
+                    "bid": round(value - half_spread, 2),
+                    "ask": round(value + half_spread, 2),
+                    "lastTraded": None,
+                }
+
+            moment = datetime.fromtimestamp(ts, timezone.utc)
+            bars.append(
+                {
+                    "snapshotTime": moment.strftime("%Y/%m/%d %H:%M:%S"),
+                    "snapshotTimeUTC": moment.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "openPrice": price(level),
+                    "closePrice": price(close),
+                    "highPrice": price(high),
+                    "lowPrice": price(low),
+                    "lastTradedVolume": rng.randint(0, 1000),
+                }
+            )
+        return bars
+
+    def positions_payload(self) -> Dict:
+        """Payload shaped like GET /positions, with live bid/offer"""
+        positions = []
+        for pos in self.positions:
+            market = dict(pos["market"])
+            market.update(self.quote(market["epic"]) or {})
+            positions.append({"position": pos["position"], "market": market})
+        return {"positions": positions}
+
+
+def generate_positions(size: int, spot: float, seed: Optional[int] = None) -> List[Dict]:
+    """Generate `size` option positions in IG /positions format around a spot"""
+    rng = random.Random(seed)
+    positions = []
+    today = datetime.now()
+    for i in range(size):
+        is_call = rng.random() < 0.5
+        strike = round(spot * rng.uniform(0.8, 1.2) / 25) * 25
+        expiry = (today + timedelta(days=rng.randint(7, 365))).strftime("%d-%b-%y").upper()
+        kind = "C" if is_call else "P"
+        epic = f"OP.D.SPX{i % 12 + 1}.{strike}{kind}.IP"
+        positions.append(
+            {
+                "strike": strike,
+                "position": {
+                    "dealId": f"DIAAAA{i:08d}",
+                    "dealReference": f"SIMREF{i:08d}",
+                    "size": round(rng.uniform(0.5, 10), 1),
+                    "direction": rng.choice(["BUY", "SELL"]),
+                    "contractSize": 1.0,
+                    "level": round(rng.uniform(5, 150), 2),
+                    "currency": "GBP",
+                    "createdDateUTC": today.strftime("%Y-%m-%dT%H:%M:%S"),
+                },
+                "market": {
+                    "epic": epic,
+                    "instrumentName": f"US 500 {strike} {'CALL' if is_call else 'PUT'}",
+                    "instrumentType": "OPT_CALL" if is_call else "OPT_PUT",
+                    "expiry": expiry,
+                    "marketStatus": "TRADEABLE",
+                },
+            }
+        )
+    return positions
@@ -0,0 +1,60 @@
+# tests/test_batch_pricing.py
+import pytest
+
+from app.core.batch_pricing import BatchPricer
+from app.core.delta_hedger import DeltaHedger
+from app.core.risk import GREEKS, RiskAggregator
+from benchmarks.fake_ig import FakeIGClient
+
+
+@pytest.fixture(scope="module")
+def hedger() -> DeltaHedger:
+    return DeltaHedger(FakeIGClient(positions=20, seed=1))
+
+
+def _contract(position: dict) -> dict:
+    """A what-if contract identical to a booked position"""
+    return {
+        "id": position["deal_id"],
+        "underlying": position["underlying_epic"],
+        "option_type": position["option_type"],
+        "direction": position["direction"],
+        "strike": position["strike"],
+        "expiry": position["expiry"],
+        "time_to_expiry": position["time_to_expiry"],
+        "size": position["size"],
+        "contract_size": position["contract_size"],
+        "spot": None,
+        "volatility": None,
+    }
+
+
+def test_identical_contract_impact_equals_position_contribution(hedger):
+    entries = hedger.get_all_positions_status()
+    aggregator = RiskAggregator(hedger.calculator)
+    book = aggregator.aggregate(entries, ())["totals"]
+
+    def market(underlying):
+        raise AssertionError(f"{underlying} is in the book and must not be looked up again")
+
+    pricer = BatchPricer(
+        hedger.calculator, market, book, markets=aggregator.book_markets(entries)
+    )
+    contracts = [_contract(entry["position"]) for entry in entries.values()]
+    pricer.load_markets(contracts)
+    rows = [row for chunk in pricer.price(contracts) for row in chunk]
+
+    assert len(rows) == len(entries)
+    for row in rows:
+        own = aggregator.aggregate({row["id"]: entries[row["id"]]}, ())["totals"]
+        for greek in GREEKS:
+            assert row["impact"][greek] == pytest.approx(own[greek], abs=1e-5)
+            assert row["book_after"][greek] == pytest.approx(book[greek] + own[greek], abs=1e-5)
+
+
+def test_book_is_priced_at_the_underlying_spot(hedger):
+    entries = hedger.get_all_positions_status()
+    spot = hedger.get_market_data("IX.D.SPTRD.IFS.IP")["price"]
+    markets = RiskAggregator(hedger.calculator).book_markets(entries)
+
+    assert markets["IX.D.SPTRD.IFS.IP"][0] == pytest.approx(spot)